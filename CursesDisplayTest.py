@@ -1,10 +1,12 @@
-from CursesUI import CursesDisplay, CursesLayouts, CursesWidgets
+from CursesUI import CursesBackend, CursesDisplay, CursesLayouts, CursesPalette, CursesWidgets, CursesAsync
+import asyncio
 import curses
 
 
 def main(stdscr):
     curses.start_color()
     curses.init_pair(7, curses.COLOR_WHITE, curses.COLOR_BLUE)
+    CursesPalette.for_backend(CursesBackend.terminal).reserve(7)
     display = CursesDisplay.Display(stdscr, log_level=2)
     mylines = ["Line {0} ".format(id) * 3 for id in range(19)]
     myMultiLines = [['test0', 'test0b', 'test0c'], ['test1', 'test1b', 'test1c'], ['test2', 'test2b']]
@@ -51,8 +53,25 @@ def smalltests(stdscr: curses.window):
     testwin1.addstr(4, 0, "bl")
     #stdscr.touchwin()
     testwin1.refresh()
-    while True:
-        stdscr.refresh()
+    stdscr.getch()
+
+
+async def asyncmain(stdscr):
+    display = CursesAsync.AsyncDisplay(stdscr)
+    layout = CursesLayouts.VerticalLayout()
+    display.layout = layout
+    clock = layout.add_widget(CursesWidgets.LabelWidget("0"))
+
+    async def tick():
+        count = 0
+        while True:
+            await asyncio.sleep(0.5)
+            count += 1
+            await display.update(clock, clock.change_value, count)
+
+    ticker = asyncio.create_task(tick())
+    await display.run()
+    ticker.cancel()
 
 
 def test(stdscr):
@@ -0,0 +1,178 @@
+import asyncio
+import curses
+import os
+import signal
+import sys
+
+from CursesUI import CursesBackend, CursesDisplay, CursesKeys, CursesWidgets
+
+
+class AsyncDisplay(CursesDisplay.Display):
+    """A display driven by an asyncio event loop.
+    Input is read when stdin becomes readable and frames are drawn on a coalesced timer,
+    so widgets can be fed from coroutines without blocking on getch."""
+
+    def __init__(self, scrn: curses.window, log_level=0, frame_interval: float = 1 / 60,
+                 refresh_interval: float = None, input_fd: int = None, backend=None, resize_delay: float = 0.1,
+                 max_batch: int = 1024, stats: bool = False, cached_screens: int = 4, logger=None):
+        """:param frame_interval: Seconds to wait before drawing a requested frame, requests in between are merged.
+        :param refresh_interval: If set, a frame is also requested this often to pick up widgets changed directly.
+        :param input_fd: File descriptor to watch for input, defaults to stdin."""
+        super().__init__(scrn, log_level, backend, resize_delay, max_batch, stats, cached_screens, logger)
+        self.frame_interval = frame_interval
+        self.refresh_interval = refresh_interval
+        self.input_fd = sys.stdin.fileno() if input_fd is None else input_fd
+        self.loop = None
+        self.frame_handle = None
+        self.refresh_handle = None
+        self.resize_handle = None
+        self.frame_waiters = []
+        self.stopped = None
+        self.exit_on_enter = True
+
+    def request_frame(self):
+        """Schedules a frame to be drawn. Every request made before the frame is drawn shares it."""
+        if self.frame_handle is None and self.loop is not None:
+            self.frame_handle = self.loop.call_later(self.frame_interval, self.draw_frame)
+
+    def draw_frame(self):
+        self.frame_handle = None
+        self.draw_scrn()
+        waiters, self.frame_waiters = self.frame_waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def next_frame(self):
+        """Returns a future that is resolved once the next frame has been drawn. Before run no frame is drawn,
+        the future is already done and the first frame drawn by run shows the change."""
+        if self.loop is None:
+            waiter = asyncio.get_running_loop().create_future()
+            waiter.set_result(None)
+            return waiter
+        waiter = self.loop.create_future()
+        self.frame_waiters.append(waiter)
+        self.request_frame()
+        return waiter
+
+    async def update(self, widget: CursesWidgets.DisplayWidget, func, *args):
+        """Calls func with args on the loop, marks the widget dirty and waits until the change is on screen.
+        :return: The result of func"""
+        result = func(*args)
+        widget.mark_dirty()
+        await self.next_frame()
+        return result
+
+    def wake(self):
+        """Requests a frame from another thread, used when an update is posted."""
+        loop = self.loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self.request_frame)
+
+    def handle_resize(self):
+        """Restarts the resize timer, the layout is only resized once no KEY_RESIZE arrived for resize_delay."""
+        if self.loop is None:
+            super().handle_resize()
+            return
+        if self.resize_handle is not None:
+            self.resize_handle.cancel()
+        self.resize_handle = self.loop.call_later(self.resize_delay, self.finish_resize)
+
+    def finish_resize(self):
+        self.resize_handle = None
+        self.apply_resize()
+        self.request_frame()
+
+    def window_changed(self):
+        """SIGWINCH handler, stdin does not become readable when the terminal is resized."""
+        try:
+            size = os.get_terminal_size(self.input_fd)
+        except OSError:
+            return
+        self.backend.resize_term(size.lines, size.columns)
+        self.read_input()
+
+    def periodic_refresh(self):
+        self.refresh_handle = self.loop.call_later(self.refresh_interval, self.periodic_refresh)
+        self.request_frame()
+
+    def read_input(self):
+        """Handles every key waiting on the screen as one batch, called by the loop when the input is readable."""
+        keys = []
+        while len(keys) < self.max_batch:
+            keypress = self.scrn.getch()
+            if keypress == -1:
+                break
+            keys.append(keypress)
+        if self.handle_keys(keys, CursesKeys.ENTER if self.exit_on_enter else None):
+            self.stop()
+        self.request_frame()
+
+    async def run(self, exit_on_enter: bool = True):
+        """Runs the display until stop is called, or enter is pressed if exit_on_enter is set."""
+        self.loop = asyncio.get_running_loop()
+        self.exit_on_enter = exit_on_enter
+        self.stopped = self.loop.create_future()
+        self.scrn.nodelay(True)
+        self.watch_input()
+        self.updates.wakeup = self.wake
+        watch_resize = self.backend is CursesBackend.terminal
+        if watch_resize:
+            try:
+                previous_winch = signal.getsignal(signal.SIGWINCH)
+                # replaces the curses handler while running, the size is read by window_changed instead
+                self.loop.add_signal_handler(signal.SIGWINCH, self.window_changed)
+            except (NotImplementedError, RuntimeError, ValueError, AttributeError):
+                watch_resize = False
+        if self.refresh_interval is not None:
+            self.periodic_refresh()
+        self.draw_frame()
+        try:
+            await self.stopped
+        finally:
+            self.unwatch_input()
+            self.updates.wakeup = None
+            if watch_resize:
+                self.loop.remove_signal_handler(signal.SIGWINCH)
+                restore_winch(previous_winch)
+            for handle in (self.frame_handle, self.refresh_handle, self.resize_handle):
+                if handle is not None:
+                    handle.cancel()
+            self.frame_handle = self.refresh_handle = self.resize_handle = None
+            self.scrn.nodelay(False)
+            self.loop = None
+
+    def watch_input(self):
+        """Calls read_input whenever input_fd becomes readable."""
+        self.loop.add_reader(self.input_fd, self.read_input)
+
+    def unwatch_input(self):
+        self.loop.remove_reader(self.input_fd)
+
+    def stop(self):
+        """Stops a running display after the current input is handled."""
+        if self.stopped is not None and not self.stopped.done():
+            self.stopped.set_result(None)
+
+
+def resize_to_terminal(signum=None, frame=None):
+    """SIGWINCH handler resizing curses to the terminal, which queues KEY_RESIZE like the handler of curses does."""
+    try:
+        size = os.get_terminal_size()
+        if not curses.isendwin():
+            curses.resizeterm(size.lines, size.columns)
+    except (OSError, curses.error):  # not a terminal, or curses is not running
+        pass
+
+
+def restore_winch(previous):
+    """Puts back the SIGWINCH handler run replaced. The handler curses installs is not a Python one, signal reports
+    it as the default and can not put it back, so resize_to_terminal takes its place instead."""
+    if previous is None or previous == signal.SIG_DFL:
+        previous = resize_to_terminal
+    signal.signal(signal.SIGWINCH, previous)
+
+
+def wrapper(func, *args, **kwargs):
+    """Like curses.wrapper but for a coroutine function taking the screen as its first argument."""
+    return curses.wrapper(lambda stdscr: asyncio.run(func(stdscr, *args, **kwargs)))
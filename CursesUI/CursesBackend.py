@@ -0,0 +1,745 @@
+import collections
+import curses
+import weakref
+
+
+class TerminalBackend:
+    """Backend that draws to the real terminal through the curses module.
+    Display, Layout and the widgets call the module level curses functions through a backend,
+    so they can be run against HeadlessBackend instead."""
+
+    bytes_written = None  # not known for a real terminal
+
+    def doupdate(self):
+        curses.doupdate()
+
+    def newpad(self, nlines: int, ncols: int):
+        return curses.newpad(nlines, ncols)
+
+    def newwin(self, nlines: int, ncols: int, begin_y: int = 0, begin_x: int = 0):
+        return curses.newwin(nlines, ncols, begin_y, begin_x)
+
+    def init_pair(self, pair: int, fg: int, bg: int):
+        curses.init_pair(pair, fg, bg)
+
+    def color_pair(self, pair: int):
+        return curses.color_pair(pair)
+
+    def color_limits(self):
+        """(colors, color pairs) of the terminal, starting color if it was not. (0, 0) without color."""
+        if not curses.has_colors():
+            return 0, 0
+        if not hasattr(curses, "COLORS"):  # set by start_color
+            curses.start_color()
+        return curses.COLORS, curses.COLOR_PAIRS
+
+    def default_colors(self):
+        """Lets -1 be used for the terminal's own colors, False if the terminal can not."""
+        try:
+            curses.use_default_colors()
+        except curses.error:
+            return False
+        return True
+
+    def keyname(self, key: int):
+        return curses.keyname(key)
+
+    def update_lines_cols(self):
+        curses.update_lines_cols()
+
+    def ungetch(self, key: int):
+        curses.ungetch(key)
+
+    def resize_term(self, height: int, width: int):
+        curses.resizeterm(height, width)
+
+    def screen_rows(self, scrn: curses.window):
+        """(text, attribute of each cell) of every row, read back from scrn one cell at a time.
+        Pads and windows drawn over scrn are not seen, and only the low byte of wide characters."""
+        height, width = scrn.getmaxyx()
+        rows = []
+        for y in range(height):
+            cells = [scrn.inch(y, x) for x in range(width)]
+            rows.append(("".join(chr(cell & curses.A_CHARTEXT) for cell in cells),
+                         [cell & ~curses.A_CHARTEXT for cell in cells]))
+        return rows
+
+
+terminal = TerminalBackend()
+
+
+def blank_grid(height: int, width: int, cell=(" ", 0)):
+    return [[cell] * width for _ in range(height)]
+
+
+KEY_NAMES = {getattr(curses, name): name.encode() for name in dir(curses)
+             if name.startswith("KEY_") and isinstance(getattr(curses, name), int)}
+
+
+class InputExhausted(Exception):
+    """Raised when a blocking getch is called on a headless backend with no keys left."""
+
+
+class HeadlessBackend:
+    """In memory terminal for tests and benchmarks.
+    Windows are VirtualWindow objects that keep their cells in memory. doupdate diffs the staged screen
+    against what the terminal shows, renders the changes as ANSI escape sequences and counts flushes,
+    refreshes and bytes written. Keys given to push_keys are returned by getch."""
+
+    def __init__(self, height: int = 24, width: int = 80, output=None):
+        """:param output: Optional callable given the bytes of every frame, as they would be sent to a terminal."""
+        self.height = height
+        self.width = width
+        self.output = output
+        self.windows = weakref.WeakSet()
+        self.physical = blank_grid(height, width)
+        self.virtual = blank_grid(height, width)
+        self.pairs = {0: (-1, -1)}
+        self.colors = 256
+        self.color_pairs = 256
+        self.keys = collections.deque()
+        self.cursor = (0, 0)
+        self.clear_screen = True
+        self.flushes = 0
+        self.refresh_calls = 0
+        self.bytes_written = 0
+        self.frame_bytes = 0
+        self.cells_written = 0
+        self.stdscr = VirtualWindow(self, blank_grid(height, width), height, width)
+
+    # curses module functions
+
+    def doupdate(self):
+        """Sends the changes between the staged screen and the terminal, like curses.doupdate."""
+        out = []
+        attr = 0
+        if self.clear_screen:
+            out.append("\x1b[0m\x1b[H\x1b[2J")
+            self.physical = blank_grid(self.height, self.width)
+            self.clear_screen = False
+        cells = 0
+        for y, (vrow, prow) in enumerate(zip(self.virtual, self.physical)):
+            if vrow == prow:
+                continue
+            next_x = -1
+            for x, cell in enumerate(vrow):
+                if cell == prow[x]:
+                    continue
+                if x != next_x:
+                    out.append("\x1b[%d;%dH" % (y + 1, x + 1))
+                if cell[1] != attr:
+                    attr = cell[1]
+                    out.append(self.sgr(attr))
+                out.append(cell[0])
+                prow[x] = cell
+                next_x = x + 1
+                cells += 1
+        out.append("\x1b[%d;%dH" % (self.cursor[0] + 1, self.cursor[1] + 1))
+        data = "".join(out).encode()
+        self.flushes += 1
+        self.cells_written += cells
+        self.frame_bytes = len(data)
+        self.bytes_written += len(data)
+        if self.output is not None:
+            self.output(data)
+
+    def newpad(self, nlines: int, ncols: int):
+        return VirtualWindow(self, blank_grid(nlines, ncols), nlines, ncols, is_pad=True)
+
+    def newwin(self, nlines: int, ncols: int, begin_y: int = 0, begin_x: int = 0):
+        return VirtualWindow(self, blank_grid(nlines, ncols), nlines, ncols, begin_y=begin_y, begin_x=begin_x)
+
+    def init_pair(self, pair: int, fg: int, bg: int):
+        if not 0 < pair < self.color_pairs:
+            raise curses.error("init_pair() returned ERR")
+        self.pairs[pair] = (fg, bg)
+
+    def color_pair(self, pair: int):
+        return (pair << 8) & curses.A_COLOR
+
+    def color_limits(self):
+        return self.colors, self.color_pairs
+
+    def default_colors(self):
+        return True
+
+    def keyname(self, key: int):
+        if key in KEY_NAMES:
+            return KEY_NAMES[key]
+        if key < 0:
+            raise ValueError("invalid key number")
+        if key < 32:
+            return b"^" + bytes([key + 64])
+        if key == 127:
+            return b"^?"
+        return chr(key).encode()
+
+    def update_lines_cols(self):
+        pass
+
+    def ungetch(self, key: int):
+        self.keys.appendleft(key)
+
+    # helpers for tests and benchmarks
+
+    def sgr(self, attr: int):
+        """ANSI select graphic rendition sequence for a curses attribute."""
+        codes = ["0"]
+        for flag, code in ((curses.A_BOLD, "1"), (curses.A_DIM, "2"), (curses.A_UNDERLINE, "4"),
+                           (curses.A_BLINK, "5"), (curses.A_REVERSE | curses.A_STANDOUT, "7")):
+            if attr & flag:
+                codes.append(code)
+        fg, bg = self.pairs.get((attr & curses.A_COLOR) >> 8, (-1, -1))
+        for color, base in ((fg, 30), (bg, 40)):
+            if color < 0:
+                continue
+            if color < 8:
+                codes.append(str(base + color))
+            elif color < 16:
+                codes.append(str(base + 60 + color - 8))
+            else:
+                codes.append("%d;5;%d" % (base + 8, color))
+        return "\x1b[" + ";".join(codes) + "m"
+
+    def push_keys(self, *keys):
+        """Queues keys for getch. Strings are split into one key per character."""
+        for key in keys:
+            if isinstance(key, str):
+                self.keys.extend(ord(char) for char in key)
+            else:
+                self.keys.append(key)
+
+    def resize_term(self, height: int, width: int):
+        """Changes the terminal size and queues KEY_RESIZE, like a SIGWINCH would."""
+        self.height = height
+        self.width = width
+        self.physical = blank_grid(height, width)
+        self.virtual = blank_grid(height, width)
+        self.clear_screen = True
+        self.stdscr.resize(height, width)
+        self.keys.append(curses.KEY_RESIZE)
+
+    def text(self):
+        """The characters shown on the terminal, one string per row."""
+        return ["".join(cell[0] for cell in row) for row in self.physical]
+
+    def attr_at(self, y: int, x: int):
+        """The attribute of the cell shown on the terminal."""
+        return self.physical[y][x][1]
+
+    def screen_rows(self, scrn=None):
+        """(text, attribute of each cell) of every row shown on the terminal, see TerminalBackend.screen_rows."""
+        return [("".join(cell[0] for cell in row), [cell[1] for cell in row]) for row in self.physical]
+
+    def counters(self):
+        return {"flushes": self.flushes, "refresh_calls": self.refresh_calls,
+                "bytes_written": self.bytes_written, "cells_written": self.cells_written}
+
+    def reset_counters(self):
+        self.flushes = self.refresh_calls = self.bytes_written = self.cells_written = self.frame_bytes = 0
+
+
+class VirtualWindow:
+    """In memory stand in for curses.window, created by HeadlessBackend.
+    Derived windows share their cells with the parent like curses derived windows do."""
+
+    def __init__(self, backend: HeadlessBackend, cells: list, height: int, width: int,
+                 org_y: int = 0, org_x: int = 0, begin_y: int = 0, begin_x: int = 0,
+                 parent=None, is_pad: bool = False):
+        self.backend = backend
+        self.cells = cells
+        self.height = height
+        self.width = width
+        self.org_y = org_y  # position of the window in cells
+        self.org_x = org_x
+        self.begin_y = begin_y  # position of the window on the screen
+        self.begin_x = begin_x
+        self.parent = parent
+        self.par_y = org_y - parent.org_y if parent is not None else -1  # position inside the parent
+        self.par_x = org_x - parent.org_x if parent is not None else -1
+        self.is_pad = is_pad
+        self.cur_y = 0
+        self.cur_x = 0
+        self.bkgd_char = " "
+        self.bkgd_attr = 0
+        self.attrs = 0
+        self.touched = set(range(height))
+        self.scroll_ok = False
+        self.clear_ok = False
+        self.delay = -1
+        backend.windows.add(self)
+
+    # geometry
+
+    def getmaxyx(self):
+        return self.height, self.width
+
+    def getbegyx(self):
+        return self.begin_y, self.begin_x
+
+    def getparyx(self):
+        return self.par_y, self.par_x
+
+    def getyx(self):
+        return self.cur_y, self.cur_x
+
+    def move(self, y: int, x: int):
+        self.check(y, x)
+        self.cur_y = y
+        self.cur_x = x
+
+    def check(self, y: int, x: int):
+        if not (0 <= y < self.height and 0 <= x < self.width):
+            raise curses.error("wmove() returned ERR")
+
+    def derwin(self, *args):
+        if len(args) == 2:
+            nlines, ncols, (y, x) = 0, 0, args
+        else:
+            nlines, ncols, y, x = args
+        if nlines <= 0:
+            nlines = self.height - y
+        if ncols <= 0:
+            ncols = self.width - x
+        if y < 0 or x < 0 or nlines <= 0 or ncols <= 0 or y + nlines > self.height or x + ncols > self.width:
+            raise curses.error("derwin() returned NULL")
+        return VirtualWindow(self.backend, self.cells, nlines, ncols, self.org_y + y, self.org_x + x,
+                             self.begin_y + y, self.begin_x + x, parent=self, is_pad=self.is_pad)
+
+    def subwin(self, *args):
+        if len(args) == 2:
+            return self.derwin(args[0] - self.begin_y, args[1] - self.begin_x)
+        return self.derwin(args[0], args[1], args[2] - self.begin_y, args[3] - self.begin_x)
+
+    def mvderwin(self, y: int, x: int):
+        parent = self.parent
+        if parent is None or y < 0 or x < 0 or y + self.height > parent.height or x + self.width > parent.width:
+            raise curses.error("mvderwin() returned ERR")
+        self.par_y = y
+        self.par_x = x
+        self.org_y = parent.org_y + y
+        self.org_x = parent.org_x + x
+        self.begin_y = parent.begin_y + y
+        self.begin_x = parent.begin_x + x
+        self.touchwin()
+
+    def resize(self, nlines: int, ncols: int):
+        if nlines <= 0 or ncols <= 0:
+            raise curses.error("wresize() returned ERR")
+        if self.parent is None:
+            blank = (self.bkgd_char, self.bkgd_attr)
+            del self.cells[nlines:]
+            for row in self.cells:
+                del row[ncols:]
+                row.extend([blank] * (ncols - len(row)))
+            self.cells.extend([blank] * ncols for _ in range(nlines - len(self.cells)))
+            for window in list(self.backend.windows):
+                if window.cells is self.cells and window is not self:
+                    window.fit(nlines, ncols)
+        elif self.org_y + nlines > len(self.cells) or self.org_x + ncols > len(self.cells[0]):
+            raise curses.error("wresize() returned ERR")
+        self.height = nlines
+        self.width = ncols
+        self.cur_y = min(self.cur_y, nlines - 1)
+        self.cur_x = min(self.cur_x, ncols - 1)
+        self.touchwin()
+
+    def fit(self, nlines: int, ncols: int):
+        """Shrinks or moves a derived window to stay inside cells that were resized to nlines by ncols,
+        like curses does to subwindows when the terminal shrinks."""
+        self.height = min(self.height, nlines)
+        self.width = min(self.width, ncols)
+        self.org_y = min(self.org_y, nlines - self.height)
+        self.org_x = min(self.org_x, ncols - self.width)
+        self.cur_y = min(self.cur_y, self.height - 1)
+        self.cur_x = min(self.cur_x, self.width - 1)
+        self.touched = {y for y in self.touched if y < self.height}
+
+    # writing
+
+    def merge_attr(self, attr: int):
+        attr |= self.attrs | (self.bkgd_attr & ~curses.A_COLOR)
+        if not attr & curses.A_COLOR:
+            attr |= self.bkgd_attr & curses.A_COLOR
+        return attr
+
+    def blank(self):
+        return self.bkgd_char, self.bkgd_attr
+
+    def put_text(self, y: int, x: int, text: str, attr: int):
+        self.check(y, x)
+        attr = self.merge_attr(attr)
+        row = self.cells[self.org_y + y]
+        self.touched.add(y)
+        for char in text:
+            if char == "\n":
+                self.cur_y, self.cur_x = y, x
+                self.clrtoeol()
+                x = self.width
+            else:
+                row[self.org_x + x] = (char, attr)
+                x += 1
+            if x >= self.width:
+                if y + 1 >= self.height:
+                    if not self.scroll_ok:
+                        self.cur_y, self.cur_x = y, self.width - 1
+                        raise curses.error("addwstr() returned ERR")
+                    self.scroll(1)
+                else:
+                    y += 1
+                x = 0
+                row = self.cells[self.org_y + y]
+                self.touched.add(y)
+        self.cur_y, self.cur_x = y, x
+
+    @staticmethod
+    def split_char(char):
+        if isinstance(char, int):
+            return chr(char & curses.A_CHARTEXT), char & ~curses.A_CHARTEXT
+        if isinstance(char, bytes):
+            char = char.decode()
+        return char, 0
+
+    def addstr(self, *args):
+        if len(args) < 3:
+            y, x, text, attr = self.cur_y, self.cur_x, args[0], args[1] if len(args) > 1 else 0
+        else:
+            y, x, text, attr = args[0], args[1], args[2], args[3] if len(args) > 3 else 0
+        if isinstance(text, bytes):
+            text = text.decode()
+        self.put_text(y, x, text, attr)
+
+    def addnstr(self, *args):
+        if len(args) < 4:
+            y, x, text, n, attr = self.cur_y, self.cur_x, args[0], args[1], args[2] if len(args) > 2 else 0
+        else:
+            y, x, text, n, attr = args[0], args[1], args[2], args[3], args[4] if len(args) > 4 else 0
+        if isinstance(text, bytes):
+            text = text.decode()
+        self.put_text(y, x, text[:n] if n >= 0 else text, attr)
+
+    def addch(self, *args):
+        if len(args) < 3:
+            y, x, char, attr = self.cur_y, self.cur_x, args[0], args[1] if len(args) > 1 else 0
+        else:
+            y, x, char, attr = args[0], args[1], args[2], args[3] if len(args) > 3 else 0
+        char, char_attr = self.split_char(char)
+        self.put_text(y, x, char, attr | char_attr)
+
+    def insch(self, *args):
+        if len(args) < 3:
+            y, x, char, attr = self.cur_y, self.cur_x, args[0], args[1] if len(args) > 1 else 0
+        else:
+            y, x, char, attr = args[0], args[1], args[2], args[3] if len(args) > 3 else 0
+        self.check(y, x)
+        char, char_attr = self.split_char(char)
+        row = self.cells[self.org_y + y]
+        start, end = self.org_x + x, self.org_x + self.width
+        row[start + 1:end] = row[start:end - 1]
+        row[start] = (char, self.merge_attr(attr | char_attr))
+        self.touched.add(y)
+
+    def delch(self, *args):
+        if args:
+            self.move(*args)
+        row = self.cells[self.org_y + self.cur_y]
+        start, end = self.org_x + self.cur_x, self.org_x + self.width
+        row[start:end - 1] = row[start + 1:end]
+        row[end - 1] = self.blank()
+        self.touched.add(self.cur_y)
+
+    def inch(self, *args):
+        y, x = args if args else (self.cur_y, self.cur_x)
+        self.check(y, x)
+        char, attr = self.cells[self.org_y + y][self.org_x + x]
+        return ord(char) | attr
+
+    def instr(self, *args):
+        if len(args) >= 2:
+            y, x, n = args[0], args[1], args[2] if len(args) > 2 else self.width
+        else:
+            y, x, n = self.cur_y, self.cur_x, args[0] if args else self.width
+        self.check(y, x)
+        row = self.cells[self.org_y + y]
+        return "".join(cell[0] for cell in row[self.org_x + x:self.org_x + min(self.width, x + n)]).encode()
+
+    def chgat(self, *args):
+        if len(args) == 1:
+            y, x, num, attr = self.cur_y, self.cur_x, -1, args[0]
+        elif len(args) == 2:
+            y, x, num, attr = self.cur_y, self.cur_x, args[0], args[1]
+        elif len(args) == 3:
+            y, x, num, attr = args[0], args[1], -1, args[2]
+        else:
+            y, x, num, attr = args
+        self.check(y, x)
+        end = self.width if num < 0 else min(self.width, x + num)
+        row = self.cells[self.org_y + y]  # like curses, attr replaces the cells' attributes and color pair
+        for col in range(self.org_x + x, self.org_x + end):
+            row[col] = (row[col][0], attr)
+        self.touched.add(y)
+
+    def hline(self, *args):
+        if len(args) >= 4:
+            y, x, char, n = args[:4]
+        else:
+            y, x, (char, n) = self.cur_y, self.cur_x, args[:2]
+        self.check(y, x)
+        char, attr = self.split_char(char)
+        row = self.cells[self.org_y + y]
+        for col in range(x, min(self.width, x + n)):
+            row[self.org_x + col] = (char, self.merge_attr(attr))
+        self.touched.add(y)
+
+    def vline(self, *args):
+        if len(args) >= 4:
+            y, x, char, n = args[:4]
+        else:
+            y, x, (char, n) = self.cur_y, self.cur_x, args[:2]
+        char, attr = self.split_char(char)
+        for row in range(y, min(self.height, y + n)):
+            self.cells[self.org_y + row][self.org_x + x] = (char, self.merge_attr(attr))
+            self.touched.add(row)
+
+    def border(self, *args):
+        chars = ["|", "|", "-", "-", "+", "+", "+", "+"]
+        for index, char in enumerate(args):
+            if char:
+                chars[index] = self.split_char(char)[0]
+        left, right, top, bottom, tl, tr, bl, br = chars
+        attr = self.merge_attr(0)
+        last_y, last_x = self.height - 1, self.width - 1
+        for y in range(self.height):
+            row = self.cells[self.org_y + y]
+            if y in (0, last_y):
+                fill = top if y == 0 else bottom
+                row[self.org_x:self.org_x + self.width] = [(fill, attr)] * self.width
+                row[self.org_x] = ((tl if y == 0 else bl), attr)
+                row[self.org_x + last_x] = ((tr if y == 0 else br), attr)
+            else:
+                row[self.org_x] = (left, attr)
+                row[self.org_x + last_x] = (right, attr)
+        self.touchwin()
+
+    def box(self, vertch=0, horch=0):
+        self.border(vertch, vertch, horch, horch)
+
+    def clrtoeol(self):
+        row = self.cells[self.org_y + self.cur_y]
+        row[self.org_x + self.cur_x:self.org_x + self.width] = [self.blank()] * (self.width - self.cur_x)
+        self.touched.add(self.cur_y)
+
+    def clrtobot(self):
+        self.clrtoeol()
+        blank = [self.blank()] * self.width
+        for y in range(self.cur_y + 1, self.height):
+            self.cells[self.org_y + y][self.org_x:self.org_x + self.width] = blank
+        self.touchwin()
+
+    def erase(self):
+        blank = [self.blank()] * self.width
+        for y in range(self.height):
+            self.cells[self.org_y + y][self.org_x:self.org_x + self.width] = blank
+        self.cur_y = self.cur_x = 0
+        self.touchwin()
+
+    def clear(self):
+        self.erase()
+        self.clear_ok = True
+
+    def bkgd(self, char, attr: int = 0):
+        char, char_attr = self.split_char(char)
+        attr |= char_attr
+        old_char, old_attr = self.bkgd_char, self.bkgd_attr
+        for y in range(self.height):
+            row = self.cells[self.org_y + y]
+            for x in range(self.org_x, self.org_x + self.width):
+                cell_char, cell_attr = row[x]
+                if cell_char == old_char:
+                    cell_char = char
+                cell_attr &= ~old_attr
+                if cell_attr & curses.A_COLOR:
+                    cell_attr |= attr & ~curses.A_COLOR
+                else:
+                    cell_attr |= attr
+                row[x] = (cell_char, cell_attr)
+        self.bkgd_char, self.bkgd_attr = char, attr
+        self.touchwin()
+
+    def bkgdset(self, char, attr: int = 0):
+        char, char_attr = self.split_char(char)
+        self.bkgd_char, self.bkgd_attr = char, attr | char_attr
+
+    def getbkgd(self):
+        return ord(self.bkgd_char) | self.bkgd_attr
+
+    def attron(self, attr: int):
+        self.attrs |= attr
+
+    def attroff(self, attr: int):
+        self.attrs &= ~attr
+
+    def attrset(self, attr: int):
+        self.attrs = attr
+
+    # scrolling
+
+    def scrollok(self, flag):
+        self.scroll_ok = bool(flag)
+
+    def scroll(self, lines: int = 1):
+        if not self.scroll_ok:
+            raise curses.error("scroll() returned ERR")
+        self.shift_lines(0, lines)
+
+    def shift_lines(self, top: int, lines: int):
+        """Moves the rows from top to the bottom of the window up by lines, or down if negative."""
+        start, stop = self.org_x, self.org_x + self.width
+        rows = [self.cells[self.org_y + y][start:stop] for y in range(top, self.height)]
+        blank = [self.blank()] * self.width
+        if lines > 0:
+            rows = rows[lines:] + [blank] * min(lines, len(rows))
+        elif lines < 0:
+            rows = [blank] * min(-lines, len(rows)) + rows[:lines]
+        for y, row in enumerate(rows, top):
+            self.cells[self.org_y + y][start:stop] = row
+        self.touchwin()
+
+    def insdelln(self, lines: int):
+        self.shift_lines(self.cur_y, -lines)
+
+    def insertln(self):
+        self.insdelln(1)
+
+    def deleteln(self):
+        self.insdelln(-1)
+
+    # refreshing
+
+    def touchwin(self):
+        self.touched = set(range(self.height))
+
+    def redrawwin(self):
+        self.touchwin()
+
+    def untouchwin(self):
+        self.touched = set()
+
+    def touchline(self, start: int, count: int, changed: bool = True):
+        rows = set(range(start, min(self.height, start + count)))
+        self.touched = self.touched | rows if changed else self.touched - rows
+
+    def is_wintouched(self):
+        return bool(self.touched)
+
+    def is_linetouched(self, line: int):
+        return line in self.touched
+
+    def noutrefresh(self, *args):
+        backend = self.backend
+        backend.refresh_calls += 1
+        if self.clear_ok:
+            backend.clear_screen = True
+            self.clear_ok = False
+        if self.is_pad:
+            pminrow, pmincol, sminrow, smincol, smaxrow, smaxcol = args
+            smaxrow = min(smaxrow, backend.height - 1, sminrow + self.height - pminrow - 1)
+            smaxcol = min(smaxcol, backend.width - 1, smincol + self.width - pmincol - 1)
+            for y in range(sminrow, smaxrow + 1):
+                row = self.cells[self.org_y + pminrow + y - sminrow]
+                backend.virtual[y][smincol:smaxcol + 1] = row[self.org_x + pmincol:
+                                                              self.org_x + pmincol + smaxcol - smincol + 1]
+            backend.cursor = (min(backend.height - 1, sminrow + max(0, self.cur_y - pminrow)),
+                              min(backend.width - 1, smincol + max(0, self.cur_x - pmincol)))
+        else:
+            width = min(self.width, backend.width - self.begin_x)
+            for y in self.touched:
+                screen_y = self.begin_y + y
+                if screen_y < backend.height:
+                    backend.virtual[screen_y][self.begin_x:self.begin_x + width] = \
+                        self.cells[self.org_y + y][self.org_x:self.org_x + width]
+            backend.cursor = (min(backend.height - 1, self.begin_y + self.cur_y),
+                              min(backend.width - 1, self.begin_x + self.cur_x))
+        self.touched = set()
+
+    def refresh(self, *args):
+        self.noutrefresh(*args)
+        self.backend.doupdate()
+
+    def cursyncup(self):
+        window = self
+        while window.parent is not None:
+            parent = window.parent
+            parent.cur_y = window.cur_y + window.par_y
+            parent.cur_x = window.cur_x + window.par_x
+            window = parent
+
+    def overwrite(self, dest, *args):
+        self.copy_to(dest, False, *args)
+
+    def overlay(self, dest, *args):
+        self.copy_to(dest, True, *args)
+
+    def copy_to(self, dest, skip_blanks: bool, *args):
+        if args:
+            sminrow, smincol, dminrow, dmincol, dmaxrow, dmaxcol = args
+        else:  # the area where the windows overlap on screen
+            top, left = max(self.begin_y, dest.begin_y), max(self.begin_x, dest.begin_x)
+            bottom = min(self.begin_y + self.height, dest.begin_y + dest.height) - 1
+            right = min(self.begin_x + self.width, dest.begin_x + dest.width) - 1
+            sminrow, smincol = top - self.begin_y, left - self.begin_x
+            dminrow, dmincol, dmaxrow, dmaxcol = top - dest.begin_y, left - dest.begin_x, \
+                bottom - dest.begin_y, right - dest.begin_x
+        for y in range(dminrow, dmaxrow + 1):
+            source = self.cells[self.org_y + sminrow + y - dminrow]
+            target = dest.cells[dest.org_y + y]
+            for x in range(dmincol, dmaxcol + 1):
+                cell = source[self.org_x + smincol + x - dmincol]
+                if not (skip_blanks and cell[0] == " "):
+                    target[dest.org_x + x] = cell
+            dest.touched.add(y)
+
+    # input
+
+    def keypad(self, flag):
+        pass
+
+    def nodelay(self, flag):
+        self.delay = 0 if flag else -1
+
+    def timeout(self, delay: int):
+        self.delay = delay
+
+    def notimeout(self, flag):
+        pass
+
+    def idlok(self, flag):
+        pass
+
+    def leaveok(self, flag):
+        pass
+
+    def clearok(self, flag):
+        self.clear_ok = bool(flag)
+
+    def immedok(self, flag):
+        pass
+
+    def getch(self, *args):
+        if args:
+            self.move(*args)
+        if self.touched and not self.is_pad:
+            self.refresh()
+        if self.backend.keys:
+            return self.backend.keys.popleft()
+        if self.delay >= 0:
+            return -1
+        raise InputExhausted()
+
+    def getkey(self, *args):
+        key = self.getch(*args)
+        if key == -1:
+            raise curses.error("no input")
+        if key > 255:
+            return self.backend.keyname(key).decode()
+        return chr(key)
@@ -1,21 +1,80 @@
 
-from CursesUI import CursesLayouts, CursesLayouts, CursesLogger
+from CursesUI import CursesBackend, CursesKeys, CursesLayouts, CursesLogger, CursesStats, CursesUpdates
+from CursesUI import CursesWidgets
+import collections
 import curses
 import abc
+import time
+
+
+class Screen:
+    """A layout on a display's screen stack. While another screen is shown, the cells of this one are kept
+    in an off-screen pad, so showing it again is a copy instead of redrawing every widget."""
+
+    def __init__(self, layout: CursesLayouts.Layout):
+        self.layout = layout
+        self.buffer = None
+        self.size = None  # screen size the layout was laid out for, None until it has windows
+        self.last_shown = 0
+
+    @property
+    def cached(self):
+        return self.size is not None
+
+    def release(self):
+        """Frees the buffer and the layout's windows, the layout is laid out again when it is shown."""
+        self.buffer = None
+        self.size = None
+        if self.layout.win is not None:
+            self.layout.unmount()
+
+    def close(self):
+        """Releases the screen for good. The layout is disposed of, which also stops its background searches."""
+        self.buffer = None
+        self.size = None
+        self.layout.dispose()
 
 
 class Display(abc.ABC):
     _layout: CursesLayouts.Layout
 
-    def __init__(self, scrn: curses.window, log_level=0):
-        self.logger = CursesLogger.Logger(log_level)
+    def __init__(self, scrn: curses.window, log_level=0, backend=None, resize_delay: float = 0.1,
+                 max_batch: int = 1024, stats: bool = False, cached_screens: int = 4,
+                 logger: CursesLogger.Logger = None):
+        """:param scrn: The screen to draw on, usually stdscr.
+        :param log_level: Level for the debug logger, 0 disables it. Ignored when a logger is given.
+        :param backend: Backend for the module level curses calls, CursesBackend.HeadlessBackend to run without a terminal.
+        :param resize_delay: Seconds without another KEY_RESIZE before the screen is laid out for the new size.
+        :param max_batch: Most keys read at once by read_keys, see handle_keys.
+        :param stats: Collect frame, input and per widget timings in self.stats, see CursesStats.
+        overlay_key then toggles an overlay showing them.
+        :param cached_screens: Screens below the top of the screen stack that keep their windows and a copy of
+        their cells, the least recently shown ones past this are released.
+        :param logger: The debug logger, for a log path or bridge other than the defaults.
+        Example: Display(stdscr, logger=CursesLogger.Logger(2, path="ui.log", bridge=True))"""
+        self.backend = CursesBackend.terminal if backend is None else backend
+        self.logger = CursesLogger.Logger(log_level) if logger is None else logger
         self.active_widget = None
         self.new_handle = None
         self.value = -1
         self.widgets = []
         self.scrn = scrn
         self.value = -1
-        self.screen = []
+        self.screens = []  # stack of Screen, the last one is shown
+        self.cached_screens = cached_screens
+        self.screen_clock = 0
+        self.restored = False
+        self.full_redraw = True
+        self.updates = CursesUpdates.UpdateQueue()
+        self.resize_delay = resize_delay
+        self.max_batch = max_batch
+        self.pending_keys = collections.deque()  # keys read in a batch but left for the next one
+        self.stats = CursesStats.Stats() if stats else None
+        self.context = CursesWidgets.WidgetContext(self.logger, self.backend, self.updates, self.stats)
+        self.overlay = None
+        self.overlay_key = curses.KEY_F12
+        self.input_start = None  # when the first key not yet on screen was handled
+        self.recorder = None  # CursesRecord.Recorder while recording, see start_recording
 
     @property
     def layout(self):
@@ -23,34 +82,276 @@ class Display(abc.ABC):
         return self._layout
 
     @layout.setter
-    def layout(self, value: CursesLayouts.Layout):  #todo change to make class here
-        scrn_size = self.scrn.getmaxyx()
-        self._layout = value
-        self._layout.win = self.scrn.derwin(0, 0)
-        self._layout.win.resize(scrn_size[0], scrn_size[1])
-        self._layout.logger = self.logger
+    def layout(self, value: CursesLayouts.Layout):
+        """Replaces the layout of the shown screen, which is disposed of. Use push_screen to keep the current one."""
+        if self.screens:
+            old = self.screens.pop()
+            if old.layout is not value:
+                old.close()
+        self.screens.append(Screen(value))
+        self.show_screen(self.screens[-1])
+
+    @property
+    def screen(self):
+        """The shown Screen."""
+        return self.screens[-1]
+
+    def push_screen(self, layout: CursesLayouts.Layout):
+        """Shows a layout on top of the current one, pop_screen goes back.
+        :return: The new Screen"""
+        if self.screens:
+            self.stash_screen(self.screens[-1])
+        screen = Screen(layout)
+        self.screens.append(screen)
+        self.show_screen(screen)
+        self.trim_screens()
+        return screen
+
+    def pop_screen(self, keep: bool = False):
+        """Closes the shown screen and goes back to the one below it.
+        :param keep: Only release the layout's windows instead of disposing of it, to push it again later.
+        :return: The layout of the closed screen"""
+        if len(self.screens) < 2:
+            raise IndexError("can not pop the last screen")
+        screen = self.screens.pop()
+        if keep:
+            screen.release()
+        else:
+            screen.close()
+        self.show_screen(self.screens[-1])
+        return screen.layout
+
+    def switch_screen(self, screen: Screen):
+        """Brings a screen from the stack to the top."""
+        if screen is self.screens[-1]:
+            return
+        self.stash_screen(self.screens[-1])
+        self.screens.remove(screen)
+        self.screens.append(screen)
+        self.show_screen(screen)
+        self.trim_screens()
+
+    def stash_screen(self, screen: Screen):
+        """Copies the cells of the shown screen into its buffer before another screen draws over them."""
+        if not screen.cached:
+            return
+        height, width = self.scrn.getmaxyx()
+        if screen.buffer is None or screen.buffer.getmaxyx() != (height, width):
+            screen.buffer = self.backend.newpad(height, width)
+        self.scrn.overwrite(screen.buffer)
+
+    def show_screen(self, screen: Screen):
+        layout = screen.layout
+        layout.set_context(self.context)
+        self._layout = layout
+        self.screen_clock += 1
+        screen.last_shown = self.screen_clock
+        size = self.scrn.getmaxyx()
+        if screen.size != size or screen.buffer is None:
+            # new, released or laid out for another size
+            if layout.win is not None:
+                layout.unmount()
+            layout.add_win(self.scrn.derwin(0, 0))
+            layout.resize(*size)
+            screen.size = size
+            self.full_redraw = True
+        else:
+            # the widget windows share the screen's cells, copying the buffer back restores them all
+            screen.buffer.overwrite(self.scrn)
+            layout.screen_restored()
+            self.restored = True
+        screen.buffer = None
+
+    def trim_screens(self):
+        """Releases the least recently shown screens past the cached_screens budget."""
+        hidden = sorted((screen for screen in self.screens[:-1] if screen.cached),
+                        key=lambda screen: screen.last_shown, reverse=True)
+        for screen in hidden[self.cached_screens:]:
+            screen.release()
+
+    def dispose(self):
+        """Closes every screen on the stack, for a display that is done. Their layouts are disposed of, which also
+        stops their background searches."""
+        self.stop_recording()
+        for screen in self.screens:
+            screen.close()
+
+    def post(self, widget, func, *args, key=None):
+        """Queues an update from any thread, it is applied at the start of the next frame.
+        Repeated updates to the same widget and function before then only apply the newest, give each a unique key
+        to apply them all.
+        Example: display.post(label, label.change_value, 42)"""
+        self.updates.post(widget, func, *args, key=key)
 
     def draw_scrn(self):
-        self.logger.log("Drawing Layout " + str(self._layout), "Cursor Position: " + str(self.scrn.getyx()))
-        self._layout.draw()
-        self.logger.log("Drawing screen", "Cursor Position: " + str(self.scrn.getyx()))
-        self.scrn.refresh()
+        """Renders one frame. Pending posted updates are applied first, then only dirty widgets
+        are drawn and staged with noutrefresh, and the terminal is updated with a single curses.doupdate."""
+        stats = self.stats
+        recorder = self.recorder
+        if stats is not None or recorder is not None:
+            start = time.perf_counter()
+            written = self.backend.bytes_written
+        updates = self.updates.drain()
+        self.logger.log(("Drawing Layout %s", self._layout), lambda: "Cursor Position: " + str(self.scrn.getyx()))
+        restored = self.restored
+        if self.full_redraw:
+            self.scrn.noutrefresh()
+            self._layout.mark_dirty()
+            self.full_redraw = False
+        elif restored:
+            self.scrn.noutrefresh()  # only the widgets changed while the screen was hidden are drawn
+        self.restored = False
+        drawn = self._layout.draw() or restored
+        if drawn and self.overlay is not None and self.overlay.mounted:
+            self.overlay.mark_dirty()
+            self.overlay.draw()
+        if drawn:
+            self.logger.log("Drawing screen", lambda: "Cursor Position: " + str(self.scrn.getyx()))
+            self.backend.doupdate()
+            if stats is not None:
+                end = time.perf_counter()
+                stats.count("frames")
+                stats.observe("frame", end - start)
+                if written is not None:
+                    stats.observe("frame bytes", self.backend.bytes_written - written)
+                if self.input_start is not None:
+                    stats.observe("input to frame", end - self.input_start)
+                    self.input_start = None
+            if recorder is not None:
+                elapsed = time.perf_counter() - start  # before reading the screen back, which is slow on a terminal
+                recorder.frame(self.backend.screen_rows(self.scrn), elapsed, updates)
+
+    def start_recording(self, path):
+        """Records the keys handled, resizes and the frames drawn until stop_recording, for replaying the session
+        with CursesRecord.replay. Start it before the first frame of the screens the session is replayed on.
+        :param path: File name or binary file to write to."""
+        from CursesUI import CursesRecord  # only loaded by tools that record
+        height, width = self.scrn.getmaxyx()
+        self.stop_recording()
+        self.recorder = CursesRecord.Recorder(path, height, width)
+
+    def stop_recording(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def toggle_overlay(self):
+        """Shows or hides the stats overlay in the top right corner. Needs a display made with stats=True."""
+        if self.overlay is None:
+            height, width = self.scrn.getmaxyx()
+            overlay_height, overlay_width = min(height, 10), min(width, 40)
+            self.overlay = CursesWidgets.StatsOverlay(self.stats)
+            self.overlay.set_context(CursesWidgets.WidgetContext(self.logger, self.backend))  # not timing itself
+            min_height, min_width = self.overlay.min_size
+            if overlay_height >= min_height and overlay_width >= min_width:  # shown again once the screen grows
+                self.overlay.add_win(self.backend.newwin(overlay_height, overlay_width, 0, width - overlay_width))
+        else:
+            self.overlay = None
+            self.scrn.touchwin()  # brings back what the overlay covered
+        self.full_redraw = True
 
-    def clear_layout(self):  #may cause memory leak
+    def clear_layout(self):
         self._layout.clear_widgets()
         self.scrn.clear()
+        self.full_redraw = True
 
-    def handle_input(self, keypress=None):
-        self.logger.log("Handling Input", "Cursor Position: " + str(self.scrn.getyx()))
+    def handle_input(self, keypress=None, count: int = 1):
+        """:param count: Times the key was pressed in a row, see handle_keys."""
+        self.logger.log("Handling Input", lambda: "Cursor Position: " + str(self.scrn.getyx()))
         if keypress is None:
-            keypress = self.scrn.getch()
+            keypress = self.next_key()
+        if self.recorder is not None and keypress != curses.KEY_RESIZE:
+            self.recorder.key(keypress, count)  # resizes are recorded with their size by apply_resize
 
-        if keypress == 9:
-            self._layout.change_active()
+        if keypress == curses.KEY_RESIZE:
+            self.handle_resize()
+        elif self.stats is None:
+            self._layout.input(keypress, count)
+        elif keypress == self.overlay_key:
+            self.toggle_overlay()
         else:
-            self._layout.input(keypress)
+            start = time.perf_counter()
+            self._layout.input(keypress, count)
+            self.stats.observe("input", time.perf_counter() - start)
+            self.stats.count("keys", count)
+            if self.input_start is None:
+                self.input_start = start
+
+    def next_key(self):
+        """Waits for a key, keys left over from the last batch come first."""
+        if self.pending_keys:
+            return self.pending_keys.popleft()
+        return self.scrn.getch()
+
+    def read_keys(self):
+        """Waits for a key, then reads every key that is already typed ahead without waiting.
+        :return: List of up to max_batch keys"""
+        keys = [self.next_key()]
+        while self.pending_keys and len(keys) < self.max_batch:
+            keys.append(self.pending_keys.popleft())
+        self.scrn.nodelay(True)
+        try:
+            while len(keys) < self.max_batch:
+                keypress = self.scrn.getch()
+                if keypress == -1:
+                    break
+                keys.append(keypress)
+        finally:
+            self.scrn.nodelay(False)
+        return keys
+
+    def handle_keys(self, keys, stop_key: int = None):
+        """Handles a batch of keys. A run of the same key bound to a repeatable action, like holding down
+        the arrow keys, is handled as one input with a count so it costs a single update. A run of KEY_RESIZE
+        lays the screen out once.
+        :param stop_key: Key to stop at, the keys after it are kept for the next batch. It is handled like any other
+        key while the active widget captures it, like enter ending a search.
+        :return: True if stop_key was handled"""
+        index = 0
+        while index < len(keys):
+            keypress = keys[index]
+            end = index + 1
+            if keypress == stop_key and not self._layout.captures(keypress):
+                self.handle_input(keypress)
+                self.pending_keys.extend(keys[end:])
+                return True
+            if keypress == curses.KEY_RESIZE or self._layout.is_repeatable(keypress):
+                while end < len(keys) and keys[end] == keypress:
+                    end += 1
+            self.handle_input(keypress, end - index)
+            index = end
+        return False
+
+    def handle_resize(self):
+        """Waits for a burst of KEY_RESIZE events to settle, then lays the screen out once for the final size.
+        A key that ends the burst is put back to be read normally."""
+        self.scrn.timeout(int(self.resize_delay * 1000))
+        try:
+            keypress = self.scrn.getch()
+            while keypress == curses.KEY_RESIZE:
+                keypress = self.scrn.getch()
+        finally:
+            self.scrn.timeout(-1)
+        if keypress != -1:
+            self.backend.ungetch(keypress)
+        self.apply_resize()
+
+    def apply_resize(self):
+        """Resizes the layout to the screen. Widget windows are moved and resized in a single layout pass
+        and the whole screen is repainted on the next frame."""
+        self.backend.update_lines_cols()
+        height, width = self.scrn.getmaxyx()
+        self.logger.log("Resizing screen", ("%s", (height, width)))
+        self._layout.resize(height, width)
+        self.screen.size = (height, width)  # screens below are laid out again when shown
+        if self.recorder is not None:
+            self.recorder.resize(height, width)
+        if self.overlay is not None:
+            self.overlay = None
+            self.toggle_overlay()  # back in the top right corner of the new size
+        self.full_redraw = True
 
     def wait_for_enter(self):
-        keypress = self.scrn.getch()
-        self.handle_input(keypress)
-        return not(str(curses.keyname(keypress)) == "b'^J'")
+        """Handles the next batch of keys, call draw_scrn after it to show them all in one frame.
+        :return: False once enter was pressed"""
+        return not self.handle_keys(self.read_keys(), CursesKeys.ENTER)
@@ -0,0 +1,124 @@
+import curses
+
+TAB = 9
+ENTER = 10
+ESCAPE = 27
+BACKSPACE = 127
+
+PENDING = "<pending>"  # returned by KeyMap.lookup while a chord is only partly typed
+
+
+def key_code(key):
+    """Turns a key description into a key code.
+    Accepts key codes, single characters, control keys like "^J" and curses key names like "KEY_DOWN"."""
+    if isinstance(key, int):
+        return key
+    if len(key) == 1:
+        return ord(key)
+    if len(key) == 2 and key[0] == "^":
+        return ord(key[1].upper()) - 64 if key[1] != "?" else BACKSPACE
+    code = getattr(curses, key, None)
+    if not isinstance(code, int):
+        raise ValueError("Unknown key " + repr(key))
+    return code
+
+
+def key_sequence(keys):
+    """Turns a binding into a tuple of key codes. A list, tuple or space separated string is a chord."""
+    if isinstance(keys, str) and " " in keys:
+        keys = keys.split()
+    if isinstance(keys, (list, tuple)):
+        return tuple(key_code(key) for key in keys)
+    return (key_code(keys),)
+
+
+class KeyMap:
+    """Maps key codes to action names with a dict per mode, so each key is a single lookup.
+    A binding can be a chord of several keys, which are kept in nested dicts until the last key arrives."""
+
+    _class_maps = {}
+
+    def __init__(self, bindings: dict = None):
+        """:param bindings: {keys: action} for the default mode"""
+        self.modes = {None: {}}
+        self.mode = None
+        self.chord = None
+        if bindings:
+            for keys, action in bindings.items():
+                self.bind(keys, action)
+
+    @classmethod
+    def for_class(cls, widget_class):
+        """A new keymap holding the bindings declared by widget_class and its base classes.
+        bindings is for the default mode and mode_bindings maps other modes to their bindings.
+        Subclass bindings replace their bases', and an action of None removes a binding."""
+        template = cls._class_maps.get(widget_class)
+        if template is None:
+            modes = {None: {}}
+            for klass in reversed(widget_class.__mro__):
+                for keys, action in vars(klass).get("bindings", {}).items():
+                    modes[None][key_sequence(keys)] = action
+                for mode, bindings in vars(klass).get("mode_bindings", {}).items():
+                    for keys, action in bindings.items():
+                        modes.setdefault(mode, {})[key_sequence(keys)] = action
+            template = cls()
+            for mode, bindings in modes.items():
+                template.modes.setdefault(mode, {})
+                for keys, action in bindings.items():
+                    if action is not None:
+                        template.bind(keys, action, mode)
+            cls._class_maps[widget_class] = template
+        return template.copy()
+
+    def copy(self):
+        keymap = KeyMap()
+        keymap.modes = {mode: self.copy_tree(tree) for mode, tree in self.modes.items()}
+        keymap.mode = self.mode
+        return keymap
+
+    @classmethod
+    def copy_tree(cls, tree):
+        return {key: cls.copy_tree(value) if isinstance(value, dict) else value for key, value in tree.items()}
+
+    def bind(self, keys, action: str, mode: str = None):
+        """Binds keys to an action, replacing any binding they had.
+        :param keys: A key, or a chord as a list or space separated string, see key_code.
+        :param mode: The mode the binding is active in, None is the default mode."""
+        sequence = key_sequence(keys)
+        node = self.modes.setdefault(mode, {})
+        for key in sequence[:-1]:
+            child = node.get(key)
+            if not isinstance(child, dict):
+                child = node[key] = {}
+            node = child
+        node[sequence[-1]] = action
+
+    def unbind(self, keys, mode: str = None):
+        sequence = key_sequence(keys)
+        node = self.modes.get(mode, {})
+        for key in sequence[:-1]:
+            node = node.get(key)
+            if not isinstance(node, dict):
+                return
+        node.pop(sequence[-1], None)
+
+    def set_mode(self, mode: str = None):
+        """Switches which bindings are active, None goes back to the default mode."""
+        self.modes.setdefault(mode, {})
+        self.mode = mode
+        self.chord = None
+
+    def lookup(self, keypress: int):
+        """Finds the action for a key.
+        :return: The action, PENDING if the key started or continued a chord, or None if it is not bound"""
+        node = self.chord if self.chord is not None else self.modes[self.mode]
+        action = node.get(keypress)
+        if isinstance(action, dict):
+            self.chord = action
+            return PENDING
+        self.chord = None
+        return action
+
+    def keys_for(self, action: str, mode: str = None):
+        """Every key bound directly to an action in a mode."""
+        return [key for key, value in self.modes.get(mode, {}).items() if value == action]
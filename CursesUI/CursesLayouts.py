@@ -1,17 +1,55 @@
 import curses
-import curses.textpad
+import itertools
 
 
-from CursesUI import CursesWidgets
+from CursesUI import CursesKeys, CursesWidgets
 import abc
 from CursesUI.CursesLogger import Logger
 
 
+def split(total: int, constraints: list):
+    """Splits a length between widgets. Widgets with a fixed size get it first,
+    the rest is shared by weight and rounded so the sizes add up to the total.
+    :param constraints: (weight, size) for each widget, size is None unless fixed
+    :return: The length given to each widget"""
+    sizes = [0] * len(constraints)
+    remaining = total
+    for index, (weight, size) in enumerate(constraints):
+        if size is not None:
+            sizes[index] = max(0, min(size, remaining))
+            remaining -= sizes[index]
+    weighted = [(index, weight) for index, (weight, size) in enumerate(constraints) if size is None]
+    total_weight = sum(weight for index, weight in weighted)
+    if not weighted or total_weight <= 0:
+        return sizes
+    shares = []
+    given = 0
+    for index, weight in weighted:
+        share = remaining * weight / total_weight
+        sizes[index] = int(share)
+        given += sizes[index]
+        shares.append((int(share) - share, index))
+    for fraction, index in sorted(shares)[:remaining - given]:
+        sizes[index] += 1
+    return sizes
+
+
+def offsets(sizes: list):
+    """Start of each length when they are placed one after another."""
+    return list(itertools.accumulate(sizes[:-1], initial=0))
+
+
 class Layout(CursesWidgets.DisplayWidget):
     widgets: list[CursesWidgets.DisplayWidget]
     win: curses.window
     logger: Logger
 
+    __slots__ = ("log_level", "active_widget", "new_handle", "value", "widgets", "screen", "allow_input",
+                 "constraints", "geometry", "solution", "layout_pending", "_dirty")
+
+    bindings = {CursesKeys.TAB: "next_widget"}
+    color_styles = ("red", "green", "yellow", "blue", "cyan", "magenta", "black", "white")  # widget backgrounds
+
     def __init__(self, log_level: int = 0):
         super().__init__()
         self.log_level = log_level
@@ -22,61 +60,250 @@ class Layout(CursesWidgets.DisplayWidget):
         self.value = -1
         self.screen = []
         self.allow_input = True
-        self.colorlist = (("red", curses.COLOR_RED),
-                          ("green", curses.COLOR_GREEN),
-                          ("yellow", curses.COLOR_YELLOW),
-                          ("blue", curses.COLOR_BLUE),
-                          ("cyan", curses.COLOR_CYAN),
-                          ("magenta", curses.COLOR_MAGENTA),
-                          ("black", curses.COLOR_BLACK),
-                          ("white", curses.COLOR_WHITE))
-        self.colors = {}
-        colorpairs = 0
-        for name, i in self.colorlist:
-            colorpairs += 1
-            curses.init_pair(colorpairs, curses.COLOR_WHITE, i)
-            self.colors[name] = curses.color_pair(i)
+        self.constraints = {}  # widget: (weight, size, color_pair)
+        self.geometry = {}  # widget: (y, x, height, width) of its window, None if it did not fit
+        self.solution = None  # ((height, width), compute_geometry result) until the constraints change
+        self.layout_pending = False
+
+    @property
+    def dirty(self):
+        """True if the layout or any widget on it needs drawing, so a dirty widget in a nested layout is
+        reached from the top without redrawing its clean siblings."""
+        return self._dirty or self.layout_pending or any(
+            widget.dirty for widget in self.widgets if self.geometry.get(widget) is not None)
+
+    @dirty.setter
+    def dirty(self, value):
+        self._dirty = value
+
+    @property
+    def accept_input(self):
+        """A layout takes input for its widgets when one of them does."""
+        return self.allow_input and any(widget.accept_input for widget in self.widgets)
+
+    def set_context(self, context: CursesWidgets.WidgetContext):
+        super().set_context(context)
+        for widget in self.widgets:
+            widget.set_context(context)
+
+    @property
+    def colors(self):
+        """Background attribute of each of the color_styles, from the shared palette."""
+        palette = self.palette
+        return {name: palette.style(name) for name in self.color_styles}
+
+    def background(self, index: int, color_pair):
+        """Background attribute for the widget at index, color_pair is an attribute or a style name."""
+        if color_pair is None:
+            color_pair = self.color_styles[index % len(self.color_styles)]
+        if isinstance(color_pair, str):
+            return self.palette.style(color_pair)
+        return color_pair
 
     @abc.abstractmethod
-    def add_widget_to_layout(self, widget: CursesWidgets.DisplayWidget):
+    def compute_geometry(self, height: int, width: int):
+        """Works out where each widget goes.
+        :return: A (y, x, height, width) tuple for each widget in self.widgets"""
         pass
 
+    def add_widget_to_layout(self, widget: CursesWidgets.DisplayWidget):
+        """Queues the widget to be given a window. Windows are only made or moved by update_layout,
+        so adding many widgets costs a single layout pass."""
+        self.constraints_changed()
+
+    def constraints_changed(self):
+        """Drops the cached geometry, the layout is solved again on the next update_layout."""
+        self.solution = None
+        self.layout_pending = True
+
+    def set_constraints(self, widget: CursesWidgets.DisplayWidget, weight: float = 1, size: int = None):
+        """Changes the space a widget gets, see add_widget. Only this layout and the widgets whose
+        windows change are laid out and drawn again."""
+        self.constraints[widget] = (weight, size, self.constraints[widget][2])
+        self.constraints_changed()
+
+    def update_layout(self):
+        """Computes the geometry of every widget, then moves or resizes the existing windows
+        and derives windows for new widgets. Windows are reused and the geometry is kept until the size
+        or constraints change. Only widgets whose windows changed are redrawn.
+        Called before drawing or handling input."""
+        if not self.layout_pending:
+            return
+        self.layout_pending = False
+        size = self.win.getmaxyx()
+        if self.solution is None or self.solution[0] != size:
+            self.solution = (size, self.compute_geometry(*size))
+        placed = []
+        changed = False
+        for index, (widget, rect) in enumerate(zip(self.widgets, self.solution[1])):
+            if rect[2] < widget.min_size[0] or rect[3] < widget.min_size[1]:
+                rect = None  # too small to draw in, the widget is unmounted until it fits again
+            if widget in self.geometry and self.geometry[widget] == rect:
+                continue
+            self.logger.log("Placing window", ("%s", rect))
+            changed = True
+            old_rect = self.geometry.get(widget)
+            self.geometry[widget] = rect
+            if rect is None:
+                if old_rect is not None:
+                    widget.unmount()
+                continue
+            if old_rect is None:
+                y, x, win_height, win_width = rect
+                new_win = self.win.derwin(win_height, win_width, y, x)
+                new_win.bkgd(' ', self.background(index, self.constraints[widget][2]))
+                widget.mount(new_win)
+            else:
+                # shrink before moving so every window fits inside the layout
+                old_height, old_width = widget.win.getmaxyx()
+                if rect[2] < old_height or rect[3] < old_width:
+                    widget.resize(min(rect[2], old_height), min(rect[3], old_width))
+                widget.move_win(rect[0], rect[1])
+                placed.append((widget, rect))
+        # only grow once every window has been moved out of the way
+        for widget, rect in placed:
+            widget.resize(rect[2], rect[3])
+        if changed:
+            self._dirty = True
+
     def get_widget(self, pos):
         return self.widgets[pos]
 
     def clear_widgets(self):
+        """Removes and disposes of every widget. Widgets kept by save_screen are only unmounted,
+        so load_screen can show them again."""
+        saved = self.saved_widgets()
+        for widget in self.widgets:
+            if widget not in saved:
+                widget.dispose()
+            elif widget.mounted:
+                widget.unmount()
         self.widgets = []
+        self.constraints = {}
+        self.geometry = {}
+        self.solution = None
         self.win.clear()
+        self.mark_dirty()
+
+    def unmount(self):
+        """Drops the windows of the layout and its widgets, they are derived again when it is mounted."""
+        for widget in self.widgets:
+            widget.unmount()
+        self.geometry = {}
+        super().unmount()
+
+    def dispose(self):
+        for widget in self.widgets:
+            widget.dispose()
+        self.geometry = {}
+        super().dispose()
 
     def add_widget(self, widget: CursesWidgets.DisplayWidget,
-                   color_pair=None):
+                   color_pair=None, weight: float = 1, size: int = None):
+        """Adds a widget to the layout.
+        :param color_pair: Background attribute or palette style name for the widget, defaults to the next
+        of the layout's color_styles.
+        :param weight: Share of the free space the widget gets relative to the other widgets.
+        :param size: Fixed number of rows or columns for the widget instead of a weighted share."""
         self.widgets.append(widget)
-        widget.logger = self.logger
-        self.active_widget = 0
+        widget.set_context(self.context)
+        self.constraints[widget] = (weight, size, color_pair)
+        self.active_widget = len(self.widgets) - 1
         self.add_widget_to_layout(widget)
         return widget
 
+    def add_win(self, win: curses.window):
+        for widget in self.widgets:
+            widget.unmount()  # their windows are derived from the old one
+        super().add_win(win)
+        self.geometry = {}
+        self.layout_pending = True
+
+    def resize(self, y: int, x: int):
+        """Resizes the layout, its widgets are laid out again on the next update_layout."""
+        super().resize(y, x)
+        self.layout_pending = True
+
+    def move_win(self, y: int, x: int):
+        """Moves a nested layout. Windows derived from it would keep showing the cells at the old position,
+        so its widgets get new windows on the next update_layout. The cached geometry is still used."""
+        for widget in self.widgets:
+            widget.unmount()
+        self.geometry = {}
+        super().move_win(y, x)
+        self.layout_pending = True
+
+    def handle_input(self, keypress, count: int = 1):
+        """Input from the layout this one is nested in."""
+        self.input(keypress, count)
+
+    def mark_dirty(self):
+        """Flags the layout and every widget in it to be redrawn on the next frame."""
+        self.dirty = True
+        for widget in self.widgets:
+            widget.mark_dirty()
+
+    def screen_restored(self):
+        for widget in self.widgets:
+            if self.geometry.get(widget) is not None:
+                widget.screen_restored()
+
     def draw_self(self):
         self.draw()
 
     def draw(self, logger=None):
+        """Draws the dirty widgets of the layout into their windows.
+        Nothing is sent to the terminal, the display does a single curses.doupdate per frame.
+        :return: True if anything was drawn"""
+        self.update_layout()
+        drawn = self._dirty
+        if self._dirty:
+            self.win.noutrefresh()
+            self._dirty = False
         for widget in self.widgets:
-            self.logger.log("Drawing Widget", str(widget.win.getbkgd()))
-            self.new_handle = widget.draw()
-        self.win.refresh()
+            if widget.dirty and self.geometry.get(widget) is not None:
+                drawn = widget.draw() or drawn
+        return drawn
+
+    def focus_next(self):
+        """Makes the next widget on screen that takes input the active one, going through the widgets of a
+        nested layout before moving past it.
+        :return: False if there is no next widget"""
+        if self.win is None:
+            return False
+        self.update_layout()
+        if self.active_widget is not None:
+            active = self.widgets[self.active_widget]
+            if isinstance(active, Layout) and active.focus_next():
+                return True
+        start = 0 if self.active_widget is None else self.active_widget + 1
+        for index in range(start, len(self.widgets)):
+            widget = self.widgets[index]
+            if widget.accept_input and self.geometry.get(widget) is not None:
+                self.active_widget = index
+                if isinstance(widget, Layout):
+                    widget.active_widget = None
+                    widget.focus_next()
+                widget.mark_dirty()
+                return True
+        return False
 
     def change_active(self):
-        self.active_widget += 1
-        if self.active_widget > len(self.widgets) - 1:
-            self.active_widget = 0
-        if self.widgets[self.active_widget].accept_input:
-            self.move_to_active()
-        else:
-            self.active_widget -= 1
+        previous = self.active_widget
+        if not self.focus_next():
+            self.active_widget = None
+            if not self.focus_next():
+                self.active_widget = previous
+                return
+        self.move_to_active()
 
     def move_to_active(self):
-        self.win.move(self.widgets[self.active_widget].win.getbegyx()[0],
-                      self.widgets[self.active_widget].win.getbegyx()[1])
+        widget = self.widgets[self.active_widget]
+        if widget.win is None:
+            return
+        y, x = widget.win.getbegyx()
+        top, left = self.win.getbegyx()
+        self.win.move(y - top, x - left)
         self.win.cursyncup()
 
     # def update_to_active(self):  # todo remove
@@ -84,52 +311,222 @@ class Layout(CursesWidgets.DisplayWidget):
     #         if self.widgets[self.active_widget].text != -1:
     #             self.value = self.widgets[self.active_widget].text
 
-    def input(self, keypress):
-        if keypress == 9:
-            self.change_active()
-        else:
-            self.widget_input(keypress)
+    def input(self, keypress, count: int = 1):
+        """:param count: Times the key was pressed in a row, see is_repeatable."""
+        if keypress == curses.KEY_RESIZE:  # handled by the display, not a key for the widgets
+            return
+        self.update_layout()
+        handled, result = self.dispatch(keypress, count)
+        if not handled:
+            self.widget_input(keypress, count)
+
+    def is_repeatable(self, keypress: int):
+        """True if the key would go to a repeatable action of the active widget, so a run of it can be
+        handled at once with a count."""
+        keymap = self.keymap
+        if keymap.chord is not None or keypress in keymap.modes[keymap.mode]:
+            return super().is_repeatable(keypress)
+        if self.active_widget is None:
+            return False
+        widget = self.widgets[self.active_widget]
+        return widget.accept_input and widget.is_repeatable(keypress)
 
-    def widget_input(self, keypress):  # todo send input for any widget
-        if self.widgets[self.active_widget].accept_input:  # check to see if the widget can accept input
-            # noinspection PyUnresolvedReferences
-            self.widgets[self.active_widget].handle_input(keypress)
+    def captures(self, keypress: int):
+        """True if the key is captured by the layout or the active widget, see DisplayWidget.captures."""
+        if super().captures(keypress):
+            return True
+        if self.active_widget is None:
+            return False
+        widget = self.widgets[self.active_widget]
+        return widget.accept_input and widget.mounted and widget.captures(keypress)
+
+    def action_next_widget(self):
+        self.change_active()
+
+    def widget_input(self, keypress, count: int = 1):  # todo send input for any widget
+        if self.active_widget is None:
+            return
+        widget = self.widgets[self.active_widget]
+        if widget.accept_input and widget.mounted:  # keys for a widget too small to be shown are dropped
+            if count == 1:
+                # noinspection PyUnresolvedReferences
+                widget.handle_input(keypress)
+            else:
+                # noinspection PyUnresolvedReferences
+                widget.handle_input(keypress, count)
         else:
             return
 
     def save_screen(self):
-        self.screen.append(self.widgets)
+        """Remembers the current widgets and their constraints, add_widget and clear_widgets do not change the
+        saved list.
+        :return: Position to give load_screen"""
+        self.screen.append([(widget, self.constraints[widget]) for widget in self.widgets])
         return len(self.screen) - 1
 
+    def saved_widgets(self):
+        """Every widget kept by save_screen."""
+        return {widget for screen in self.screen for widget, constraints in screen}
+
     def load_screen(self, pos):
-        self.widgets = self.screen[pos]
-        self.win.clear()
-        self.draw()
+        """Shows the widgets saved by save_screen again, with the constraints they had. The widgets shown until
+        now are unmounted, and disposed of unless a saved screen holds them."""
+        saved = self.screen[pos]
+        widgets = [widget for widget, constraints in saved]
+        kept = self.saved_widgets()
+        for widget in self.widgets:
+            if widget in widgets:
+                continue
+            if widget in kept:
+                widget.unmount()
+            else:
+                widget.dispose()
+            self.geometry.pop(widget, None)
+        self.widgets = widgets
+        self.constraints = dict(saved)
+        if self.active_widget is not None and self.active_widget >= len(self.widgets):
+            self.active_widget = len(self.widgets) - 1 if self.widgets else None
+        self.win.erase()
+        self.constraints_changed()
+        self.mark_dirty()
 
 
 class HorizonalLayout(Layout):
 
-    def add_widget_to_layout(self, widget: CursesWidgets.DisplayWidget):
-        num_widgets = len(self.widgets)
-        widget_win_size = [self.win.getmaxyx()[0], int(self.win.getmaxyx()[1] / num_widgets)]
-        for index in range(num_widgets):
-            # creates a basic horizontal layout
-            self.logger.log("Making window", str((0, int(self.win.getmaxyx()[1] / num_widgets) * (num_widgets - 1))))
-            new_win = self.win.derwin(0, widget_win_size[1] * index)
-            self.widgets[index].add_win(new_win)
-            self.widgets[index].resize(self.win.getmaxyx()[0], int(self.win.getmaxyx()[1] / num_widgets))
-            self.widgets[index].win.bkgd(' ', list(self.colors.values())[index])
-            self.active_widget = index
+    __slots__ = ()
+
+    def compute_geometry(self, height: int, width: int):
+        widths = split(width, [self.constraints[widget][:2] for widget in self.widgets])
+        geometry = []
+        x = 0
+        for widget_width in widths:
+            geometry.append((0, x, height, widget_width))
+            x += widget_width
+        return geometry
 
 
 class VerticalLayout(Layout):
-    def add_widget_to_layout(self, widget: CursesWidgets.DisplayWidget):
-        num_widgets = len(self.widgets)
-        widget_win_size = [int(self.win.getmaxyx()[0] / num_widgets), self.win.getmaxyx()[1]]
-        for index in range(num_widgets):
-            self.logger.log("Making window", str((widget_win_size[0], widget_win_size[1] * (num_widgets - 1))))
-            new_win = self.win.derwin(widget_win_size[0] * index, 0)
-            self.widgets[index].add_win(new_win)
-            self.widgets[index].resize(widget_win_size[0], widget_win_size[1])
-            self.widgets[index].win.bkgd(' ', list(self.colors.values())[index])
-            self.active_widget = index
+
+    __slots__ = ()
+
+    def compute_geometry(self, height: int, width: int):
+        heights = split(height, [self.constraints[widget][:2] for widget in self.widgets])
+        geometry = []
+        y = 0
+        for widget_height in heights:
+            geometry.append((y, 0, widget_height, width))
+            y += widget_height
+        return geometry
+
+
+HBox = HorizonalLayout
+VBox = VerticalLayout
+
+
+class Grid(Layout):
+    """Places widgets in rows of a fixed number of columns, in the order they are added.
+    Rows and columns are sized by their own constraints, the weight and size given to add_widget are not used."""
+
+    __slots__ = ("columns", "column_constraints", "row_constraints")
+
+    def __init__(self, columns: int = 2, column_constraints: list = None, row_constraints: list = None,
+                 log_level: int = 0):
+        """:param column_constraints: (weight, size) for each column like split takes, equal weights by default.
+        :param row_constraints: (weight, size) for each row, rows past the list get a weight of 1."""
+        super().__init__(log_level)
+        self.columns = columns
+        self.column_constraints = column_constraints or [(1, None)] * columns
+        self.row_constraints = row_constraints or []
+
+    def compute_geometry(self, height: int, width: int):
+        rows = -(-len(self.widgets) // self.columns)
+        row_constraints = list(self.row_constraints[:rows]) + [(1, None)] * (rows - len(self.row_constraints))
+        widths = split(width, self.column_constraints)
+        heights = split(height, row_constraints)
+        xs = offsets(widths)
+        ys = offsets(heights)
+        geometry = []
+        for index in range(len(self.widgets)):
+            row, column = divmod(index, self.columns)
+            geometry.append((ys[row], xs[column], heights[row], widths[column]))
+        return geometry
+
+
+class Stack(Layout):
+    """Widgets on top of each other, the shown one takes the whole layout and gets the input.
+    Hidden widgets have no window until they are shown again. Shift and page down or page up show the next
+    or previous widget."""
+
+    __slots__ = ("shown",)
+
+    bindings = {curses.KEY_SNEXT: "next_page",
+                curses.KEY_SPREVIOUS: "previous_page"}
+
+    def __init__(self, log_level: int = 0):
+        super().__init__(log_level)
+        self.shown = 0
+
+    def compute_geometry(self, height: int, width: int):
+        return [(0, 0, height, width) if index == self.shown else (0, 0, 0, 0) for index in range(len(self.widgets))]
+
+    def add_widget(self, widget: CursesWidgets.DisplayWidget, color_pair=None, weight: float = 1, size: int = None):
+        super().add_widget(widget, color_pair, weight, size)
+        self.active_widget = self.shown
+        return widget
+
+    def show(self, index: int):
+        """Shows the widget at index in place of the current one."""
+        self.shown = index
+        self.active_widget = index
+        if self.win is not None:
+            self.win.erase()
+        self.constraints_changed()
+
+    def action_next_page(self):
+        if self.widgets:
+            self.show((self.shown + 1) % len(self.widgets))
+
+    def action_previous_page(self):
+        if self.widgets:
+            self.show((self.shown - 1) % len(self.widgets))
+
+
+class Split(Layout):
+    """Widgets side by side, or above each other if vertical, with the first one getting ratio of the space and
+    the others sharing the rest by weight. Shift and the arrow keys move the divider."""
+
+    __slots__ = ("vertical", "ratio", "step")
+
+    bindings = {curses.KEY_SLEFT: "shrink_first",
+                curses.KEY_SRIGHT: "grow_first",
+                curses.KEY_SR: "shrink_first",
+                curses.KEY_SF: "grow_first"}
+    repeatable_actions = frozenset(("shrink_first", "grow_first"))
+
+    def __init__(self, vertical: bool = False, ratio: float = 0.5, step: float = 0.05, log_level: int = 0):
+        """:param ratio: Share of the space given to the first widget, between 0 and 1.
+        :param step: Change of the ratio for each key press."""
+        super().__init__(log_level)
+        self.vertical = vertical
+        self.ratio = ratio
+        self.step = step
+
+    def compute_geometry(self, height: int, width: int):
+        total = height if self.vertical else width
+        first = min(total, max(0, round(total * self.ratio)))
+        sizes = [first] + split(total - first, [self.constraints[widget][:2] for widget in self.widgets[1:]])
+        sizes = sizes[:len(self.widgets)]
+        if self.vertical:
+            return [(y, 0, size, width) for y, size in zip(offsets(sizes), sizes)]
+        return [(0, x, height, size) for x, size in zip(offsets(sizes), sizes)]
+
+    def set_ratio(self, ratio: float):
+        """Moves the divider, only the widgets of this split are laid out again."""
+        self.ratio = min(1.0, max(0.0, ratio))
+        self.constraints_changed()
+
+    def action_grow_first(self, count: int = 1):
+        self.set_ratio(self.ratio + self.step * count)
+
+    def action_shrink_first(self, count: int = 1):
+        self.set_ratio(self.ratio - self.step * count)
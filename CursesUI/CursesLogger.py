@@ -1,17 +1,127 @@
+import atexit
+import queue
+import threading
+
+
 class Logger():
-    def __init__(self, loglevel=0):
+    """Buffered debug logger.
+    Lines are written through a persistent file handle, by a background thread unless background is False.
+    Messages are only formatted when the log level lets them through, and a disabled logger's log is a no-op."""
+
+    def __init__(self, loglevel=0, path="../log.txt", bridge=None, background=True):
+        """:param loglevel: 0 disables logging, 1 writes the first string of each message, higher levels write more.
+        :param path: File to log to, truncated on the first write. None to only use the bridge.
+        :param bridge: A logging.Logger to also send lines to at DEBUG level, or True for the "CursesUI" logger.
+        :param background: Write from a background thread so logging never waits on the disk."""
+        self.path = path
+        if bridge is True:
+            import logging  # only imported when asked for, it is slow to import for short lived tools
+            bridge = logging.getLogger("CursesUI")
+        self.bridge = bridge
+        self.background = background
+        self.logfile = None
+        self.opened = False
+        self.queue = None
+        self.thread = None
+        self.exit_registered = False
+        self.lock = threading.Lock()
         self.log_level = loglevel
-        logfile = open("../log.txt", "w")
-        logfile.close()
+
+    @property
+    def log_level(self):
+        return self._log_level
+
+    @log_level.setter
+    def log_level(self, value):
+        self._log_level = value
+        if value < 1:
+            self.log = self.discard  # shadow the method so a disabled logger costs a single call
+        else:
+            self.__dict__.pop("log", None)
+
+    @property
+    def enabled(self):
+        return self._log_level > 0
+
+    def discard(self, *logstrings):
+        pass
 
     def log(self, *logstrings):
-        if self.log_level < 1:
-            return
-        with open("../log.txt", "a") as logfile:
-            logfile.write(logstrings[0])
-            logfile.write("\n")
-            if self.log_level > 1:
-                for logindex in range(1, self.log_level):
-                    if logindex < len(logstrings):
-                        logfile.write(logstrings[logindex])
-                        logfile.write("\n")
+        """Logs the first string, and at higher log levels the strings after it, one per line.
+        A string can also be a callable returning the string, or a tuple of a %-format string and its arguments,
+        neither is evaluated unless the line is logged. Callables are called right away, tuples are
+        formatted by the writer."""
+        lines = []
+        for logstring in logstrings[:max(1, self._log_level)]:
+            if callable(logstring):
+                logstring = logstring()
+            lines.append(logstring)
+        if self.background:
+            self.start()
+            self.queue.put(lines)
+        else:
+            with self.lock:
+                self.write(lines)
+
+    def start(self):
+        if self.thread is None:
+            with self.lock:
+                if self.thread is None:
+                    self.queue = queue.SimpleQueue()
+                    self.thread = threading.Thread(target=self.writer, name="CursesUI logger", daemon=True)
+                    self.thread.start()
+                    if not self.exit_registered:
+                        atexit.register(self.close)
+                        self.exit_registered = True
+
+    def writer(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            if isinstance(item, threading.Event):
+                if self.logfile is not None:
+                    self.logfile.flush()
+                item.set()
+                continue
+            self.write(item)
+            if self.queue.empty() and self.logfile is not None:
+                self.logfile.flush()
+        if self.logfile is not None:
+            self.logfile.close()
+            self.logfile = None
+
+    def write(self, lines):
+        if self.logfile is None and self.path is not None:
+            self.logfile = open(self.path, "a" if self.opened else "w")
+            self.opened = True
+        for line in lines:
+            if isinstance(line, tuple):
+                line = line[0] % line[1:]
+            if self.logfile is not None:
+                self.logfile.write(line)
+                self.logfile.write("\n")
+            if self.bridge is not None:
+                self.bridge.debug(line)
+
+    def flush(self):
+        """Writes out everything logged so far, waiting for the background writer to catch up."""
+        if self.thread is not None:
+            done = threading.Event()
+            self.queue.put(done)
+            done.wait()
+        else:
+            with self.lock:
+                if self.logfile is not None:
+                    self.logfile.flush()
+
+    def close(self):
+        """Flushes and closes the log file. Logging again reopens it in append mode."""
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+        with self.lock:
+            if self.logfile is not None:
+                self.logfile.close()
+                self.logfile = None
@@ -0,0 +1,154 @@
+import collections.abc
+import types
+import weakref
+
+
+class Observable:
+    """Base class for data that widgets can watch. Every change calls the watchers and bumps version.
+    Models are changed on the UI thread, from other threads use Display.post. Posts of the same function are merged
+    until the next frame, so post a batch, for example display.post(None, values.extend, lines), or give each post
+    a unique key."""
+
+    def __init__(self):
+        self.watchers = []
+        self.version = 0  # changes whenever the data does
+
+    def watch(self, callback):
+        """Calls callback with the details of every change. Bound methods are held weakly, so a widget watching
+        a shared model is not kept alive by it, other callables are held until unwatch."""
+        if isinstance(callback, types.MethodType):
+            self.watchers.append(weakref.WeakMethod(callback, self.watchers.remove))
+        else:
+            self.watchers.append(lambda: callback)
+
+    def unwatch(self, callback):
+        for ref in self.watchers:
+            if ref() == callback:
+                self.watchers.remove(ref)
+                return
+
+    def notify(self, *event):
+        self.version += 1
+        for ref in list(self.watchers):  # a watcher may unwatch
+            callback = ref()
+            if callback is not None:
+                callback(*event)
+
+
+class ObservableValue(Observable):
+    """A single value, watchers are called without arguments when it changes.
+
+    Example:
+        status = ObservableValue("idle")
+        layout.add_widget(LabelWidget(status), size=1)
+        status.value = "loading"  # the label is redrawn on the next frame"""
+
+    def __init__(self, value=None):
+        super().__init__()
+        self._value = value
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        if value != self._value:
+            self._value = value
+            self.notify()
+
+    def set(self, value):
+        """Sets the value, for passing as a function such as to Display.post."""
+        self.value = value
+
+
+class Computed(Observable):
+    """A value computed by func from other observables. It is only computed again when read after one of its
+    sources changed, and its watchers are called once per change of the sources until then.
+
+    Example:
+        total = Computed(lambda: "%d rows, %d selected" % (len(rows), len(selected)), rows, selected)"""
+
+    def __init__(self, func, *sources: Observable):
+        """:param func: Called without arguments, reads the sources itself.
+        :param sources: Observables func reads, their changes invalidate the value."""
+        super().__init__()
+        self.func = func
+        self.sources = sources
+        self._value = None
+        self.stale = True
+        for source in sources:
+            source.watch(self.invalidate)
+
+    def invalidate(self, *event):
+        if not self.stale:
+            self.stale = True
+            self.notify()
+
+    @property
+    def value(self):
+        if self.stale:
+            self._value = self.func()
+            self.stale = False
+        return self._value
+
+
+class ObservableList(Observable, collections.abc.MutableSequence):
+    """A list that tells its watchers which rows changed. Watchers are called with (kind, index, count), kind is
+    "insert" or "remove" for count rows at index, "update" for count rows at index changed in place
+    and "reset" when the whole list was replaced. ListView and its subclasses watch an ObservableList given as
+    their values, and only redraw the rows on screen that changed."""
+
+    def __init__(self, items=()):
+        super().__init__()
+        self.items = list(items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            self.items[index] = value
+            self.notify("reset", 0, len(self.items))
+            return
+        if index < 0:
+            index += len(self.items)
+        self.items[index] = value
+        self.notify("update", index, 1)
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            del self.items[index]
+            self.notify("reset", 0, len(self.items))
+            return
+        if index < 0:
+            index += len(self.items)
+        del self.items[index]
+        self.notify("remove", index, 1)
+
+    def insert(self, index: int, value):
+        length = len(self.items)
+        index = max(0, min(index + length if index < 0 else index, length))
+        self.items.insert(index, value)
+        self.notify("insert", index, 1)
+
+    def extend(self, values):
+        start = len(self.items)
+        self.items.extend(values)
+        if len(self.items) > start:
+            self.notify("insert", start, len(self.items) - start)
+
+    def clear(self):
+        self.items.clear()
+        self.notify("reset", 0, 0)
+
+    def reset(self, items):
+        """Replaces every item at once."""
+        self.items[:] = items
+        self.notify("reset", 0, len(self.items))
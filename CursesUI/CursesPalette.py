@@ -0,0 +1,144 @@
+import collections
+import curses
+import weakref
+
+COLOR_NAMES = {"default": -1,
+               "black": curses.COLOR_BLACK,
+               "red": curses.COLOR_RED,
+               "green": curses.COLOR_GREEN,
+               "yellow": curses.COLOR_YELLOW,
+               "blue": curses.COLOR_BLUE,
+               "magenta": curses.COLOR_MAGENTA,
+               "cyan": curses.COLOR_CYAN,
+               "white": curses.COLOR_WHITE}
+
+# style name: (foreground, background, attributes)
+DEFAULT_STYLES = {"default": (-1, -1, 0),
+                  "red": ("white", "red", 0),
+                  "green": ("white", "green", 0),
+                  "yellow": ("white", "yellow", 0),
+                  "blue": ("white", "blue", 0),
+                  "cyan": ("white", "cyan", 0),
+                  "magenta": ("white", "magenta", 0),
+                  "black": ("white", "black", 0),
+                  "white": ("white", "white", 0)}
+
+
+def basic_color(color: int):
+    """The closest of the 8 basic colors to a color of the 256 color palette."""
+    if color < 16:
+        return color % 8
+    if color >= 232:  # grey ramp
+        return curses.COLOR_WHITE if color >= 244 else curses.COLOR_BLACK
+    color -= 16
+    red, green, blue = color // 36, color // 6 % 6, color % 6
+    return (curses.COLOR_RED if red >= 3 else 0) | (curses.COLOR_GREEN if green >= 3 else 0) \
+        | (curses.COLOR_BLUE if blue >= 3 else 0)
+
+
+class Palette:
+    """Hands out curses attributes for (foreground, background, attributes) and named styles.
+    Color pairs are only initialized when a combination is first used and are shared by everything asking
+    for it. Once the terminal's pairs run out, the least recently used pair is reinitialized for the new
+    colors, so cells still drawn with the old pair change color. Colors can be curses color numbers,
+    names from COLOR_NAMES or -1 for the terminal default, colors past what the terminal has are mapped
+    to the nearest basic color. Pairs the app initializes itself with curses.init_pair are left alone if they
+    are reserved, see reserve."""
+
+    def __init__(self, backend, reserved_pairs: int = 0):
+        """:param reserved_pairs: Color pairs from 1 up that are left to the app."""
+        self.backend = backend
+        self.colors = None  # number of colors, set once color is started
+        self.max_pairs = 0
+        self.default_colors = False
+        self.pairs = collections.OrderedDict()  # (fg, bg): pair number, least recently used first
+        self.first_pair = reserved_pairs + 1
+        self.next_pair = self.first_pair
+        self.attrs = {}  # (fg, bg, attrs) as asked for: (attribute, (fg, bg) or None)
+        self.users = collections.defaultdict(set)  # (fg, bg): keys of attrs using the pair
+        self.styles = dict(DEFAULT_STYLES)
+
+    def start(self):
+        colors, pairs = self.backend.color_limits()
+        self.colors = colors
+        self.max_pairs = min(pairs, 256)  # the pair number has to fit in the attribute's color bits
+        self.default_colors = colors > 0 and self.backend.default_colors()
+
+    def resolve(self, color, default: int):
+        if isinstance(color, str):
+            color = COLOR_NAMES[color.lower()]
+        if color < 0:
+            return color if self.default_colors else default
+        if color >= self.colors:
+            return basic_color(color)
+        return color
+
+    def attr(self, fg=-1, bg=-1, attrs: int = 0):
+        """The curses attribute for text in fg on bg with attrs, such as curses.A_BOLD, added."""
+        key = (fg, bg, attrs)
+        cached = self.attrs.get(key)
+        if cached is not None:
+            if cached[1] is not None:
+                self.pairs.move_to_end(cached[1])
+            return cached[0]
+        if self.colors is None:
+            self.start()
+        pair_key = None
+        value = attrs
+        if self.colors:
+            pair_key = (self.resolve(fg, curses.COLOR_WHITE), self.resolve(bg, curses.COLOR_BLACK))
+            if pair_key == (-1, -1):
+                pair_key = None  # pair 0 is always the terminal default
+            else:
+                pair = self.pairs.get(pair_key)
+                if pair is None:
+                    pair = self.allocate(pair_key)
+                else:
+                    self.pairs.move_to_end(pair_key)
+                value |= self.backend.color_pair(pair)
+                self.users[pair_key].add(key)
+        self.attrs[key] = (value, pair_key)
+        return value
+
+    def allocate(self, pair_key):
+        if self.next_pair < self.max_pairs:
+            pair = self.next_pair
+            self.next_pair += 1
+        else:
+            old_key, pair = self.pairs.popitem(last=False)
+            for key in self.users.pop(old_key, ()):
+                del self.attrs[key]
+        self.backend.init_pair(pair, *pair_key)
+        self.pairs[pair_key] = pair
+        return pair
+
+    def reserve(self, pairs: int):
+        """Leaves color pairs 1 to pairs to the app's own curses.init_pair calls, call it before the first frame.
+        Attributes already handed out with those pairs are forgotten and get new pairs when asked for again."""
+        self.first_pair = max(self.first_pair, pairs + 1)
+        self.next_pair = max(self.next_pair, self.first_pair)
+        for pair_key, pair in list(self.pairs.items()):
+            if pair < self.first_pair:
+                del self.pairs[pair_key]
+                for key in self.users.pop(pair_key, ()):
+                    del self.attrs[key]
+
+    def define(self, name: str, fg=-1, bg=-1, attrs: int = 0):
+        """Adds or changes a named style."""
+        self.styles[name] = (fg, bg, attrs)
+
+    def style(self, name: str):
+        """The curses attribute of a named style."""
+        return self.attr(*self.styles[name])
+
+
+_palettes = weakref.WeakKeyDictionary()
+
+
+def for_backend(backend):
+    """The palette shared by everything drawing through a backend, for the terminal it is process wide."""
+    palette = _palettes.get(backend)
+    if palette is None:
+        # the palette must not keep its key alive, or a backend that is done with is never freed
+        palette = _palettes[backend] = Palette(weakref.proxy(backend))
+    return palette
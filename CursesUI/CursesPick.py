@@ -0,0 +1,66 @@
+import curses
+
+from CursesUI import CursesBackend, CursesKeys, CursesWidgets
+
+QUIT_KEYS = frozenset((CursesKeys.ESCAPE, ord("q")))
+
+
+def choose(scrn: curses.window, labels: list, prompt: str = None, backend=CursesBackend.terminal):
+    """Runs a picker on a screen that is already set up, see pick.
+    :param labels: The text of each item.
+    :return: Index of the chosen label, or None if the picker was quit"""
+    menu = CursesWidgets.ListMenu(labels)
+    menu.set_context(CursesWidgets.WidgetContext(backend=backend))
+    top = 1 if prompt else 0
+
+    def place():
+        height, width = scrn.getmaxyx()
+        scrn.erase()
+        if prompt:
+            scrn.addnstr(0, 0, prompt, width - 1, curses.A_BOLD)
+        scrn.noutrefresh()
+        menu.unmount()
+        menu.mount(scrn.derwin(max(1, height - top), width, min(top, height - 1), 0))
+
+    place()
+    while True:
+        menu.draw()
+        backend.doupdate()
+        keypress = scrn.getch()
+        if keypress == curses.KEY_RESIZE:
+            backend.update_lines_cols()
+            place()
+        elif not menu.searching and keypress == CursesKeys.ENTER:
+            menu.action_select()
+            return menu.value
+        elif not menu.searching and keypress in QUIT_KEYS:
+            return None
+        else:
+            menu.handle_input(keypress)
+
+
+def pick(items, prompt: str = None):
+    """Lets the user pick one item on the terminal, for short lived tools. Only a ListMenu is built, without a
+    Display or layouts, and curses is started without colors, so the first frame is drawn right away.
+    Arrows and page keys move, / searches, enter picks and escape or q quits.
+
+    Example:
+        branch = pick(branches, "Switch to branch:")
+    :param items: Iterable of the items, shown with str.
+    :param prompt: Line shown above the items.
+    :return: The picked item, or None if the user quit"""
+    items = list(items)
+    labels = [str(item) for item in items]
+    scrn = curses.initscr()
+    try:
+        curses.noecho()
+        curses.cbreak()
+        scrn.keypad(True)
+        curses.set_escdelay(25)  # escape quits, without waiting for the rest of an escape sequence
+        index = choose(scrn, labels, prompt)
+    finally:
+        scrn.keypad(False)
+        curses.echo()
+        curses.nocbreak()
+        curses.endwin()
+    return None if index is None else items[index]
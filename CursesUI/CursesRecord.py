@@ -0,0 +1,290 @@
+import curses
+import gzip
+import time
+
+from CursesUI import CursesBackend, CursesDisplay, CursesStats, CursesUpdates
+
+MAGIC = b"CursesUI session\n"
+VERSION = 1
+KEY, RESIZE, FRAME = 1, 2, 3
+
+
+def put_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def get_varint(data: bytes, index: int):
+    """:return: The value and the index after it"""
+    value = shift = 0
+    while True:
+        byte = data[index]
+        index += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, index
+        shift += 7
+
+
+def zigzag(value: int):
+    """Maps signed to unsigned ints so small negative key codes stay short."""
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def unzigzag(value: int):
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+class Recorder:
+    """Writes a session to a gzip compressed file: the keys a Display handles, resizes and the rows each frame
+    changed. Records start with a type byte, the numbers are unsigned LEB128 varints:
+        header  MAGIC, version, height, width
+        key     KEY, microseconds since the start, zigzag key code, count
+        resize  RESIZE, microseconds, height, width
+        frame   FRAME, microseconds, draw time in microseconds, posted updates applied before drawing it,
+                number of rows, then per row its index,
+                the length and UTF-8 bytes of its text, the number of attribute runs and (length, attribute)
+                for each run
+    Times are stored as the difference to the record before. A frame only holds the rows that changed since
+    the frame before it, the first frame and the first after a resize hold every row."""
+
+    def __init__(self, path, height: int, width: int):
+        """:param path: File name or binary file to write to."""
+        self.file = gzip.open(path, "wb") if isinstance(path, str) else gzip.GzipFile(fileobj=path, mode="wb")
+        self.start = time.perf_counter()
+        self.elapsed = 0  # microseconds at the last record
+        self.rows = None  # rows of the last frame
+        self.buffer = bytearray(MAGIC)
+        for value in (VERSION, height, width):
+            put_varint(self.buffer, value)
+
+    def stamp(self, kind: int):
+        elapsed = int((time.perf_counter() - self.start) * 1_000_000)
+        self.buffer.append(kind)
+        put_varint(self.buffer, elapsed - self.elapsed)
+        self.elapsed = elapsed
+
+    def key(self, keypress: int, count: int = 1):
+        self.stamp(KEY)
+        put_varint(self.buffer, zigzag(keypress))
+        put_varint(self.buffer, count)
+
+    def resize(self, height: int, width: int):
+        self.stamp(RESIZE)
+        put_varint(self.buffer, height)
+        put_varint(self.buffer, width)
+        self.rows = None
+
+    def frame(self, rows: list, seconds: float, updates: int = 0):
+        """:param rows: (text, attributes) of every row of the screen, see TerminalBackend.screen_rows.
+        :param seconds: Time the frame took to draw.
+        :param updates: Updates posted from other threads that were applied in the frame."""
+        previous = self.rows
+        changed = [(y, row) for y, row in enumerate(rows)
+                   if previous is None or y >= len(previous) or previous[y] != row]
+        buffer = self.buffer
+        self.stamp(FRAME)
+        put_varint(buffer, int(seconds * 1_000_000))
+        put_varint(buffer, updates)
+        put_varint(buffer, len(changed))
+        for y, (text, attrs) in changed:
+            put_varint(buffer, y)
+            data = text.encode()
+            put_varint(buffer, len(data))
+            buffer += data
+            runs = []
+            for attr in attrs:
+                if runs and runs[-1][1] == attr:
+                    runs[-1][0] += 1
+                else:
+                    runs.append([1, attr])
+            put_varint(buffer, len(runs))
+            for length, attr in runs:
+                put_varint(buffer, length)
+                put_varint(buffer, attr)
+        self.rows = rows
+        if len(buffer) >= 1 << 16:
+            self.flush()
+
+    def flush(self):
+        self.file.write(self.buffer)
+        self.buffer.clear()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+class Session:
+    """A recorded session read back. events holds ("key", seconds, key code, count),
+    ("resize", seconds, height, width) and ("frame", seconds, draw seconds, updates, {row: (text, attributes)})
+    tuples, seconds counting from the start of the recording."""
+
+    def __init__(self, height: int, width: int, events: list):
+        self.height = height
+        self.width = width
+        self.events = events
+
+    @classmethod
+    def load(cls, path):
+        """:param path: File name or binary file of a recording."""
+        with (gzip.open(path, "rb") if isinstance(path, str) else gzip.GzipFile(fileobj=path, mode="rb")) as file:
+            data = file.read()
+        if not data.startswith(MAGIC):
+            raise ValueError("not a CursesUI session recording")
+        index = len(MAGIC)
+        version, index = get_varint(data, index)
+        if version != VERSION:
+            raise ValueError("unsupported session recording version %d" % version)
+        height, index = get_varint(data, index)
+        width, index = get_varint(data, index)
+        events = []
+        elapsed = 0
+        while index < len(data):
+            kind = data[index]
+            delta, index = get_varint(data, index + 1)
+            elapsed += delta
+            seconds = elapsed / 1_000_000
+            if kind == KEY:
+                keypress, index = get_varint(data, index)
+                count, index = get_varint(data, index)
+                events.append(("key", seconds, unzigzag(keypress), count))
+            elif kind == RESIZE:
+                new_height, index = get_varint(data, index)
+                new_width, index = get_varint(data, index)
+                events.append(("resize", seconds, new_height, new_width))
+            elif kind == FRAME:
+                draw_time, index = get_varint(data, index)
+                updates, index = get_varint(data, index)
+                count, index = get_varint(data, index)
+                rows = {}
+                for _ in range(count):
+                    y, index = get_varint(data, index)
+                    length, index = get_varint(data, index)
+                    text = data[index:index + length].decode()
+                    index += length
+                    run_count, index = get_varint(data, index)
+                    attrs = []
+                    for _ in range(run_count):
+                        run, index = get_varint(data, index)
+                        attr, index = get_varint(data, index)
+                        attrs.extend([attr] * run)
+                    rows[y] = (text, attrs)
+                events.append(("frame", seconds, draw_time / 1_000_000, updates, rows))
+            else:
+                raise ValueError("unknown record type %d at byte %d" % (kind, index))
+        return cls(height, width, events)
+
+    @property
+    def keys(self):
+        return sum(event[3] for event in self.events if event[0] == "key")
+
+    @property
+    def frames(self):
+        return sum(1 for event in self.events if event[0] == "frame")
+
+
+class ReplayResult:
+    """Timings of a replay and the frames that came out different from the recording.
+    stats has the histograms "frame" and "input" of the replay and "recorded frame" of the recording."""
+
+    def __init__(self, samples: int):
+        self.stats = CursesStats.Stats(samples)
+        self.frames = 0
+        self.mismatches = []  # (frame number, row, recorded text, replayed text), the first different row
+
+    @property
+    def matched(self):
+        return not self.mismatches
+
+    def summary(self):
+        histograms = self.stats.snapshot()["histograms"]
+        return {"frames": self.frames, "mismatches": len(self.mismatches),
+                "frame": histograms.get("frame"), "input": histograms.get("input"),
+                "recorded frame": histograms.get("recorded frame")}
+
+
+class ReplayUpdates(CursesUpdates.UpdateQueue):
+    """Holds updates posted from other threads back until a frame the recording applied updates in, so
+    background results show up in the same frame as they did while recording."""
+
+    def __init__(self):
+        super().__init__()
+        self.released = False
+
+    def drain(self):
+        if not self.released:
+            return 0
+        return super().drain()
+
+
+def search_workers(widget):
+    """Background searches of a widget and the widgets on it."""
+    worker = getattr(widget, "search_worker", None)
+    if worker is not None:
+        yield worker
+    for child in getattr(widget, "widgets", ()):
+        yield from search_workers(child)
+
+
+def replay(session, build, compare_attrs: bool = True, record=None, settle_timeout: float = 10.0):
+    """Replays a session as fast as possible on a HeadlessBackend of the recorded size, drawing a frame wherever
+    the recording has one and comparing it with the recorded screen. Updates posted from other threads, such as
+    background search results, are held back until a frame that applied updates while recording, and running
+    searches are finished first, so they show up in the same frames.
+    :param session: A Session or the recording to load.
+    :param build: Called with the new Display, sets up the same screens the session was recorded on.
+    :param compare_attrs: Also compare attributes, turn off for recordings made on a terminal with other colors.
+    :param record: File to record the replay to, such as a reference recording made headless.
+    :param settle_timeout: Seconds to wait for a background search before drawing the frame anyway.
+    :return: ReplayResult"""
+    if not isinstance(session, Session):
+        session = Session.load(session)
+    backend = CursesBackend.HeadlessBackend(session.height, session.width)
+    display = CursesDisplay.Display(backend.stdscr, backend=backend)
+    updates = display.updates = display.context.updates = ReplayUpdates()
+    build(display)
+    if record is not None:
+        display.start_recording(record)
+    result = ReplayResult(max(1024, session.frames))
+    stats = result.stats
+    screen = [None] * session.height  # rows of the recording so far
+    input_time = 0.0
+    try:
+        for event in session.events:
+            kind = event[0]
+            if kind == "key":
+                start = time.perf_counter()
+                display.handle_input(event[2], event[3])
+                input_time += time.perf_counter() - start
+            elif kind == "resize":
+                backend.resize_term(event[2], event[3])
+                display.handle_input(curses.KEY_RESIZE)
+                screen = [None] * event[2]
+            else:
+                updates.released = event[3] > 0
+                if updates.released:
+                    for worker in search_workers(display.layout):
+                        worker.wait_idle(settle_timeout)
+                start = time.perf_counter()
+                display.draw_scrn()
+                stats.observe("frame", time.perf_counter() - start)
+                stats.observe("input", input_time)
+                stats.observe("recorded frame", event[2])
+                input_time = 0.0
+                for y, row in event[4].items():
+                    if y < len(screen):
+                        screen[y] = row
+                for y, (recorded, replayed) in enumerate(zip(screen, backend.screen_rows())):
+                    if recorded is not None and (recorded[0] != replayed[0]
+                                                 or compare_attrs and recorded[1] != replayed[1]):
+                        result.mismatches.append((result.frames, y, recorded[0], replayed[0]))
+                        break
+                result.frames += 1
+    finally:
+        display.stop_recording()
+        for shown in display.screens:
+            shown.layout.dispose()  # stops background searches
+    return result
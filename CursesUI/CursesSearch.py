@@ -0,0 +1,157 @@
+import threading
+
+
+class SearchCancelled(Exception):
+    """Raised while building an index whose search was stopped."""
+
+
+class FilteredRows:
+    """A read only view of the rows of a sequence at the given indices."""
+
+    def __init__(self, values, indices):
+        self.values = values
+        self.indices = indices
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, index: int):
+        return self.values[self.indices[index]]
+
+    def __iter__(self):
+        for index in self.indices:
+            yield self.values[index]
+
+
+class TrigramIndex:
+    """Inverted index from every three character substring to the rows containing it, case insensitive.
+    A search only checks the rows holding all of the query's trigrams instead of scanning every row."""
+
+    def __init__(self, values, cancelled=None):
+        """:param cancelled: Called every few thousand rows, building stops with SearchCancelled once it is True."""
+        self.texts = [str(value).lower() for value in values]
+        self.postings = {}
+        for index, text in enumerate(self.texts):
+            if cancelled is not None and not index & 0xfff and cancelled():
+                raise SearchCancelled()
+            for gram in {text[start:start + 3] for start in range(len(text) - 2)}:
+                posting = self.postings.get(gram)
+                if posting is None:
+                    self.postings[gram] = [index]
+                else:
+                    posting.append(index)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def candidates(self, query: str):
+        """Rows that may contain query, or None if it is too short to use the index.
+        :param query: Lower cased query"""
+        grams = {query[start:start + 3] for start in range(len(query) - 2)}
+        if not grams:
+            return None
+        postings = sorted((self.postings.get(gram, ()) for gram in grams), key=len)
+        if len(postings) == 1:
+            return postings[0]
+        rows = set(postings[0])
+        for posting in postings[1:]:
+            if not rows:
+                break
+            rows.intersection_update(posting)
+        return sorted(rows)
+
+    def search(self, query: str, within=None):
+        """Indices of the rows containing query.
+        :param within: Indices to check instead of the whole index, such as the results of a shorter query."""
+        query = query.lower()
+        if within is None:
+            within = self.candidates(query)
+            if within is None:
+                within = range(len(self.texts))
+        texts = self.texts
+        return [index for index in within if query in texts[index]]
+
+
+class IncrementalSearch:
+    """Searches a list as the query is typed. Results are kept for each query on the way, so a longer query
+    only checks the rows that matched the shorter one and deleting a character reuses the earlier results."""
+
+    def __init__(self, values):
+        self.values = values
+        self.index = None
+        self.cancelled = None  # see TrigramIndex
+        self.history = []  # [(query, indices)], each query contains the one before it
+
+    def update(self, query: str):
+        """:return: Indices of the rows containing query, or None for an empty query"""
+        if not query:
+            return None
+        if self.index is None:
+            # built on first use, on the worker thread if there is one
+            self.index = TrigramIndex(self.values, self.cancelled)
+        query = query.lower()
+        while self.history and self.history[-1][0] not in query:
+            self.history.pop()
+        if self.history and self.history[-1][0] == query:
+            return self.history[-1][1]
+        matches = self.index.search(query, self.history[-1][1] if self.history else None)
+        self.history.append((query, matches))
+        return matches
+
+
+class SearchWorker:
+    """Runs an IncrementalSearch on a daemon thread so large lists do not block input.
+    Only the newest query is searched when several are submitted while a search is running."""
+
+    def __init__(self, search: IncrementalSearch, done):
+        """:param done: Called on the worker thread with (query, indices) for each finished search."""
+        self.search = search
+        self.done = done
+        self.condition = threading.Condition()
+        self.query = None
+        self.running = False
+        self.thread = None
+        self.stopped = False
+        search.cancelled = lambda: self.stopped
+
+    def submit(self, query: str):
+        with self.condition:
+            self.query = query
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="CursesUI search", daemon=True)
+                self.thread.start()
+            self.condition.notify_all()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.query is None and not self.stopped:
+                    self.condition.wait()
+                if self.stopped:
+                    return
+                query, self.query = self.query, None
+                self.running = True
+            try:
+                matches = self.search.update(query)
+            except SearchCancelled:
+                return
+            with self.condition:
+                latest = self.query is None and not self.stopped  # else a newer query replaces these results
+            if latest:
+                self.done(query, matches)
+            with self.condition:
+                self.running = False
+                self.condition.notify_all()
+
+    def wait_idle(self, timeout: float = None):
+        """Waits until no search is queued or running, the results have then been passed to done.
+        :return: False if the timeout ran out first"""
+        with self.condition:
+            return self.condition.wait_for(lambda: self.stopped or self.query is None and not self.running,
+                                           timeout)
+
+    def stop(self):
+        """Ends the thread once the running search is done, its results are dropped."""
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
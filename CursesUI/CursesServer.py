@@ -0,0 +1,274 @@
+import asyncio
+import codecs
+import curses
+import os
+import re
+import selectors
+import signal
+import socket
+import sys
+
+from CursesUI import CursesAsync, CursesBackend, CursesKeys
+
+CSI_KEYS = {"A": curses.KEY_UP, "B": curses.KEY_DOWN, "C": curses.KEY_RIGHT, "D": curses.KEY_LEFT,
+            "H": curses.KEY_HOME, "F": curses.KEY_END, "Z": curses.KEY_BTAB}
+SHIFTED_KEYS = {"A": curses.KEY_SR, "B": curses.KEY_SF, "C": curses.KEY_SRIGHT, "D": curses.KEY_SLEFT}
+SHIFTED_TILDE_KEYS = {5: curses.KEY_SPREVIOUS, 6: curses.KEY_SNEXT}
+SS3_KEYS = dict(CSI_KEYS, P=curses.KEY_F1, Q=curses.KEY_F2, R=curses.KEY_F3, S=curses.KEY_F4)
+TILDE_KEYS = {1: curses.KEY_HOME, 2: curses.KEY_IC, 3: curses.KEY_DC, 4: curses.KEY_END,
+              5: curses.KEY_PPAGE, 6: curses.KEY_NPAGE, 7: curses.KEY_HOME, 8: curses.KEY_END,
+              15: curses.KEY_F5, 17: curses.KEY_F6, 18: curses.KEY_F7, 19: curses.KEY_F8,
+              20: curses.KEY_F9, 21: curses.KEY_F10, 23: curses.KEY_F11, 24: curses.KEY_F12}
+CSI = re.compile(r"([0-9;?]*)([\x40-\x7e])")
+CSI_PARAMS = re.compile(r"[0-9;?]*")
+
+
+def size_report(height: int, width: int):
+    """The xterm window size report a client sends to tell the server its size."""
+    return b"\x1b[8;%d;%dt" % (height, width)
+
+
+class KeyDecoder:
+    """Turns the bytes a terminal sends into curses key codes, the way curses does with keypad on.
+    Escape sequences split between reads are kept until the rest arrives."""
+
+    def __init__(self):
+        self.decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        self.pending = ""
+
+    def feed(self, data: bytes):
+        """:return: Key codes, and a ("resize", height, width) tuple for each size report"""
+        text = self.pending + self.decoder.decode(data)
+        self.pending = ""
+        events = []
+        index = 0
+        while index < len(text):
+            char = text[index]
+            if char != "\x1b":
+                events.append(CursesKeys.ENTER if char == "\r" else ord(char))
+                index += 1
+                continue
+            kind = text[index + 1:index + 2]
+            if kind == "[":
+                match = CSI.match(text, index + 2)
+                if match is None:
+                    if CSI_PARAMS.fullmatch(text, index + 2):
+                        self.pending = text[index:]  # the rest is still on its way
+                        break
+                    events.append(CursesKeys.ESCAPE)
+                    index += 1
+                    continue
+                event = self.csi(match.group(1), match.group(2))
+                if event is not None:
+                    events.append(event)
+                index = match.end()
+            elif kind == "O" and index + 2 < len(text):
+                key = SS3_KEYS.get(text[index + 2])
+                if key is not None:
+                    events.append(key)
+                index += 3
+            elif kind == "O":
+                self.pending = text[index:]
+                break
+            else:
+                events.append(CursesKeys.ESCAPE)  # a lone escape, or alt with the next key
+                index += 1
+        return events
+
+    @staticmethod
+    def csi(params: str, final: str):
+        numbers = [int(number) if number.isdigit() else 0 for number in params.split(";")] if params else []
+        if final == "t" and len(numbers) == 3 and numbers[0] == 8:
+            return "resize", numbers[1], numbers[2]
+        if final == "~":
+            if len(numbers) >= 2 and numbers[1] == 2 and numbers[0] in SHIFTED_TILDE_KEYS:
+                return SHIFTED_TILDE_KEYS[numbers[0]]
+            return TILDE_KEYS.get(numbers[0]) if numbers else None
+        if len(numbers) >= 2 and numbers[1] == 2 and final in SHIFTED_KEYS:
+            return SHIFTED_KEYS[final]
+        return CSI_KEYS.get(final)
+
+
+class SessionDisplay(CursesAsync.AsyncDisplay):
+    """The display of one client session. Keys come from the session instead of a file descriptor and frames
+    are skipped while the client has not read the previous ones, the next frame then sends all the changes."""
+
+    def __init__(self, session, **kwargs):
+        super().__init__(session.backend.stdscr, input_fd=-1, backend=session.backend, **kwargs)
+        self.session = session
+
+    def watch_input(self):
+        pass
+
+    def unwatch_input(self):
+        pass
+
+    def draw_frame(self):
+        if self.session.writer.transport.get_write_buffer_size() > self.session.server.max_buffer:
+            self.frame_handle = self.loop.call_later(self.frame_interval, self.draw_frame)
+            return
+        super().draw_frame()
+
+
+class Session:
+    """One connected terminal, with its own display, focus and scroll state.
+    The terminal is a HeadlessBackend the size of the client, so a session costs about one screen of cells
+    on top of its widgets."""
+
+    def __init__(self, server, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                 height: int, width: int):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.decoder = KeyDecoder()
+        self.backend = CursesBackend.HeadlessBackend(height, width, output=writer.write)
+        self.display = SessionDisplay(self, **server.display_options)
+
+    def feed(self, events):
+        """Queues decoded keys and size reports, then handles them as one batch."""
+        for event in events:
+            if isinstance(event, tuple):
+                self.backend.resize_term(event[1], event[2])
+            else:
+                self.backend.push_keys(event)
+        if self.display.loop is not None:
+            self.display.read_input()
+
+    async def read(self):
+        while True:
+            data = await self.reader.read(4096)
+            if not data:
+                break
+            self.feed(self.decoder.feed(data))
+        self.close()
+
+    async def run(self, layout):
+        self.display.layout = layout
+        reading = asyncio.ensure_future(self.read())
+        try:
+            await self.display.run(exit_on_enter=False)
+        finally:
+            reading.cancel()
+
+    def close(self):
+        """Ends the session, the client exits once the connection is closed."""
+        self.display.stop()
+
+
+class DisplayServer:
+    """Serves one app to many terminals over a unix socket. Every client gets a Session with its own display,
+    made from the layout build returns, while the data the widgets show is created once and shared.
+    Clients connect with client() or python -m CursesUI.CursesServer PATH.
+
+    Example:
+        model = CursesTable.TableModel(rows)
+        server = DisplayServer(lambda session: make_layout(model), "/tmp/dashboard.sock")
+        asyncio.run(server.serve())"""
+
+    def __init__(self, build, path: str, height: int = 24, width: int = 80, max_buffer: int = 1 << 18,
+                 size_timeout: float = 0.5, **display_options):
+        """:param build: Called with each new Session, returns the Layout to show in it.
+        Widgets can not be shared between sessions, data sources like lists and TableModels can.
+        :param height: Size used for clients that do not report theirs.
+        :param max_buffer: Bytes waiting to be sent to a client before its frames are skipped.
+        :param size_timeout: Seconds to wait for a new client's size report.
+        :param display_options: Passed on to each SessionDisplay, such as frame_interval or stats."""
+        self.build = build
+        self.path = path
+        self.height = height
+        self.width = width
+        self.max_buffer = max_buffer
+        self.size_timeout = size_timeout
+        self.display_options = display_options
+        self.sessions = set()
+
+    async def serve(self):
+        """Accepts clients until cancelled."""
+        server = await asyncio.start_unix_server(self.connect, self.path)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+    async def connect(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        decoder = KeyDecoder()
+        events = []
+        try:
+            events = decoder.feed(await asyncio.wait_for(reader.read(4096), self.size_timeout))
+        except asyncio.TimeoutError:
+            pass
+        height, width = self.height, self.width
+        if events and isinstance(events[0], tuple):
+            height, width = events.pop(0)[1:]
+        session = Session(self, reader, writer, height, width)
+        session.decoder = decoder
+        self.sessions.add(session)
+        try:
+            layout = self.build(session)
+            keys = [event for event in events if not isinstance(event, tuple)]
+            if keys:
+                asyncio.get_running_loop().call_soon(session.feed, keys)  # once the display is running
+            await session.run(layout)
+        finally:
+            self.sessions.discard(session)
+            session.display.dispose()  # background searches would keep the session alive
+            writer.close()
+
+    def refresh(self):
+        """Redraws every session, call after changing shared data the widgets do not watch, such as plain lists.
+        Changes to a CursesModels observable or a TableModel already redraw the sessions showing them."""
+        for session in self.sessions:
+            session.display.layout.mark_dirty()
+            session.display.request_frame()
+
+
+def client(path: str):
+    """Shows a DisplayServer's app on this terminal until the server ends the session."""
+    import termios
+    import tty
+    fd = sys.stdin.fileno()
+    out = sys.stdout.buffer
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(path)
+    saved = termios.tcgetattr(fd)
+
+    def send_size(*args):
+        size = os.get_terminal_size(fd)
+        sock.sendall(size_report(size.lines, size.columns))
+
+    try:
+        tty.setraw(fd)
+        out.write(b"\x1b[?1049h")
+        out.flush()
+        send_size()
+        signal.signal(signal.SIGWINCH, send_size)
+        with selectors.DefaultSelector() as selector:
+            selector.register(fd, selectors.EVENT_READ)
+            selector.register(sock, selectors.EVENT_READ)
+            while True:
+                for key, events in selector.select():
+                    if key.fileobj is sock:
+                        data = sock.recv(1 << 16)
+                        if not data:
+                            return
+                        out.write(data)
+                        out.flush()
+                    else:
+                        data = os.read(fd, 1024)
+                        if not data:
+                            return
+                        sock.sendall(data)
+    finally:
+        signal.signal(signal.SIGWINCH, signal.SIG_DFL)
+        termios.tcsetattr(fd, termios.TCSADRAIN, saved)
+        out.write(b"\x1b[0m\x1b[?1049l")
+        out.flush()
+        sock.close()
+
+
+if __name__ == "__main__":
+    client(sys.argv[1])
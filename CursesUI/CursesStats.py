@@ -0,0 +1,84 @@
+import collections
+import weakref
+
+
+class Histogram:
+    """Running count, total, min and max of a measurement, plus the most recent samples for percentiles."""
+
+    def __init__(self, samples: int = 1024):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.recent = collections.deque(maxlen=samples)
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        self.recent.append(value)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, fraction: float):
+        """Percentile of the recent samples, fraction is between 0 and 1."""
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def snapshot(self):
+        return {"count": self.count, "mean": self.mean, "min": self.min, "max": self.max,
+                "p50": self.percentile(0.5), "p99": self.percentile(0.99)}
+
+
+class Stats:
+    """Counters and histograms filled in by the display, layouts and widgets while drawing and handling input.
+    Times are in seconds. Collection is off unless a display is made with stats=True, the hot paths only check
+    that their stats is not None."""
+
+    def __init__(self, samples: int = 1024):
+        """:param samples: Recent samples kept per histogram for percentiles."""
+        self.samples = samples
+        self.counters = collections.Counter()
+        self.histograms = {}
+        self.widgets = weakref.WeakKeyDictionary()  # widget -> Histogram of its draw times
+
+    def count(self, name: str, amount: int = 1):
+        self.counters[name] += amount
+
+    def histogram(self, name: str):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram(self.samples)
+        return histogram
+
+    def observe(self, name: str, value: float):
+        self.histogram(name).add(value)
+
+    def observe_widget(self, widget, seconds: float):
+        histogram = self.widgets.get(widget)
+        if histogram is None:
+            histogram = self.widgets[widget] = Histogram(self.samples)
+        histogram.add(seconds)
+
+    def slowest_widgets(self, count: int = 5):
+        """The widgets with the highest mean draw time, as (widget, Histogram) pairs."""
+        return sorted(self.widgets.items(), key=lambda item: item[1].mean, reverse=True)[:count]
+
+    def reset(self):
+        self.counters.clear()
+        self.histograms.clear()
+        self.widgets.clear()
+
+    def snapshot(self):
+        """All counters and histogram summaries as plain dicts, for logging or JSON."""
+        return {"counters": dict(self.counters),
+                "histograms": {name: histogram.snapshot() for name, histogram in self.histograms.items()},
+                "widgets": [dict(histogram.snapshot(), widget=type(widget).__name__)
+                            for widget, histogram in self.slowest_widgets(len(self.widgets))]}
@@ -0,0 +1,155 @@
+import collections
+import itertools
+
+from CursesUI import CursesModels
+
+
+def format_cell(value, width: int):
+    """Pads or cuts the value to exactly width characters."""
+    text = str(value)
+    if len(text) >= width:
+        return text[:width]
+    return text + " " * (width - len(text))
+
+
+class TableModel(CursesModels.Observable):
+    """Column oriented table data, each column is kept as its own list.
+    Sort orders are computed once per column and cached until the data changes,
+    and a model can be shared by several widgets, which also share the rows formatted for the same widths.
+    Watchers are called like those of an ObservableList, with rows in the model's order."""
+
+    def __init__(self, rows=(), columns: list = None):
+        """:param rows: Sequence of rows, each with a value per column. Short rows are filled in with "".
+        :param columns: List of column lists to use as they are, instead of rows."""
+        super().__init__()
+        if columns is None:
+            columns = [list(column) for column in itertools.zip_longest(*rows, fillvalue="")]
+        self.columns = columns
+        self.sort_cache = {}
+        self.format_caches = collections.OrderedDict()  # column widths: {row: formatted line}
+
+    def __len__(self):
+        return len(self.columns[0]) if self.columns else 0
+
+    @property
+    def column_count(self):
+        return len(self.columns)
+
+    def row(self, index: int):
+        return tuple(column[index] for column in self.columns)
+
+    def cell(self, row: int, column: int):
+        return self.columns[column][row]
+
+    def changed(self):
+        """Call after changing the column lists directly."""
+        self.sort_cache.clear()
+        self.format_caches.clear()
+        self.notify("reset", 0, len(self))
+
+    def format_cache(self, widths: tuple, limit: int = 8):
+        """The cache of rows formatted for widths, shared by every FormattedRows of the model using them.
+        Only the most recently used limit sets of widths are kept."""
+        cache = self.format_caches.get(widths)
+        if cache is None:
+            cache = self.format_caches[widths] = collections.OrderedDict()
+            if len(self.format_caches) > limit:
+                self.format_caches.popitem(last=False)
+        else:
+            self.format_caches.move_to_end(widths)
+        return cache
+
+    def append(self, row):
+        """Adds a row at the end. A short row is filled in with "" and a longer one adds columns, which are ""
+        for the rows before it."""
+        length = len(self)
+        row = list(row)
+        for _ in range(len(self.columns), len(row)):
+            self.columns.append([""] * length)
+        for column, value in itertools.zip_longest(self.columns, row, fillvalue=""):
+            column.append(value)
+        self.sort_cache.clear()  # the rows formatted so far are unchanged
+        self.notify("insert", len(self) - 1, 1)
+
+    def set_cell(self, row: int, column: int, value):
+        """Changes one value, only the row's formatted lines and the orders of the column are dropped."""
+        self.columns[column][row] = value
+        for key in [key for key in self.sort_cache if key[0] == column]:
+            del self.sort_cache[key]
+        for cache in self.format_caches.values():
+            cache.pop(row, None)
+        self.notify("update", row, 1)
+
+    def sort_order(self, column: int, reverse: bool = False):
+        """Row indices in the order of a column's values. Mixed types that can not be compared sort as strings."""
+        key = (column, reverse)
+        order = self.sort_cache.get(key)
+        if order is None:
+            if reverse:
+                order = self.sort_order(column)[::-1]
+            else:
+                values = self.columns[column]
+                try:
+                    order = sorted(range(len(values)), key=values.__getitem__)
+                except TypeError:
+                    order = sorted(range(len(values)), key=lambda index: str(values[index]))
+            self.sort_cache[key] = order
+        return order
+
+
+class FormattedRows:
+    """The rows of a TableModel as display strings, in sorted order if a sort column is set.
+    Rows are only formatted when read, and the most recently read ones are cached in the model's cache
+    for the widths, so widgets showing the same model at the same widths format each row once."""
+
+    def __init__(self, model: TableModel, cache_size: int = 4096):
+        self.model = model
+        self.cache_size = cache_size
+        self.cache = collections.OrderedDict()
+        self.widths = ()
+        self.sort = None  # (column, reverse)
+        self.order = None
+        self.version = None
+
+    def set_widths(self, widths):
+        widths = tuple(widths)
+        if widths != self.widths:
+            self.widths = widths
+            self.cache = self.model.format_cache(widths)
+
+    def sort_by(self, column: int = None, reverse: bool = False):
+        """Orders the rows by a column, None keeps the model's order."""
+        self.sort = None if column is None else (column, reverse)
+        self.version = None
+
+    def check(self):
+        if self.version != self.model.version:
+            self.version = self.model.version
+            self.cache = self.model.format_cache(self.widths)
+            self.order = self.model.sort_order(*self.sort) if self.sort is not None else None
+
+    def format_row(self, row: int):
+        return " ".join(format_cell(column[row], width) for column, width in zip(self.model.columns, self.widths))
+
+    def __len__(self):
+        return len(self.model)
+
+    def __getitem__(self, index: int):
+        self.check()
+        if index < 0:
+            index += len(self.model)
+        row = self.order[index] if self.order is not None else index
+        line = self.cache.get(row)
+        if line is None:
+            line = self.cache[row] = self.format_row(row)
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        else:
+            self.cache.move_to_end(row)
+        return line
+
+    def __iter__(self):
+        self.check()
+        order = self.order if self.order is not None else range(len(self.model))
+        for row in order:
+            yield self.format_row(row)  # not cached, a full pass would only evict the rows on screen
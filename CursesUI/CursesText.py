@@ -0,0 +1,190 @@
+import collections
+import itertools
+
+
+class GapBuffer:
+    """A list with a gap kept at the last edit, so inserting and deleting near the previous edit
+    only moves the items in between instead of everything after them."""
+
+    def __init__(self, items=(), gap_size: int = 64):
+        self.items = list(items)
+        self.gap_size = gap_size
+        self.gap_start = len(self.items)
+        self.items.extend([None] * gap_size)
+        self.gap_end = len(self.items)
+
+    def __len__(self):
+        return len(self.items) - (self.gap_end - self.gap_start)
+
+    def position(self, index: int):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("GapBuffer index out of range")
+        return index if index < self.gap_start else index + self.gap_end - self.gap_start
+
+    def __getitem__(self, index: int):
+        return self.items[self.position(index)]
+
+    def __setitem__(self, index: int, item):
+        self.items[self.position(index)] = item
+
+    def __iter__(self):
+        return itertools.chain(itertools.islice(self.items, self.gap_start),
+                               itertools.islice(self.items, self.gap_end, None))
+
+    def move_gap(self, index: int):
+        items = self.items
+        if index < self.gap_start:
+            count = self.gap_start - index
+            items[self.gap_end - count:self.gap_end] = items[index:self.gap_start]
+            self.gap_start -= count
+            self.gap_end -= count
+        elif index > self.gap_start:
+            count = index - self.gap_start
+            items[self.gap_start:index] = items[self.gap_end:self.gap_end + count]
+            self.gap_start += count
+            self.gap_end += count
+
+    def insert(self, index: int, item):
+        if not 0 <= index <= len(self):
+            raise IndexError("GapBuffer index out of range")
+        self.move_gap(index)
+        if self.gap_start == self.gap_end:
+            grow = max(self.gap_size, len(self) // 4)
+            self.items[self.gap_start:self.gap_start] = [None] * grow
+            self.gap_end += grow
+        self.items[self.gap_start] = item
+        self.gap_start += 1
+
+    def delete(self, index: int, count: int = 1):
+        if count <= 0:
+            return
+        if not 0 <= index <= len(self) - count:
+            raise IndexError("GapBuffer index out of range")
+        self.move_gap(index)
+        self.items[self.gap_end:self.gap_end + count] = [None] * count
+        self.gap_end += count
+
+
+def end_of(row: int, col: int, text: str):
+    """Position after text inserted at (row, col)."""
+    newlines = text.count("\n")
+    if not newlines:
+        return row, col + len(text)
+    return row + newlines, len(text) - text.rindex("\n") - 1
+
+
+class Document:
+    """Editable text kept as a gap buffer of lines, with undo and redo.
+    The full text is joined once after a change and kept, so reading it again is O(1)."""
+
+    def __init__(self, text: str = "", undo_limit: int = 1000):
+        self.lines = GapBuffer(text.split("\n"))
+        self.undo_stack = collections.deque(maxlen=undo_limit)  # [kind, row, col, text] per edit
+        self.redo_stack = []
+        self._text = text
+        self.version = 0
+
+    def __len__(self):
+        return len(self.lines)
+
+    def line(self, row: int):
+        return self.lines[row]
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = "\n".join(self.lines)
+        return self._text
+
+    def changed(self):
+        self._text = None
+        self.version += 1
+
+    def insert(self, row: int, col: int, text: str):
+        """Inserts text, which may hold newlines, at (row, col).
+        Typing one line at a time is merged into one undo step per word.
+        :return: The position after the inserted text"""
+        last = self.undo_stack[-1] if self.undo_stack and not self.redo_stack else None
+        if (last is not None and last[0] == "insert" and "\n" not in text and "\n" not in last[3]
+                and end_of(*last[1:]) == (row, col) and not last[3].endswith(" ")):
+            last[3] += text
+        else:
+            self.undo_stack.append(["insert", row, col, text])
+        self.redo_stack.clear()
+        return self._insert(row, col, text)
+
+    def delete(self, row: int, col: int, end_row: int, end_col: int):
+        """Deletes the text from (row, col) up to (end_row, end_col).
+        Runs of backspace or delete on the same spot are merged into one undo step.
+        :return: The deleted text"""
+        removed = self._delete(row, col, end_row, end_col)
+        last = self.undo_stack[-1] if self.undo_stack and not self.redo_stack else None
+        if last is not None and last[0] == "delete" and (end_row, end_col) == (last[1], last[2]):
+            last[1:] = [row, col, removed + last[3]]  # backspace
+        elif last is not None and last[0] == "delete" and (row, col) == (last[1], last[2]):
+            last[3] += removed  # delete
+        else:
+            self.undo_stack.append(["delete", row, col, removed])
+        self.redo_stack.clear()
+        return removed
+
+    def undo(self):
+        """Reverts the last edit.
+        :return: The position the edit was made at, or None if there was nothing to undo"""
+        if not self.undo_stack:
+            return None
+        entry = self.undo_stack.pop()
+        kind, row, col, text = entry
+        if kind == "insert":
+            self._delete(row, col, *end_of(row, col, text))
+            position = row, col
+        else:
+            position = self._insert(row, col, text)
+        self.redo_stack.append(entry)
+        return position
+
+    def redo(self):
+        """Applies the last undone edit again.
+        :return: The position after the edit, or None if there was nothing to redo"""
+        if not self.redo_stack:
+            return None
+        entry = self.redo_stack.pop()
+        kind, row, col, text = entry
+        if kind == "insert":
+            position = self._insert(row, col, text)
+        else:
+            self._delete(row, col, *end_of(row, col, text))
+            position = row, col
+        self.undo_stack.append(entry)
+        return position
+
+    def _insert(self, row: int, col: int, text: str):
+        line = self.lines[row]
+        parts = text.split("\n")
+        self.changed()
+        if len(parts) == 1:
+            self.lines[row] = line[:col] + text + line[col:]
+            return row, col + len(text)
+        tail = line[col:]
+        self.lines[row] = line[:col] + parts[0]
+        for offset, part in enumerate(parts[1:], 1):
+            self.lines.insert(row + offset, part)
+        last = row + len(parts) - 1
+        self.lines[last] = parts[-1] + tail
+        return last, len(parts[-1])
+
+    def _delete(self, row: int, col: int, end_row: int, end_col: int):
+        self.changed()
+        if row == end_row:
+            line = self.lines[row]
+            self.lines[row] = line[:col] + line[end_col:]
+            return line[col:end_col]
+        first = self.lines[row]
+        last = self.lines[end_row]
+        removed = "\n".join([first[col:]] + [self.lines[index] for index in range(row + 1, end_row)]
+                            + [last[:end_col]])
+        self.lines[row] = first[:col] + last[end_col:]
+        self.lines.delete(row + 1, end_row - row)
+        return removed
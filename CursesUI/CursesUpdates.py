@@ -0,0 +1,48 @@
+import threading
+
+
+class UpdateQueue:
+    """A thread safe mailbox for widget updates.
+    Worker threads post updates and the UI thread applies them once per frame.
+    Posts with the same key replace each other, so only the newest one is applied."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.wakeup = None  # called from the posting thread when the mailbox stops being empty
+
+    def post(self, widget, func, *args, key=None):
+        """Queues func(*args) to be called on the UI thread, after which the widget is marked dirty.
+        Safe to call from any thread.
+        :param widget: The widget the update changes, may be None.
+        :param func: The callable that applies the update.
+        :param key: Updates sharing a key are merged, defaults to the widget and func. Bound methods of different
+        objects are different funcs. Pass a unique key such as object() for updates that must all be applied."""
+        if key is None:
+            key = (widget, func)
+        with self.lock:
+            was_empty = not self.pending
+            self.pending[key] = (widget, func, args)
+        if was_empty and self.wakeup is not None:
+            self.wakeup()
+
+    def drain(self):
+        """Applies every pending update. Should only be called from the UI thread.
+        :return: Number of updates applied"""
+        with self.lock:
+            if not self.pending:
+                return 0
+            pending, self.pending = self.pending, {}
+        for widget, func, args in pending.values():
+            func(*args)
+            if widget is not None:
+                widget.mark_dirty()
+        return len(pending)
+
+    def wake(self):
+        """Asks for a frame without queueing an update, for widgets changed on the UI thread outside of input."""
+        if self.wakeup is not None:
+            self.wakeup()
+
+    def __len__(self):
+        return len(self.pending)
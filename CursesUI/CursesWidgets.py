@@ -1,53 +1,241 @@
 import abc
+import collections
 import curses
-import curses.textpad
-from CursesUI import CursesLogger
+import itertools
+import queue
+import threading
+import time
+import weakref
+from CursesUI import (CursesBackend, CursesKeys, CursesLogger, CursesModels, CursesPalette, CursesSearch,
+                      CursesTable, CursesText)
+
+class WidgetContext:
+    """The logger, backend, update queue and stats of a display, one object shared by every widget shown on it."""
+
+    __slots__ = ("logger", "backend", "updates", "stats")
+
+    def __init__(self, logger=CursesLogger.Logger(0), backend=CursesBackend.terminal, updates=None, stats=None):
+        """:param updates: UpdateQueue of the display, for results from other threads.
+        :param stats: CursesStats.Stats of the display when it collects them."""
+        self.logger = logger
+        self.backend = backend
+        self.updates = updates
+        self.stats = stats
+
+    def replace(self, **changes):
+        """A copy with the given fields changed, the context itself is shared and left as it is."""
+        context = WidgetContext(self.logger, self.backend, self.updates, self.stats)
+        for name, value in changes.items():
+            setattr(context, name, value)
+        return context
+
+
+DEFAULT_CONTEXT = WidgetContext()  # logging disabled, until the widget is shown on a display
 
 
 class DisplayWidget(abc.ABC):
-    """Abstract base class for displaying widgets."""
+    """Abstract base class for displaying widgets.
+    Widgets keep their attributes in __slots__, a subclass lists the attributes it adds in its own __slots__.
+    A widget is mounted when its layout gives it a window, unmounted when the windows are taken away again
+    and disposed of when it is removed for good. Setting logger, backend, updates or stats gives the widget,
+    and the widgets of a layout, a context of their own with that field changed."""
 
+    __slots__ = ("win", "context", "dirty", "_accept_input", "_keymap", "__weakref__")
     win: curses.window
-    logger: CursesLogger.Logger
 
-    _accept_input = False
+    bindings = {}  # {keys: action name}, merged with the base classes' bindings into each instance's keymap
+    repeatable_actions = frozenset()  # actions taking a count, repeated keys bound to them are handled at once
+    min_size = (1, 1)  # (height, width) the widget can draw in, a layout gives it no window while smaller
+
+    def __init__(self):
+        self.win = None
+        self.context = DEFAULT_CONTEXT
+        self.dirty = True
+        self._accept_input = False
+        self._keymap = None
+
+    @property
+    def logger(self) -> CursesLogger.Logger:
+        return self.context.logger
+
+    @logger.setter
+    def logger(self, logger: CursesLogger.Logger):
+        self.set_context(self.context.replace(logger=logger))
+
+    @property
+    def backend(self):
+        return self.context.backend
+
+    @backend.setter
+    def backend(self, backend):
+        self.set_context(self.context.replace(backend=backend))
+
+    @property
+    def updates(self):
+        return self.context.updates
+
+    @updates.setter
+    def updates(self, updates):
+        self.set_context(self.context.replace(updates=updates))
+
+    @property
+    def stats(self):
+        return self.context.stats
+
+    @stats.setter
+    def stats(self, stats):
+        self.set_context(self.context.replace(stats=stats))
 
     @property
     def accept_input(self):
         """Property to control if the widget handles input"""
         return self._accept_input
 
+    @property
+    def palette(self) -> CursesPalette.Palette:
+        """Color pairs and named styles shared by everything drawing through the widget's backend."""
+        return CursesPalette.for_backend(self.backend)
+
+    @property
+    def keymap(self) -> CursesKeys.KeyMap:
+        """Key bindings of this widget, built from the class bindings on first use. Rebind keys with keymap.bind."""
+        if self._keymap is None:
+            self._keymap = CursesKeys.KeyMap.for_class(type(self))
+        return self._keymap
+
+    def dispatch(self, keypress: int, count: int = 1):
+        """Looks the key up in the keymap and calls the action_<name> method bound to it.
+        :param count: Number of times the key was pressed, passed to repeatable actions.
+        :return: (handled, result of the action)"""
+        action = self.keymap.lookup(keypress)
+        if action is None:
+            return False, None
+        if action is CursesKeys.PENDING:
+            return True, None
+        method = getattr(self, "action_" + action)
+        if count == 1:
+            return True, method()
+        if action in self.repeatable_actions:
+            return True, method(count)
+        result = None
+        for _ in range(count):
+            result = method()
+        return True, result
+
+    def is_repeatable(self, keypress: int):
+        """True if the key is bound to an action that can take a count."""
+        keymap = self.keymap
+        action = keymap.modes[keymap.mode].get(keypress)  # a dict for the first key of a chord
+        return keymap.chord is None and isinstance(action, str) and action in self.repeatable_actions
+
+    def captures(self, keypress: int):
+        """True if the key goes to a binding of a mode the widget switched to, or continues a chord, like enter
+        ending a search. The display does not stop at such a key."""
+        keymap = self.keymap
+        if keymap.chord is not None:
+            return keypress in keymap.chord
+        return keymap.mode is not None and keypress in keymap.modes[keymap.mode]
+
+    def mark_dirty(self):
+        """Flags the widget to be redrawn on the next frame."""
+        self.dirty = True
+
+    def screen_restored(self):
+        """Called when the screen the widget is on is shown again from a copy of its cells. Only widgets drawing
+        outside their window need to draw again."""
+        pass
+
+    def request_frame(self):
+        """Asks the display to draw a frame soon, for widgets changed by a model rather than by input."""
+        if self.updates is not None:
+            self.updates.wake()
+
+    def set_context(self, context: WidgetContext):
+        """Gives the widget the logger, backend, update queue and stats of the display it is shown on."""
+        self.context = context
+
     def add_win(self, win: curses.window):
         """Adds a new window. Should only be used by the owning widget.
         :param win: The window to add.
         :type win: curses.window
         """
-        self.logger.log("Widget Gaining Window", str(win))
+        self.logger.log("Widget Gaining Window", ("%s", win))
         self.win = win
+        self.mark_dirty()
+
+    @property
+    def mounted(self):
+        return self.win is not None
+
+    def mount(self, win: curses.window):
+        """Gives the widget a window to draw in, derived from its layout's window."""
+        self.add_win(win)
+
+    def unmount(self):
+        """Drops the widget's windows and pads so curses can free them, it is drawn again once it is mounted.
+        Windows derived from another are dropped first, curses can not delete a window that still has them."""
+        self.win = None
+        self.mark_dirty()
+
+    def dispose(self):
+        """Unmounts the widget and stops any work it does in the background, for widgets removed for good.
+        A disposed widget can still be mounted again, it rebuilds what it needs."""
+        self.unmount()
+        self._keymap = None
 
     def draw(self):
-        """Draws the widget and any widgets the widget owns."""
-        self.logger.log("Widget Drawing", str(self))
-        self.draw_self()
+        """Draws the widget and any widgets the widget owns if it is dirty.
+        The window is only staged with noutrefresh, the owning display flushes the frame with curses.doupdate.
+        :return: True if anything was drawn"""
+        if not self.dirty:
+            return False
+        stats = self.stats
+        if stats is None:
+            self.draw_self()
+            self.flush()
+        else:
+            start = time.perf_counter()
+            self.draw_self()
+            self.flush()
+            stats.observe_widget(self, time.perf_counter() - start)
+            stats.count("widget draws")
+        self.dirty = False
+        return True
+
+    def flush(self):
+        """Stages the widget's windows for the next curses.doupdate."""
+        self.win.noutrefresh()
 
     @abc.abstractmethod
     def draw_self(self):
         """Draws the widget and only itself."""
         pass
 
+    def move_win(self, y: int, x: int):
+        """Moves the widget's window inside the window it was derived from.
+        :param y: row in the parent window
+        :param x: column in the parent window"""
+        self.win.mvderwin(y, x)
+        self.mark_dirty()
+
     def resize(self, y: int, x: int):
         """Allows the widget to resize to a new size.
         :param x: x dimension
         :param y: y dimension"""
-        self.logger.log("Reszing ", str([y, x]))
+        self.logger.log("Reszing ", ("%s", [y, x]))
         self.win.erase()
         self.win.resize(y, x)
+        self.mark_dirty()
 
 
 class InputWidget(DisplayWidget):
     """Abstract base class for widgets that can handle input."""
 
-    _accept_input = True
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__()
+        self._accept_input = True
 
     @property
     def accept_input(self):
@@ -58,90 +246,342 @@ class InputWidget(DisplayWidget):
     def accept_input(self, value):
         self._accept_input = value
 
-    @abc.abstractmethod
-    def handle_input(self, keypress):
-        """Abstract function to handle keypress.
-        :type keypress: str
-        :param keypress: Keypress to handle"""
-        return True
+    def handle_input(self, keypress, count: int = 1):
+        """Handles a keypress through the widget's keymap. Keys without a binding go to unbound_key.
+        :type keypress: int
+        :param keypress: Keypress to handle
+        :param count: Times the key was pressed in a row, only more than 1 for repeatable actions"""
+        handled, result = self.dispatch(keypress, count)
+        if not handled:
+            return self.unbound_key(keypress)
+        return result
+
+    def unbound_key(self, keypress):
+        """Called with keys that have no binding."""
+        return None
 
 
 class ContentWidget(DisplayWidget):
     """Abstract widget that holds a content value"""
 
+    __slots__ = ("value",)
+
     @abc.abstractmethod
     def __init__(self, value):
+        super().__init__()
         self.value = value
 
 
 class TitleWidget(ContentWidget):
     """A widget that is meant to be a title"""
 
+    __slots__ = ()
+
     def __init__(self, title: str):
         super().__init__(title)
 
     def draw_self(self):
         self.logger.log("Drawing Title To Screen")
         if self.value is not None:
-            xcord = int((self.win.getmaxyx()[1] / 2) - len(self.value) / 2)
-            self.win.addstr(0, xcord, self.value)
+            width = self.win.getmaxyx()[1]
+            xcord = max(0, int((width / 2) - len(self.value) / 2))
+            try:
+                self.win.addnstr(0, xcord, self.value, width - xcord)
+            except curses.error:  # writing the bottom right corner moves the cursor off the window
+                pass
         else:
             self.logger.log("Undefined")
             self.win.addstr(0, 0, "Undefined")  # If this is ever called something bad happened, fix your shit
 
 
 class LabelWidget(TitleWidget):
-    """A simple widget to put a piece of text on the screen"""
+    """A simple widget to put a piece of text on the screen.
+    The text can be an ObservableValue or Computed, the label then shows its value and is redrawn when it changes."""
+    __slots__ = ("xcord", "ycord", "source")
     ycord: int | None
     xcord: int | None
 
-    def __init__(self, text: str, xcord: int = None, ycord: int = None):
+    def __init__(self, text, xcord: int = None, ycord: int = None):
+        self.source = None
+        if isinstance(text, CursesModels.Observable):
+            self.source = text
+            text.watch(self.source_changed)
+            text = str(text.value)
         super().__init__(text)
         self.xcord = xcord
         self.ycord = ycord
-        self.value_changed = True
+
+    def source_changed(self, *event):
+        if not self.dirty:
+            self.request_frame()
+        self.mark_dirty()
 
     def draw_self(self, logger=None):
-        self.logger.log("Label Widget is drawing", str(self))
-        if self.win is not None:
-            if self.value_changed:
-                self.logger.log("Label Widget is refreshing")
-                if self.xcord is not None and self.ycord is not None:
-                    self.win.addstr(self.ycord, self.xcord, self.value)
-                else:
-                    self.win.addstr(0, 0, self.value)
-                self.value_changed = False
-                self.win.refresh()
+        self.logger.log("Label Widget is drawing", ("%s", self))
+        if self.source is not None:
+            self.value = str(self.source.value)
+        self.win.erase()
+        try:
+            if self.xcord is not None and self.ycord is not None:
+                self.win.addstr(self.ycord, self.xcord, self.value)
+            else:
+                self.win.addstr(0, 0, self.value)
+        except curses.error:  # the text is cut off where the window ends
+            pass
 
     def change_value(self, value):
-        """Changes the displayed text."""
+        """Changes the displayed text. The label is redrawn on the next frame."""
         self.logger.log("Label value changed")
         self.value = str(value)
-        self.value_changed = True
-        self.draw_self()
+        self.mark_dirty()
 
-    def resize(self, y: int, x: int):
-        self.value_changed = True
-        self.draw_self()
+
+class StatsOverlay(DisplayWidget):
+    """Shows live frame timings and the slowest widgets from a CursesStats.Stats.
+    It has a window of its own that is put back on top of the layout every frame."""
+
+    __slots__ = ("source",)
+
+    min_size = (3, 3)  # the border and one cell of text
+
+    def __init__(self, source):
+        """:param source: The CursesStats.Stats to show, kept apart from stats so the overlay does not time itself."""
+        super().__init__()
+        self.source = source
+
+    def draw_self(self):
+        height, width = self.win.getmaxyx()
+        source = self.source
+        frame = source.histogram("frame")
+        latency = source.histogram("input to frame")
+        frame_bytes = source.histogram("frame bytes")
+        lines = ["frame p50 %.2fms p99 %.2fms" % (frame.percentile(0.5) * 1000, frame.percentile(0.99) * 1000),
+                 "input to frame p99 %.2fms" % (latency.percentile(0.99) * 1000),
+                 "frames %d  bytes/frame %s" % (source.counters["frames"],
+                                                "%.0f" % frame_bytes.mean if frame_bytes.count else "n/a")]
+        for widget, histogram in source.slowest_widgets(max(0, height - 2 - len(lines))):
+            lines.append("%-20s %.3fms" % (type(widget).__name__, histogram.mean * 1000))
+        self.win.erase()
+        self.win.box()
+        for y, line in enumerate(lines[:height - 2], 1):
+            self.win.addnstr(y, 1, line, width - 2)
+
+    def flush(self):
+        self.win.touchwin()  # the widgets underneath may have been drawn over it
+        self.win.noutrefresh()
 
 
 class ListView(InputWidget):
-    """Display a list of things and allows for scrolling"""
+    """Display a list of things and allows for scrolling.
+    Values given as a CursesModels.ObservableList are watched, rows changed in place are redrawn on their own."""
+
+    __slots__ = ("values", "line_pos", "cursor", "viewport", "query", "search", "search_worker", "changed_rows",
+                 "search_stale", "pending_jump")
+
+    bindings = {curses.KEY_DOWN: "down", curses.KEY_UP: "up",
+                curses.KEY_NPAGE: "page_down", curses.KEY_PPAGE: "page_up",
+                curses.KEY_HOME: "home", curses.KEY_END: "end", CursesKeys.ENTER: "select", "/": "search"}
+    mode_bindings = {"search": {CursesKeys.ENTER: "search_done", CursesKeys.ESCAPE: "search_cancel",
+                                CursesKeys.BACKSPACE: "search_back", curses.KEY_BACKSPACE: "search_back",
+                                curses.KEY_DOWN: "down", curses.KEY_UP: "up",
+                                curses.KEY_NPAGE: "page_down", curses.KEY_PPAGE: "page_up"}}
+    repeatable_actions = frozenset(("down", "up", "page_down", "page_up"))
+    min_size = (1, 3)  # rows are drawn between a blank column on either side
+    background_search_rows = 50000  # longer lists are searched on a worker thread when there is a display
 
     def __init__(self, values: list):
         super().__init__()
         self.line_pos = 0
         self.cursor = 0
         self.values = values
+        self.viewport = None  # (top, lines) of the rows on screen, None when they all need drawing
+        self.query = ""
+        self.search = None
+        self.search_worker = None
+        self.changed_rows = None  # indices of values changed in place since the last frame
+        self.search_stale = False
+        self.pending_jump = None  # row to jump to once the widget has a window again, see apply_filter
+        if isinstance(values, CursesModels.Observable):
+            values.watch(self.values_changed)
+
+    def mark_dirty(self):
+        """Redraws every visible row on the next frame. Scrolling only redraws the rows that changed."""
+        super().mark_dirty()
+        self.viewport = None
+        self.changed_rows = None
 
-    def draw_self(self, logger=None):
-        self.logger.log("ListView is drawing")
-        self.win.clear()
+    def add_win(self, win: curses.window):
+        super().add_win(win)
+        win.idlok(True)  # lets curses use the terminal's insert and delete line for the rows scroll_lines moves
+        if self.pending_jump is not None:
+            index, self.pending_jump = self.pending_jump, None
+            self.jump_to(index)
+
+    def values_changed(self, kind: str, index: int, count: int):
+        """Watches observable values. Rows on screen updated in place are redrawn on their own, rows inserted or
+        removed above the bottom of the screen redraw it and changes below it draw nothing.
+        Changes until the next frame are merged, a filtered list is searched again once."""
+        if not self.dirty:
+            self.request_frame()
+        if self.search is not None:
+            self.search_stale = True
+            self.mark_dirty()
+            return
+        viewport = self.viewport
+        if viewport is None:
+            return  # every row is drawn anyway
+        top, lines = viewport[0], viewport[1]
+        if kind == "update":
+            rows = range(max(index, top), min(index + count, top + lines))
+            if rows:
+                if self.changed_rows is None:
+                    self.changed_rows = set()
+                self.changed_rows.update(rows)
+            self.dirty = True
+        elif kind != "reset" and index >= top + lines:
+            self.dirty = True  # the length changed, for scrolling and the search status
+        else:
+            self.mark_dirty()
+
+    def refresh_values(self):
+        """Searches a filtered list again after its values changed, called before drawing."""
+        if self.search_stale:
+            self.search_stale = False
+            self.invalidate()
+
+    def changed_lines(self, drawn: range, lines: int):
+        """Screen rows of the values changed in place that are not in drawn, cleared for drawing again."""
+        changed, self.changed_rows = self.changed_rows, None
+        if changed is None:
+            return ()
+        rows = [index - self.line_pos for index in sorted(changed)]
+        rows = [row for row in rows if 0 <= row < lines and row not in drawn]
+        for row in rows:
+            self.win.move(row, 0)
+            self.win.clrtoeol()
+        return rows
+
+    def invalidate(self):
+        """Call after changing values in place, an active filter is searched again."""
+        if self.search is not None:
+            self.values = self.search.values
+            if self.search_worker is not None:
+                self.search_worker.stop()
+            self.search = self.search_worker = None
+            query, self.query = self.query, ""
+            self.set_query(query)
+        self.mark_dirty()
+
+    def draw_line(self, row: int, index: int, attr: int = curses.A_NORMAL):
+        self.win.addnstr(row, 1, self.values[index], self.win.getmaxyx()[1] - 2, attr)
+
+    def scroll_lines(self, top: int, lines: int):
+        """Scrolls the rows on screen to a new top and returns the rows that need drawing.
+        The window is scrolled in place, so only the rows scrolled in are drawn again. What reaches the terminal is
+        up to curses, ncurses 6.4 finds moved rows itself and sent the same bytes with a full redraw."""
+        if self.viewport is None or self.viewport[1] != lines or abs(top - self.viewport[0]) >= lines:
+            self.win.erase()
+            return range(lines)
+        shift = top - self.viewport[0]
+        if not shift:
+            return range(0)
+        self.win.scrollok(True)
+        self.win.scroll(shift)
+        self.win.scrollok(False)
+        return range(lines - shift, lines) if shift > 0 else range(-shift)
 
-        if self.win.getmaxyx()[0] > len(self.values):  # todo move to add_win
-            lines = len(self.values)
+    @property
+    def searching(self):
+        return self.keymap.mode == "search"
+
+    def list_height(self):
+        """Rows available for the list, the last row shows the query while searching."""
+        height = self.win.getmaxyx()[0]
+        return height - 1 if self.searching and height > 1 else height
+
+    def draw_query(self):
+        height, width = self.win.getmaxyx()
+        if not self.searching or height < 2:
+            return
+        status = "/%s  (%d)" % (self.query, len(self.values))
+        self.win.move(height - 1, 0)
+        self.win.clrtoeol()
+        self.win.addnstr(height - 1, 0, status, width - 1, curses.A_BOLD)
+
+    def source_index(self, index: int):
+        """Index in the unfiltered values of the row at index."""
+        if isinstance(self.values, CursesSearch.FilteredRows):
+            return self.values.indices[index]
+        return index
+
+    def set_query(self, query: str):
+        """Filters the list to the rows containing query, case insensitive. An empty query shows every row.
+        Long lists are searched in the background when the widget has an update queue, the filter is then
+        applied by the display once the search is done."""
+        self.query = query
+        if self.search is None:
+            if not query:
+                return
+            self.search = CursesSearch.IncrementalSearch(self.values)
+        if not query:
+            self.apply_filter(query, None)
+        elif self.search_worker is not None:
+            self.search_worker.submit(query)
+        elif self.updates is not None and len(self.search.values) >= self.background_search_rows:
+            self.search_worker = CursesSearch.SearchWorker(
+                self.search, lambda query, matches: self.updates.post(self, self.apply_filter, query, matches))
+            self.search_worker.submit(query)
+        else:
+            self.apply_filter(query, self.search.update(query))
+        self.mark_dirty()
+
+    def apply_filter(self, query: str, matches):
+        """Shows the rows at matches, results for a query that has since changed are ignored.
+        A background result can arrive after the widget lost its window, it is then scrolled once it is mounted."""
+        if query != self.query:
+            return
+        source = self.search.values
+        self.values = source if matches is None else CursesSearch.FilteredRows(source, matches)
+        if self.win is None:
+            self.pending_jump = 0
         else:
-            lines = self.win.getmaxyx()[0]
+            self.jump_to(0)
+        self.mark_dirty()
+
+    def unbound_key(self, keypress):
+        if self.searching and 32 <= keypress < 127:
+            self.set_query(self.query + chr(keypress))
+
+    def action_search(self):
+        self.keymap.set_mode("search")
+        self.mark_dirty()
+
+    def action_search_back(self):
+        self.set_query(self.query[:-1])
+
+    def action_search_done(self):
+        """Leaves search mode keeping the filter."""
+        self.keymap.set_mode(None)
+        self.mark_dirty()
+
+    def action_search_cancel(self):
+        self.keymap.set_mode(None)
+        self.set_query("")
+
+    def dispose(self):
+        """Also stops the background search, whose thread keeps the widget alive, and drops the search index."""
+        if self.search_worker is not None:
+            self.search_worker.stop()
+        if self.search is not None:
+            self.values = self.search.values
+        self.search = self.search_worker = None
+        self.query = ""
+        super().dispose()
+
+    def draw_self(self, logger=None):
+        self.logger.log("ListView is drawing")
+        self.refresh_values()
+        lines = min(self.list_height(), len(self.values))
 
         if self.line_pos < 0:
             self.line_pos = 0
@@ -149,54 +589,138 @@ class ListView(InputWidget):
             self.logger.log("Moving List to fit")
             self.line_pos = len(self.values) - lines
 
-        for index in range(lines):
-            if index < len(self.values):
-                self.win.addstr(index, 1, self.values[index + self.line_pos])
-        self.win.refresh()
+        drawn = self.scroll_lines(self.line_pos, lines)
+        for row in drawn:
+            self.draw_line(row, row + self.line_pos)
+        for row in self.changed_lines(drawn, lines):
+            self.draw_line(row, row + self.line_pos)
+        self.draw_query()
+        self.viewport = (self.line_pos, lines)
 
-    def handle_input(self, keypressed):
-        self.logger.log("Handdling keypress")
-        keypressed = str(curses.keyname(keypressed))  # is a byte object
-        if keypressed == "b'KEY_DOWN'":
-            self.line_pos += 1
+    def page_lines(self):
+        """Number of rows moved by page up and page down."""
+        return max(1, self.list_height())
 
-        elif keypressed == "b'KEY_UP'":
-            self.line_pos -= 1
+    def jump_to(self, index: int):
+        """Scrolls the list so the row at index is at the top, or as close as the list allows."""
+        self.line_pos = max(0, min(index, len(self.values) - self.list_height()))
+        self.dirty = True  # keeps the viewport, only the rows scrolled in are drawn
 
-        elif keypressed == "b'^J'":
-            return True
+    def action_down(self, count=1):
+        self.jump_to(self.line_pos + count)
 
+    def action_up(self, count=1):
+        self.jump_to(self.line_pos - count)
 
-class MultiColumnList(ListView):
-    """Displays a list with multiple columns"""
+    def action_page_down(self, count=1):
+        self.jump_to(self.line_pos + count * self.page_lines())
 
-    def __init__(self, values: list):
-        super().__init__(values)
-        self.lists = []
+    def action_page_up(self, count=1):
+        self.jump_to(self.line_pos - count * self.page_lines())
+
+    def action_home(self):
+        self.jump_to(0)
+
+    def action_end(self):
+        self.jump_to(len(self.values))
+
+    def action_select(self):
+        return True
+
+
+class MultiColumnList(ListView):
+    """Displays a table. The data is kept per column in a CursesTable.TableModel and only the rows on screen
+    are formatted. Press 1-9 to sort by that column, the same key again to reverse it and 0 for the original order."""
+
+    __slots__ = ("model", "rows", "widths", "sort_column", "sort_reverse")
+
+    fit_rows = 1000  # rows looked at to size "fit" columns
+
+    def __init__(self, values: list = None, widths: list = None, model: CursesTable.TableModel = None):
+        """:param values: Rows of the table, each a sequence with a value per column.
+        :param widths: Width policy per column. An int is a fixed width, a float is a share of the width left over
+        and "fit" sizes the column to its widest value. By default the columns share the width equally.
+        :param model: A TableModel to show instead of values, it can be shared with other widgets."""
+        self.model = model if model is not None else CursesTable.TableModel(values if values is not None else ())
+        self.rows = CursesTable.FormattedRows(self.model)
+        super().__init__(self.rows)
+        self.widths = widths
+        self.sort_column = None
+        self.sort_reverse = False
+        self.model.watch(self.model_changed)
+
+    def model_changed(self, kind: str, index: int, count: int):
+        """Watches the model. A sorted table redraws the rows on screen, as any change may reorder them.
+        Columns added by the change are sized and the whole table is drawn again."""
+        if self.win is not None and len(self.rows.widths) != self.model.column_count:
+            self.rows.set_widths(self.column_widths(self.win.getmaxyx()[1]))
+            if not self.dirty:
+                self.request_frame()
+            self.mark_dirty()
+        elif self.sort_column is None:
+            self.values_changed(kind, index, count)
+        else:
+            if not self.dirty:
+                self.request_frame()
+            self.mark_dirty()
+
+    def column_widths(self, width: int):
+        """Width of each column for a window width, the columns are separated by a space."""
+        columns = self.model.column_count
+        policies = self.widths if self.widths is not None else [1.0] * columns
+        free = width - columns - 1  # leaves the first and last column of the window empty
+        widths = [0] * columns
+        weights = {}
+        for index, policy in enumerate(policies[:columns]):
+            if policy == "fit":
+                widths[index] = max((len(str(value)) for value in self.model.columns[index][:self.fit_rows]),
+                                    default=0)
+            elif isinstance(policy, int):
+                widths[index] = policy
+            else:
+                weights[index] = policy
+        free -= sum(widths)
+        total_weight = sum(weights.values())
+        if weights and free > 0 and total_weight > 0:
+            for index, weight in weights.items():
+                widths[index] = int(free * weight / total_weight)
+            leftover = free - sum(widths[index] for index in weights)
+            for index in list(weights)[:leftover]:
+                widths[index] += 1
+        return [max(0, width) for width in widths]
 
     def add_win(self, win: curses.window):
-        self.win = win
-        columns = len(self.values[0])
-        spacing = int(self.win.getmaxyx()[1] / columns) - 1
-        self.lists = []
-        for row in self.values:
-            complete_row = ''
-            for item in row:
-                item = str(item)
-                if len(item) > spacing:
-                    complete_row += item[:spacing]
-                elif len(item) < spacing:
-                    spaces = " " * (spacing - len(item))
-                    complete_row += item + spaces
-                else:
-                    complete_row = item
-            self.lists.append(complete_row)
-        self.values = self.lists
+        super().add_win(win)
+        self.rows.set_widths(self.column_widths(win.getmaxyx()[1]))
+
+    def resize(self, y: int, x: int):
+        super().resize(y, x)
+        self.rows.set_widths(self.column_widths(x))  # only the rows drawn from now on are formatted again
+
+    def sort_by(self, column: int = None, reverse: bool = False):
+        """Sorts the rows by a column, None goes back to the model's order. Sort orders are cached by the model."""
+        self.sort_column = column
+        self.sort_reverse = reverse
+        self.rows.sort_by(column, reverse)
+        self.line_pos = 0
+        self.invalidate()
+
+    def unbound_key(self, keypress):
+        if not self.searching and ord("0") <= keypress <= ord("9"):
+            column = keypress - ord("1")
+            if column < 0:
+                self.sort_by(None)
+            elif column < self.model.column_count:
+                self.sort_by(column, column == self.sort_column and not self.sort_reverse)
+        else:
+            super().unbound_key(keypress)
 
 
 class ListMenu(ListView):
     """A menu that is a list of options"""
 
+    __slots__ = ("value", "list_pos")
+
     def __init__(self, values: list):
         super().__init__(values)
         self.value = None
@@ -204,107 +728,713 @@ class ListMenu(ListView):
         self.cursor = 1
 
     def draw_self(self, logger=None):
-        self.logger.log("MultiColumnList is drawing")
-        self.win.clear()
-        if self.win.getmaxyx()[0] > len(
-                self.values):  # makes sure the list wont wrap around if the screen is bigger then the values
-            lines = len(self.values)
-        else:
-            lines = self.win.getmaxyx()[0]
+        self.logger.log("ListMenu is drawing")
+        self.refresh_values()
+        # makes sure the list wont wrap around if the screen is bigger then the values
+        lines = min(self.list_height(), len(self.values))
 
         self.logger.log("Moving Selection")
-        if self.cursor > lines:
-            self.list_pos += 1
-            self.cursor = lines
-        elif self.cursor < 1:
-            self.list_pos -= 1
-            if self.list_pos < 0:
-                self.list_pos = 0
-            self.cursor = 1
-
-        if self.list_pos + lines > len(self.values):
-            self.list_pos = len(self.values) - lines
-        for index in range(0, lines):
-            if index + 1 == self.cursor:
-                self.win.addstr(index, 1, self.values[index + self.list_pos], curses.A_STANDOUT)
-            else:
-                self.win.addstr(index, 1, self.values[index + self.list_pos])
-        self.win.refresh()
+        self.jump_to(self.selected)
+        old_cursor = self.viewport[2] - (self.list_pos - self.viewport[0]) if self.viewport is not None else None
+        drawn = self.scroll_lines(self.list_pos, lines)
+        for row in drawn:
+            self.draw_line(row, row + self.list_pos, curses.A_STANDOUT if row + 1 == self.cursor else curses.A_NORMAL)
+        if drawn != range(lines) and old_cursor != self.cursor:
+            # the text of the rows on screen is unchanged, only move the highlight
+            self.highlight(old_cursor - 1, curses.A_NORMAL, drawn)
+            self.highlight(self.cursor - 1, curses.A_STANDOUT, drawn)
+        for row in self.changed_lines(drawn, lines):
+            self.draw_line(row, row + self.list_pos, curses.A_STANDOUT if row + 1 == self.cursor else curses.A_NORMAL)
+        self.draw_query()
+        self.viewport = (self.list_pos, lines, self.cursor)
+
+    def highlight(self, row: int, attr: int, drawn: range):
+        if 0 <= row < self.viewport[1] and row not in drawn:
+            width = self.win.getmaxyx()[1]
+            attr |= self.win.getbkgd() & curses.A_COLOR  # chgat replaces the color pair, keeps the background's
+            # the cells draw_line writes, a count of -1 would run to the end of the row
+            self.win.chgat(row, 1, max(0, min(len(self.values[row + self.list_pos]), width - 2)), attr)
 
-    def handle_input(self, keypressed):
-        self.logger.log("Handdling keypress")
-        keypressed = str(curses.keyname(keypressed))
-        if keypressed == "b'KEY_DOWN'":
+    @property
+    def selected(self):
+        """Index of the highlighted row."""
+        return self.list_pos + self.cursor - 1
+
+    def jump_to(self, index: int):
+        """Highlights the row at index, scrolling only as far as needed to show it."""
+        length = len(self.values)
+        lines = min(self.list_height(), length)
+        index = max(0, min(index, length - 1))
+        if index < self.list_pos:
+            self.list_pos = index
+        elif index >= self.list_pos + lines:
+            self.list_pos = index - lines + 1
+        self.list_pos = max(0, min(self.list_pos, length - lines))
+        self.cursor = index - self.list_pos + 1
+        self.dirty = True  # keeps the viewport, see draw_self
+
+    def action_down(self, count=1):
+        self.jump_to(self.selected + count)
+
+    def action_up(self, count=1):
+        self.jump_to(self.selected - count)
+
+    def action_page_down(self, count=1):
+        self.jump_to(self.selected + count * self.page_lines())
+
+    def action_page_up(self, count=1):
+        self.jump_to(self.selected - count * self.page_lines())
+
+    def action_end(self):
+        self.jump_to(len(self.values) - 1)
+
+    def action_select(self):
+        if self.values:
+            self.value = self.source_index(self.selected)
+
+
+class PagedRows:
+    """Lazy row provider that loads rows a page at a time from a callback.
+    Can be given to VirtualListView in place of a list."""
+
+    def __init__(self, fetch, length, page_size: int = 256, max_pages: int = 64):
+        """:param fetch: Callable taking (start, count) and returning that many rows.
+        :param length: The number of rows, or a callable returning it.
+        :param page_size: Rows loaded per call to fetch.
+        :param max_pages: Number of pages kept cached."""
+        self.fetch = fetch
+        self.length = length
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.pages = collections.OrderedDict()
+
+    def __len__(self):
+        if callable(self.length):
+            return self.length()
+        return self.length
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += len(self)
+        page_num, offset = divmod(index, self.page_size)
+        page = self.pages.get(page_num)
+        if page is None:
+            page = self.fetch(page_num * self.page_size, self.page_size)
+            self.pages[page_num] = page
+            if len(self.pages) > self.max_pages:
+                self.pages.popitem(last=False)
+        else:
+            self.pages.move_to_end(page_num)
+        if offset >= len(page):
+            raise IndexError(index)
+        return page[offset]
 
-            self.cursor += 1
+    def invalidate(self):
+        """Drops the cached pages, use when the underlying data changed."""
+        self.pages.clear()
 
-        elif keypressed == "b'KEY_UP'":
-            self.cursor -= 1
 
-        elif keypressed == "b'^J'":
-            self.value = self.cursor + self.list_pos - 1
+class VirtualListView(ListView):
+    """A scrolling list that only renders the rows around the viewport into a curses pad.
+    Values can be any sequence with __getitem__ and __len__, such as PagedRows,
+    so the rows never have to be loaded all at once."""
 
+    __slots__ = ("chunk_screens", "pad", "pad_top", "pad_valid")
 
-class TextBox(InputWidget):
-    """A widget that is a text box"""
+    bindings = {"/": None}  # rows are not kept in memory to search
 
-    def __init__(self):
+    def __init__(self, values, chunk_screens: int = 3):
+        """:param values: Sequence of rows to display.
+        :param chunk_screens: Height of the pad in screens, scrolling inside it only moves the pad."""
+        super().__init__(values)
+        self.chunk_screens = chunk_screens
+        self.pad = None
+        self.pad_top = 0
+        self.pad_valid = False
+
+    def add_win(self, win: curses.window):
+        super().add_win(win)
+        self.pad = None
+
+    def resize(self, y: int, x: int):
+        super().resize(y, x)
+        self.pad = None
+
+    def unmount(self):
+        self.pad = None
+        super().unmount()
+
+    def screen_restored(self):
+        self.dirty = True  # the pad is not in the copy of the screen, flush puts it back
+
+    def invalidate(self):
+        """Re-renders the rows around the viewport, use when the values changed."""
+        self.pad_valid = False
+        self.mark_dirty()
+
+    def values_changed(self, kind: str, index: int, count: int):
+        """Rows updated in place are rendered into the pad again if they are in it, changes past the end of the pad
+        render nothing and other changes render it anew."""
+        if self.search is not None:
+            super().values_changed(kind, index, count)
+            return
+        if not self.dirty:
+            self.request_frame()
+        if not self.pad_valid or self.pad is None or kind == "reset":
+            self.invalidate()
+            return
+        pad_end = self.pad_top + self.pad.getmaxyx()[0]
+        if kind == "update":
+            self.render_rows(index, min(index + count, pad_end))
+        elif index < pad_end:
+            self.invalidate()
+            return
+        self.dirty = True
+
+    def make_pad(self):
+        height, width = self.win.getmaxyx()
+        self.pad = self.backend.newpad(height * self.chunk_screens, width)
+        self.pad.bkgd(self.win.getbkgd())
+        self.pad.scrollok(True)
+        self.pad_valid = False
+
+    def render_rows(self, start: int, stop: int):
+        """Renders the rows in [start, stop) into the pad."""
+        width = self.pad.getmaxyx()[1]
+        length = len(self.values)
+        for index in range(max(start, self.pad_top), stop):
+            pad_row = index - self.pad_top
+            self.pad.move(pad_row, 0)
+            self.pad.clrtoeol()
+            if index < length:
+                self.pad.addnstr(pad_row, 1, str(self.values[index]), width - 2)
+
+    def draw_self(self):
+        self.refresh_values()
+        if self.pad is None:
+            self.make_pad()
+        height = self.win.getmaxyx()[0]
+        pad_height = self.pad.getmaxyx()[0]
+        length = len(self.values)
+
+        self.line_pos = max(0, min(self.line_pos, length - height))
+        if self.pad_valid and self.pad_top <= self.line_pos <= self.pad_top + pad_height - height:
+            return  # the viewport is already rendered, flush only moves the pad
+
+        new_top = max(0, self.line_pos - (pad_height - height) // 2)
+        shift = new_top - self.pad_top
+        if self.pad_valid and abs(shift) < pad_height:
+            self.pad.scroll(shift)  # keep the rows already rendered
+            old_top = self.pad_top
+            self.pad_top = new_top
+            if shift > 0:
+                self.render_rows(old_top + pad_height, new_top + pad_height)
+            else:
+                self.render_rows(new_top, old_top)
+        else:
+            self.pad_top = new_top
+            self.pad.erase()
+            self.render_rows(new_top, new_top + pad_height)
+        self.pad_valid = True
+
+    def flush(self):
+        self.win.noutrefresh()
+        begin_y, begin_x = self.win.getbegyx()
+        height, width = self.win.getmaxyx()
+        self.pad.noutrefresh(self.line_pos - self.pad_top, 0,
+                             begin_y, begin_x, begin_y + height - 1, begin_x + width - 1)
+
+
+class RingBuffer:
+    """A fixed size sequence that drops the oldest items once it is full."""
+
+    def __init__(self, max_len: int):
+        self.max_len = max_len
+        self.items = [None] * max_len
+        self.start = 0
+        self.length = 0
+        self.total = 0  # number of items ever appended, gives each item a stable absolute index
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError(index)
+        return self.items[(self.start + index) % self.max_len]
+
+    def __iter__(self):
+        for index in range(self.length):
+            yield self.items[(self.start + index) % self.max_len]
+
+    @property
+    def first(self):
+        """Absolute index of the oldest item still in the buffer."""
+        return self.total - self.length
+
+    def append(self, item):
+        if self.length < self.max_len:
+            self.items[(self.start + self.length) % self.max_len] = item
+            self.length += 1
+        else:
+            self.items[self.start] = item
+            self.start = (self.start + 1) % self.max_len
+        self.total += 1
+
+    def clear(self):
+        self.items = [None] * self.max_len
+        self.start = 0
+        self.length = 0
+
+
+class SourceReader:
+    """Reads the lines of a StreamingListView's source on a daemon thread and posts them to the display, lines
+    arriving before the next frame are added together. A queue is read with a timeout so stop ends the thread
+    soon, an iterator is only left once its next line arrives. The widget is held weakly while waiting."""
+
+    def __init__(self, widget, source, updates):
+        self.widget = weakref.ref(widget)
+        self.source = source
+        self.updates = updates
+        self.lines = collections.deque()
+        self.stopped = False
+        self.thread = threading.Thread(target=self.run, name="CursesUI stream", daemon=True)
+        self.thread.start()
+
+    def read(self):
+        if hasattr(self.source, "get"):
+            while not self.stopped:
+                try:
+                    yield self.source.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+        else:
+            yield from self.source
+
+    def run(self):
+        for line in self.read():
+            widget = self.widget()
+            if widget is None or self.stopped:
+                return
+            self.lines.append(line)
+            self.updates.post(None, widget.take_lines)
+            widget = None
+
+    def stop(self):
+        self.stopped = True
+
+
+class StreamingListView(ListView):
+    """An append only list for tailing logs. Lines are kept in a bounded ring buffer,
+    the view follows the newest line unless the user scrolled up, and while following
+    only the newly appended lines are drawn."""
+
+    __slots__ = ("source", "follow", "rendered", "reader")
+
+    bindings = {"/": None}  # the rows keep changing under a search index
+
+    def __init__(self, source=None, max_lines: int = 10000):
+        """:param source: Optional iterator, generator or queue.Queue to take lines from. Once the widget is shown
+        on a display the source is read on a thread of its own and new lines are drawn with the next frame, an
+        AsyncDisplay draws one as they arrive. Without a display call poll to read it.
+        :param max_lines: Number of lines kept, older lines are dropped."""
+        super().__init__(RingBuffer(max_lines))
+        self.source = source
+        self.follow = True
+        self.rendered = None  # absolute (top, end) of the rows on screen
+        self.reader = None  # SourceReader once the widget is on a display
+
+    def append(self, line):
+        """Adds a line to the end of the list."""
+        first = self.values.first
+        self.values.append(str(line))
+        if self.follow:
+            self.mark_dirty()
+        else:
+            # keep the same lines in view as the old ones are dropped
+            dropped = self.values.first - first
+            if dropped:
+                self.line_pos -= dropped
+                if self.line_pos < 0:
+                    self.line_pos = 0
+                    self.mark_dirty()
+
+    def extend(self, lines):
+        """Adds every line from an iterable to the end of the list."""
+        for line in lines:
+            self.append(line)
+
+    def take_lines(self):
+        """Adds the lines the reader got since the last frame, called on the UI thread."""
+        lines = self.reader.lines if self.reader is not None else ()
+        while lines:
+            self.append(lines.popleft())
+
+    def poll(self, limit: int = 1000):
+        """Reads up to limit lines from the source without waiting on a queue.
+        An iterator source is read with next so it should not block.
+        :return: Number of lines read"""
+        if self.source is None:
+            return 0
+        count = 0
+        if hasattr(self.source, "get_nowait"):
+            while count < limit:
+                try:
+                    line = self.source.get_nowait()
+                except queue.Empty:
+                    break
+                self.append(line)
+                count += 1
+        else:
+            for line in itertools.islice(self.source, limit):
+                self.append(line)
+                count += 1
+        return count
+
+    def resize(self, y: int, x: int):
+        super().resize(y, x)
+        self.rendered = None
+
+    def add_win(self, win: curses.window):
+        super().add_win(win)
+        self.rendered = None
+        if self.source is not None and self.reader is None and self.updates is not None:
+            self.reader = SourceReader(self, self.source, self.updates)
+
+    def dispose(self):
+        """Also stops reading the source."""
+        if self.reader is not None:
+            self.reader.stop()
+            self.take_lines()
+            self.reader = None
+        super().dispose()
+
+    def draw_row(self, index: int, top: int, width: int):
+        """Draws the line with absolute index on screen relative to the absolute top."""
+        self.win.addnstr(index - top, 1, self.values[index - self.values.first], width - 2)
+
+    def draw_self(self, logger=None):
+        height, width = self.win.getmaxyx()
+        total = self.values.total
+        first = self.values.first
+
+        if not self.follow:
+            self.rendered = None
+            self.line_pos = max(0, min(self.line_pos, len(self.values) - height))
+            self.win.erase()
+            for index in range(first + self.line_pos, min(first + self.line_pos + height, total)):
+                self.draw_row(index, first + self.line_pos, width)
+            return
+
+        top = max(first, total - height)
+        self.line_pos = top - first
+        if self.rendered is not None and 0 <= top - self.rendered[0] < height:
+            shift = top - self.rendered[0]
+            if shift:
+                self.win.scrollok(True)
+                self.win.scroll(shift)
+                self.win.scrollok(False)
+            start = max(self.rendered[1], top)
+        else:
+            self.win.erase()
+            start = top
+        for index in range(start, total):
+            self.draw_row(index, top, width)
+        self.rendered = (top, total)
+
+    def handle_input(self, keypress, count: int = 1):
+        if self.follow:
+            # line_pos is only brought up to the tail when drawing, move from where the view actually is
+            self.line_pos = max(0, len(self.values) - self.win.getmaxyx()[0])
+        return super().handle_input(keypress, count)
+
+    def jump_to(self, index: int):
+        """Scrolls to the row at index. The list follows the tail again once it is scrolled to the bottom."""
+        super().jump_to(index)
+        self.follow = self.line_pos >= len(self.values) - self.win.getmaxyx()[0]
+
+
+class TextEditor(InputWidget):
+    """A multi line text editor. The text is kept in a CursesText.Document instead of the window,
+    so reading value is O(1), and a document larger than the window is scrolled to follow the cursor.
+    Typing only redraws the line being edited.
+    Keys follow curses.textpad: ^A/^E start/end of line, ^B/^F/^P/^N move, ^D delete, ^H backspace,
+    ^K kill line, with ^U to undo and ^R to redo."""
+
+    __slots__ = ("document", "row", "col", "top", "left", "editwin", "stale_rows")
+
+    bindings = {curses.KEY_LEFT: "left", "^B": "left", curses.KEY_RIGHT: "right", "^F": "right",
+                curses.KEY_UP: "up", "^P": "up", curses.KEY_DOWN: "down", "^N": "down",
+                curses.KEY_HOME: "line_start", "^A": "line_start", curses.KEY_END: "line_end", "^E": "line_end",
+                CursesKeys.BACKSPACE: "backspace", curses.KEY_BACKSPACE: "backspace", "^H": "backspace",
+                curses.KEY_DC: "delete", "^D": "delete", "^K": "kill_line",
+                CursesKeys.ENTER: "newline", "^U": "undo", "^R": "redo"}
+
+    def __init__(self, text: str = ""):
         super().__init__()
-        self.value = None
-        self.text_box = None
+        self.document = CursesText.Document(text)
+        self.row = 0
+        self.col = 0
+        self.top = 0
+        self.left = 0
         self.editwin = None
+        self.stale_rows = None  # document rows to redraw, None for the whole window
+
+    @property
+    def value(self):
+        return self.document.text
+
+    @value.setter
+    def value(self, text: str):
+        self.document = CursesText.Document(text)
+        self.row = self.col = 0
+        self.mark_dirty()
 
     def add_win(self, win: curses.window):
-        self.win = win
-        self.win.box()
-        self.editwin = self.win.derwin(self.win.getmaxyx()[0] - 2, self.win.getmaxyx()[1] - 2, 1, 1)
-        self.text_box = curses.textpad.Textbox(self.editwin)
-        self.editwin.cursyncup()
-        self.editwin.refresh()
-
-    def draw_self(self):  # todo change size
-        self.editwin.refresh()
-
-    def handle_input(self, keypress):
-        self.logger.log(str(type(self)) + "handling keypress")
-        if str(curses.keyname(keypress)) == "b'^J'":
-            self.value = self.text_box.gather()
-        if self.text_box.do_command(keypress) == 0:
-            self.value = self.text_box.gather()
-            self.logger.log("Setting Value")
-        self.editwin.cursyncup()
-        self.editwin.refresh()
+        self.editwin = None  # derived from the old window, which can only be freed once this is
+        super().add_win(win)
+        self.editwin = self.make_editwin()
+
+    def make_editwin(self):
+        """The window the text is drawn in."""
+        return self.win
+
+    def unmount(self):
+        self.editwin = None
+        super().unmount()
+
+    def mark_dirty(self):
+        super().mark_dirty()
+        self.stale_rows = None
+
+    def touch_rows(self, row: int, to_end: bool = False):
+        """Redraws a document row on the next frame, or every row from it to the bottom of the window."""
+        if self.stale_rows is not None and self.editwin is not None:
+            stop = self.top + self.editwin.getmaxyx()[0] if to_end else row + 1
+            self.stale_rows.update(range(row, stop))
+        self.dirty = True
+
+    def follow_cursor(self, height: int, width: int):
+        top, left = self.top, self.left
+        if self.row < self.top:
+            self.top = self.row
+        elif self.row >= self.top + height:
+            self.top = self.row - height + 1
+        # scroll sideways half a window at a time, so typing past the edge does not redraw the line for every key
+        if self.col < self.left:
+            self.left = max(0, self.col - width // 2)
+        elif self.col >= self.left + width:
+            self.left = self.col - width // 2
+        if (top, left) != (self.top, self.left):
+            self.stale_rows = None
+
+    def draw_self(self):
+        height, width = self.editwin.getmaxyx()
+        self.follow_cursor(height, width)
+        if self.stale_rows is None:
+            self.editwin.erase()
+            rows = range(self.top, min(self.top + height, len(self.document)))
+        else:
+            rows = sorted(row for row in self.stale_rows if self.top <= row < self.top + height)
+        for row in rows:
+            self.draw_row(row, width)
+        self.stale_rows = set()
+        self.editwin.move(self.row - self.top, self.col - self.left)
+
+    def draw_row(self, row: int, width: int):
+        y = row - self.top
+        self.editwin.move(y, 0)
+        self.editwin.clrtoeol()
+        if row < len(self.document):
+            try:
+                self.editwin.addnstr(y, 0, self.document.line(row)[self.left:], width)
+            except curses.error:  # writing the bottom right corner moves the cursor off the window
+                pass
+
+    def flush(self):
+        if self.editwin is not self.win:
+            self.win.noutrefresh()
+        if self.editwin is not None:
+            self.editwin.noutrefresh()  # last, so the terminal cursor is left in the text
+
+    def insert(self, text: str):
+        """Inserts text at the cursor and moves the cursor after it."""
+        row = self.row
+        self.row, self.col = self.document.insert(self.row, self.col, text)
+        self.touch_rows(row, to_end=self.row != row)
+
+    def unbound_key(self, keypress):
+        if 32 <= keypress < 127:
+            self.insert(chr(keypress))
+
+    def action_left(self):
+        if self.col > 0:
+            self.col -= 1
+        elif self.row > 0:
+            self.row -= 1
+            self.col = len(self.document.line(self.row))
+        self.dirty = True
+
+    def action_right(self):
+        if self.col < len(self.document.line(self.row)):
+            self.col += 1
+        elif self.row < len(self.document) - 1:
+            self.row += 1
+            self.col = 0
+        self.dirty = True
+
+    def action_up(self):
+        if self.row > 0:
+            self.row -= 1
+            self.col = min(self.col, len(self.document.line(self.row)))
+        self.dirty = True
+
+    def action_down(self):
+        if self.row < len(self.document) - 1:
+            self.row += 1
+            self.col = min(self.col, len(self.document.line(self.row)))
+        self.dirty = True
+
+    def action_line_start(self):
+        self.col = 0
+        self.dirty = True
+
+    def action_line_end(self):
+        self.col = len(self.document.line(self.row))
+        self.dirty = True
+
+    def action_backspace(self):
+        if self.col > 0:
+            self.document.delete(self.row, self.col - 1, self.row, self.col)
+            self.col -= 1
+            self.touch_rows(self.row)
+        elif self.row > 0:
+            self.col = len(self.document.line(self.row - 1))
+            self.document.delete(self.row - 1, self.col, self.row, 0)
+            self.row -= 1
+            self.touch_rows(self.row, to_end=True)
+
+    def action_delete(self):
+        if self.col < len(self.document.line(self.row)):
+            self.document.delete(self.row, self.col, self.row, self.col + 1)
+            self.touch_rows(self.row)
+        elif self.row < len(self.document) - 1:
+            self.document.delete(self.row, self.col, self.row + 1, 0)
+            self.touch_rows(self.row, to_end=True)
+
+    def action_kill_line(self):
+        """Deletes to the end of the line, or joins the next line if there is nothing after the cursor."""
+        end = len(self.document.line(self.row))
+        if self.col < end:
+            self.document.delete(self.row, self.col, self.row, end)
+            self.touch_rows(self.row)
+        else:
+            self.action_delete()
+
+    def action_newline(self):
+        self.insert("\n")
+
+    def action_undo(self):
+        position = self.document.undo()
+        if position is not None:
+            self.row, self.col = position
+            self.mark_dirty()
+
+    def action_redo(self):
+        position = self.document.redo()
+        if position is not None:
+            self.row, self.col = position
+            self.mark_dirty()
+
+
+class TextBox(TextEditor):
+    """A widget that is a text box"""
+
+    __slots__ = ()
+
+    min_size = (3, 3)  # the border and one cell of text
+
+    def fits(self, height: int, width: int):
+        """True if a window of this size has room for the border and the text."""
+        return height >= self.min_size[0] and width >= self.min_size[1]
+
+    def edit_size(self, height: int, width: int):
+        """Size of the text inside the border."""
+        return max(1, height - 2), max(1, width - 2)
+
+    def make_editwin(self):
+        """The window inside the border, None while the box is too small for one."""
+        if not self.fits(*self.win.getmaxyx()):
+            return None
+        return self.win.derwin(*self.edit_size(*self.win.getmaxyx()), 1, 1)
+
+    def draw_self(self):
+        if self.editwin is None:
+            self.win.erase()
+            return
+        if self.stale_rows is None:
+            self.win.box()
+        super().draw_self()
+
+    def handle_input(self, keypress, count: int = 1):
+        self.logger.log(("%s handling keypress", type(self)))
+        return super().handle_input(keypress, count)
+
+    def move_win(self, y: int, x: int):
+        super().move_win(y, x)
+        if self.editwin is None:
+            return
+        # derived windows keep their screen position when the parent moves, and a smaller terminal can leave
+        # the edit window cut to the screen instead of the box, so it is fitted to the box before moving it back
+        self.editwin.resize(*self.edit_size(*self.win.getmaxyx()))
+        self.editwin.mvderwin(*self.editwin.getparyx())
 
     def resize(self, y: int, x: int):
         self.logger.log("Textbox resizing windows")
-        self.win.clear()
-        self.win.resize(y, x)
-        self.win.box()
-        self.editwin.resize(y - 2, x - 2)
+        if not self.fits(y, x):
+            self.editwin = None  # dropped before the box shrinks around it
+        super().resize(y, x)
+        if self.editwin is None:
+            self.editwin = self.make_editwin()
+        else:
+            self.editwin.resize(*self.edit_size(y, x))
 
 
 class TextInput(TextBox):
+    """A single line text box, enter submits the value instead of starting a new line."""
+
+    __slots__ = ()
     # todo add user help text option
-    def add_win(self, win: curses.window):
-        self.win = win
-        y, x = self.win.getmaxyx()
-        self.win.resize(3, x)
-        self.editwin = self.win.derwin(1, 1)
-        self.text_box = curses.textpad.Textbox(self.editwin)
-        self.editwin.refresh()
+
+    bindings = {CursesKeys.ENTER: "submit"}
+
+    def edit_size(self, height: int, width: int):
+        return 1, max(1, width - 2)
+
+    def make_editwin(self):
+        height, width = self.win.getmaxyx()
+        if height > 3:
+            self.win.resize(3, width)
+        return super().make_editwin()
+
+    def insert(self, text: str):
+        super().insert(text.replace("\n", " "))
+
+    def action_submit(self):
+        return self.value
 
     def resize(self, y: int, x: int):
         self.logger.log("TextInput resizing window")
-        self.win.clear()
-        self.win.resize(3, x)
-        self.win.box()
-        self.editwin.resize(1, x - 3)
-        self.win.refresh()
+        super().resize(min(3, y), x)
 
 
 class WompWomp(TitleWidget):
     """A completely useless widget that is a failure, no one should ever use this.
     Takes no arguments for display, just displays \"Womp Womp\" as a title"""
+
+    __slots__ = ()
     def __init__(self):
         super().__init__("Womp Womp")
         self.win = None
\ No newline at end of file
@@ -0,0 +1,25 @@
+"""Curses widgets, layouts and displays.
+The submodules are only imported when first used, so a tool pays for the parts it needs:
+
+    from CursesUI import pick
+    choice = pick(["apple", "pear"], "Fruit:")
+"""
+import importlib
+
+SUBMODULES = frozenset(("CursesAsync", "CursesBackend", "CursesDisplay", "CursesKeys", "CursesLayouts",
+                        "CursesLogger", "CursesModels", "CursesPalette", "CursesPick", "CursesRecord",
+                        "CursesSearch", "CursesServer", "CursesStats", "CursesTable", "CursesText",
+                        "CursesUpdates", "CursesWidgets"))
+EXPORTS = {"pick": "CursesPick"}  # name: submodule defining it
+
+
+def __getattr__(name):
+    if name in SUBMODULES:
+        return importlib.import_module("." + name, __name__)
+    if name in EXPORTS:
+        return getattr(importlib.import_module("." + EXPORTS[name], __name__), name)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | SUBMODULES | set(EXPORTS))
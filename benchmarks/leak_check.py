@@ -0,0 +1,168 @@
+"""Leak check for CursesUI screens that are built and torn down over and over.
+
+Rebuilds a screen of nested layouts, lists, a table, text boxes and a background searched list many times,
+through push_screen/pop_screen and clear_layout, and checks that live windows, threads and Python memory
+stay flat. Headless, it also connects clients to a DisplayServer that start a search and disconnect.
+Exits with status 1 if anything grows.
+
+    python benchmarks/leak_check.py [--cycles N] [--terminal]
+
+--terminal runs against a real terminal with curses.wrapper and also checks the resident set size,
+which catches curses windows that could not be deleted.
+"""
+import argparse
+import asyncio
+import gc
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import curses
+
+from CursesUI import CursesBackend, CursesDisplay, CursesLayouts, CursesServer, CursesTable, CursesWidgets
+
+ROWS = ["row %d of the list" % index for index in range(60_000)]  # past background_search_rows
+MODEL = CursesTable.TableModel([(index, "name %d" % index, index * 3) for index in range(5000)])
+
+
+def build_screen():
+    split = CursesLayouts.Split()
+    left = split.add_widget(CursesLayouts.VBox())
+    searched = left.add_widget(CursesWidgets.ListMenu(ROWS))
+    left.add_widget(CursesWidgets.LabelWidget("status"), size=1)
+    right = split.add_widget(CursesLayouts.Grid(columns=2))
+    right.add_widget(CursesWidgets.MultiColumnList(model=MODEL))
+    right.add_widget(CursesWidgets.TextBox())
+    right.add_widget(CursesWidgets.VirtualListView(ROWS))
+    right.add_widget(CursesWidgets.TextInput())
+    return split, searched
+
+
+def cycle(display):
+    """One rebuild of the screen, both ways a console replaces its screens."""
+    layout, searched = build_screen()
+    display.push_screen(layout)
+    display.draw_scrn()
+    searched.action_search()
+    for char in "row 42":
+        searched.unbound_key(ord(char))  # starts the background search on the first key
+    display.draw_scrn()
+    display.pop_screen()
+    display.draw_scrn()
+
+    display.layout.add_widget(build_screen()[0])
+    display.draw_scrn()
+    display.clear_layout()
+    display.draw_scrn()
+
+
+def build_session(session):
+    layout, searched = build_screen()
+    layout.active_widget = 0
+    layout.widgets[0].active_widget = 0  # keys go to the searched list
+    return layout
+
+
+async def disconnect_cycle(server):
+    """A client that starts a background search and disconnects while it may still be running."""
+    reader, writer = await asyncio.open_unix_connection(server.path)
+    writer.write(CursesServer.size_report(40, 120) + b"/row 42")
+    await asyncio.wait_for(reader.readuntil(b"/row 42"), 10)  # the query is on screen
+    writer.close()
+    await writer.wait_closed()
+    while server.sessions:
+        await asyncio.sleep(0.01)
+
+
+def resident_kib():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        return None
+
+
+def measure(display, backend):
+    deadline = time.monotonic() + 10
+    for thread in threading.enumerate():
+        if thread.name == "CursesUI search":
+            # disposed widgets stop their search once the running one is done, a leaked one waits forever
+            thread.join(max(0.0, deadline - time.monotonic()))
+    gc.collect()
+    windows = len(backend.windows) if isinstance(backend, CursesBackend.HeadlessBackend) else None
+    return {"windows": windows, "threads": threading.active_count(),
+            "python_kib": tracemalloc.get_traced_memory()[0] // 1024, "resident_kib": resident_kib()}
+
+
+def check(display, backend, cycles: int):
+    display.layout = CursesLayouts.VBox()
+    tracemalloc.start()
+    for _ in range(max(50, cycles // 5)):  # warm up caches, keymap templates and the allocator
+        cycle(display)
+    before = measure(display, backend)
+    for _ in range(cycles):
+        cycle(display)
+    after = measure(display, backend)
+    tracemalloc.stop()
+    return compare(before, after)
+
+
+async def check_server(cycles: int):
+    server = CursesServer.DisplayServer(build_session, os.path.join(tempfile.mkdtemp(), "leak.sock"))
+    serving = asyncio.ensure_future(server.serve())
+    while not os.path.exists(server.path):
+        await asyncio.sleep(0.01)
+    try:
+        tracemalloc.start()
+        for _ in range(max(20, cycles)):  # the allocator's arenas take a few sessions to settle
+            await disconnect_cycle(server)
+        before = measure(None, None)
+        for _ in range(cycles):
+            await disconnect_cycle(server)
+        after = measure(None, None)
+        tracemalloc.stop()
+    finally:
+        serving.cancel()
+    print("server sessions")
+    return compare(before, after)
+
+
+def compare(before, after):
+    # the resident size moves with the allocator's per thread arenas as search threads come and go,
+    # a leaked screen sized curses window would cost over 100 KiB a cycle
+    limits = {"windows": 0, "threads": 0, "python_kib": 256, "resident_kib": 8192}
+    failed = [name for name, limit in limits.items()
+              if before[name] is not None and after[name] - before[name] > limit]
+    for name in limits:
+        print("%-14s %10s -> %10s" % (name, before[name], after[name]))
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cycles", type=int, default=200, help="screen rebuilds to measure")
+    parser.add_argument("--terminal", action="store_true", help="run on the terminal instead of headless")
+    args = parser.parse_args(argv)
+
+    if args.terminal:
+        failed = curses.wrapper(lambda stdscr: check(CursesDisplay.Display(stdscr), CursesBackend.terminal,
+                                                     args.cycles))
+    else:
+        backend = CursesBackend.HeadlessBackend(40, 120)
+        display = CursesDisplay.Display(backend.stdscr, backend=backend)
+        failed = check(display, backend, args.cycles)
+        failed += asyncio.run(check_server(max(10, args.cycles // 10)))
+    if failed:
+        print("growing:", ", ".join(failed))
+        return 1
+    print("flat")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,303 @@
+"""Headless render benchmarks for CursesUI.
+
+Runs the widgets against CursesBackend.HeadlessBackend and reports frame times,
+refresh calls and bytes sent to the terminal per frame.
+
+    python benchmarks/render_bench.py [--quick] [--json results.json]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import curses
+
+from CursesUI import CursesBackend, CursesDisplay, CursesLayouts, CursesModels, CursesWidgets
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class FrameRecorder:
+    """Times frames and reads the backend counters around each one."""
+
+    def __init__(self, backend: CursesBackend.HeadlessBackend):
+        self.backend = backend
+        self.times = []
+        self.refreshes = []
+        self.flushes = []
+        self.bytes = []
+
+    def frame(self, func, *args):
+        backend = self.backend
+        refresh_calls, flushes, written = backend.refresh_calls, backend.flushes, backend.bytes_written
+        start = time.perf_counter()
+        func(*args)
+        self.times.append(time.perf_counter() - start)
+        self.refreshes.append(backend.refresh_calls - refresh_calls + backend.flushes - flushes)
+        self.flushes.append(backend.flushes - flushes)
+        self.bytes.append(backend.bytes_written - written)
+
+    def result(self, name, **params):
+        frames = len(self.times)
+        return {
+            "name": name,
+            "params": params,
+            "frames": frames,
+            "frame_ms": {"p50": percentile(self.times, 0.5) * 1000,
+                         "p99": percentile(self.times, 0.99) * 1000,
+                         "mean": sum(self.times) / max(1, frames) * 1000,
+                         "max": max(self.times, default=0) * 1000},
+            "refresh_calls_per_frame": sum(self.refreshes) / max(1, frames),
+            "flushes_per_frame": sum(self.flushes) / max(1, frames),
+            "bytes_per_frame": {"mean": sum(self.bytes) / max(1, frames),
+                                "p99": percentile(self.bytes, 0.99)},
+        }
+
+
+def make_display(height=24, width=80, layout=CursesLayouts.VerticalLayout):
+    backend = CursesBackend.HeadlessBackend(height, width)
+    display = CursesDisplay.Display(backend.stdscr, backend=backend)
+    display.layout = layout()
+    return backend, display
+
+
+def key_frame(display, keypress):
+    display.handle_input(keypress)
+    display.draw_scrn()
+
+
+def bench_list_scroll(widget_class, rows, keys):
+    backend, display = make_display()
+    values = ["row %d of the list" % index for index in range(rows)]
+    display.layout.add_widget(widget_class(values))
+    display.layout.active_widget = 0
+    display.draw_scrn()
+    recorder = FrameRecorder(backend)
+    for index in range(keys):
+        recorder.frame(key_frame, display, curses.KEY_DOWN if index < keys * 3 // 4 else curses.KEY_UP)
+    return recorder.result(widget_class.__name__ + " scroll", rows=rows, keys=keys)
+
+
+def bench_held_key(widget_class, rows, batches, batch_size):
+    """Keys arriving faster than frames, each typed ahead batch is read and drawn as one frame."""
+    backend, display = make_display()
+    values = ["row %d of the list" % index for index in range(rows)]
+    display.layout.add_widget(widget_class(values))
+    display.layout.active_widget = 0
+    display.draw_scrn()
+    recorder = FrameRecorder(backend)
+
+    def batch(keypress):
+        backend.push_keys(*[keypress] * batch_size)
+        display.wait_for_enter()
+        display.draw_scrn()
+    for index in range(batches):
+        recorder.frame(batch, curses.KEY_NPAGE if index % 2 else curses.KEY_DOWN)
+    return recorder.result(widget_class.__name__ + " held key", rows=rows, batch=batch_size)
+
+
+def bench_search(rows, query):
+    """Typing a search query into a ListMenu, the first key also builds the index."""
+    backend, display = make_display()
+    # measure the search itself, not the worker hand off
+    menu_class = type("ListMenu", (CursesWidgets.ListMenu,), {"__slots__": (), "background_search_rows": rows + 1})
+    menu = menu_class(["row %d of the list" % index for index in range(rows)])
+    display.layout.add_widget(menu)
+    display.draw_scrn()
+    recorder = FrameRecorder(backend)
+    for keypress in "/" + query:
+        recorder.frame(key_frame, display, ord(keypress))
+    return recorder.result("ListMenu search", rows=rows, query=query)
+
+
+def bench_multicolumn_build(rows, columns=4):
+    backend, display = make_display()
+    values = [["cell %d.%d" % (row, column) for column in range(columns)] for row in range(rows)]
+    recorder = FrameRecorder(backend)
+
+    def build():
+        display.layout.add_widget(CursesWidgets.MultiColumnList(values))
+        display.draw_scrn()
+    recorder.frame(build)
+    return recorder.result("MultiColumnList build", rows=rows, columns=columns)
+
+
+def bench_table_sort(rows, columns=4):
+    """Sorting a MultiColumnList by each column, then again by the cached orders."""
+    backend, display = make_display()
+    values = [[(row * 7919 + column) % rows for column in range(columns)] for row in range(rows)]
+    display.layout.add_widget(CursesWidgets.MultiColumnList(values))
+    display.draw_scrn()
+    recorder = FrameRecorder(backend)
+    for keypress in "1234" * 2:
+        recorder.frame(key_frame, display, ord(keypress))
+    return recorder.result("MultiColumnList sort", rows=rows, columns=columns)
+
+
+def bench_layout(layout_class, widgets):
+    backend, display = make_display(120, 400, layout_class)
+    build = FrameRecorder(backend)
+
+    def add_all():
+        for index in range(widgets):
+            display.layout.add_widget(CursesWidgets.LabelWidget("w%d" % index))
+        display.draw_scrn()
+    build.frame(add_all)
+
+    update = FrameRecorder(backend)
+    labels = display.layout.widgets
+    for index in range(50):
+        label = labels[index % len(labels)]
+        update.frame(lambda: (label.change_value("update %d" % index), display.draw_scrn()))
+    return [build.result(layout_class.__name__ + " build", widgets=widgets),
+            update.result(layout_class.__name__ + " update", widgets=widgets)]
+
+
+def bench_nested_layout(moves, depth=3):
+    """Moving the divider of a Split between nested boxes of labels and a single label, each move lays out
+    both sides again from their cached geometry."""
+    backend, display = make_display(48, 160, CursesLayouts.Split)
+
+    def nest(level):
+        box = CursesLayouts.VBox() if level % 2 else CursesLayouts.HBox()
+        for index in range(3):
+            box.add_widget(nest(level + 1) if level < depth and index == 0 else CursesWidgets.LabelWidget("x"))
+        return box
+    split = display.layout
+    split.add_widget(nest(1))
+    split.add_widget(CursesLayouts.VBox()).add_widget(CursesWidgets.LabelWidget("other side"))
+    display.draw_scrn()
+    recorder = FrameRecorder(backend)
+    for index in range(moves):
+        recorder.frame(lambda: (split.set_ratio(0.3 + 0.4 * (index % 2)), display.draw_scrn()))
+    return recorder.result("Nested layout divider", depth=depth, moves=moves)
+
+
+def bench_screen_switch(switches, widgets=6):
+    """Switching between two cached screens of lists, each switch copies the screen's buffer back."""
+    backend, display = make_display(48, 160)
+
+    def fill(layout):
+        for index in range(widgets):
+            layout.add_widget(CursesWidgets.ListMenu(["row %d of list %d" % (row, index) for row in range(500)]))
+        return layout
+    fill(display.layout)
+    display.draw_scrn()
+    other = display.push_screen(fill(CursesLayouts.HorizonalLayout()))
+    display.draw_scrn()
+    first = display.screens[0]
+    recorder = FrameRecorder(backend)
+    for index in range(switches):
+        recorder.frame(lambda screen: (display.switch_screen(screen), display.draw_scrn()),
+                       first if index % 2 == 0 else other)
+    return recorder.result("Screen switch", widgets=widgets, switches=switches)
+
+
+def bench_label_storm(labels, updates_per_frame, frames):
+    backend, display = make_display(24, 200, CursesLayouts.HorizonalLayout)
+    widgets = [display.layout.add_widget(CursesWidgets.LabelWidget("0")) for _ in range(labels)]
+    display.draw_scrn()
+    recorder = FrameRecorder(backend)
+
+    def storm(frame):
+        for update in range(updates_per_frame):
+            widgets[update % labels].change_value(frame * updates_per_frame + update)
+        display.draw_scrn()
+    for frame in range(frames):
+        recorder.frame(storm, frame)
+    return recorder.result("LabelWidget update storm", labels=labels, updates_per_frame=updates_per_frame)
+
+
+def bench_observable_update(widget_class, rows, frames, updates_per_frame=1):
+    """Rows on screen of an ObservableList changed in place, each frame should only repaint those rows."""
+    backend, display = make_display()
+    values = CursesModels.ObservableList("row %d of the list" % index for index in range(rows))
+    display.layout.add_widget(widget_class(values))
+    display.draw_scrn()
+    recorder = FrameRecorder(backend)
+
+    def update(frame):
+        for offset in range(updates_per_frame):
+            index = (frame + offset) % 20
+            values[index] = "row %d changed in frame %d" % (index, frame)
+        display.draw_scrn()
+    for frame in range(frames):
+        recorder.frame(update, frame)
+    return recorder.result(widget_class.__name__ + " row update", rows=rows,
+                           updates_per_frame=updates_per_frame)
+
+
+def bench_textbox_typing(chars):
+    backend, display = make_display()
+    display.layout.add_widget(CursesWidgets.TextBox())
+    display.layout.active_widget = 0
+    display.draw_scrn()
+    recorder = FrameRecorder(backend)
+    text = "the quick brown fox jumps over the lazy dog "
+    for index in range(chars):
+        recorder.frame(key_frame, display, ord(text[index % len(text)]))
+    return recorder.result("TextBox typing", chars=chars)
+
+
+def run(quick=False):
+    list_sizes = (10_000, 100_000) if quick else (10_000, 100_000, 1_000_000)
+    keys = 200 if quick else 1000
+    results = []
+    for rows in list_sizes:
+        results.append(bench_list_scroll(CursesWidgets.ListView, rows, keys))
+        results.append(bench_list_scroll(CursesWidgets.ListMenu, rows, keys))
+        results.append(bench_list_scroll(CursesWidgets.VirtualListView, rows, keys))
+        results.append(bench_held_key(CursesWidgets.ListMenu, rows, keys // 10, 37))
+        results.append(bench_search(rows, "w 4242"))
+        results.append(bench_multicolumn_build(rows))
+        results.append(bench_table_sort(rows))
+    for widgets in (1, 10, 50) if quick else (1, 10, 50, 100):
+        results.extend(bench_layout(CursesLayouts.HorizonalLayout, widgets))
+        results.extend(bench_layout(CursesLayouts.VerticalLayout, widgets))
+    results.append(bench_nested_layout(20 if quick else 100))
+    results.append(bench_screen_switch(20 if quick else 100))
+    results.append(bench_label_storm(20, 1000, 20 if quick else 100))
+    for widget_class in (CursesWidgets.ListMenu, CursesWidgets.VirtualListView):
+        results.append(bench_observable_update(widget_class, 100_000, 50 if quick else 200))
+    results.append(bench_observable_update(CursesWidgets.ListView, 100_000, 50 if quick else 200, 100))
+    results.append(bench_textbox_typing(200 if quick else 1000))
+    return results
+
+
+def print_table(results):
+    print("%-28s %-32s %9s %9s %9s %11s" % ("benchmark", "params", "p50 ms", "p99 ms", "refresh/f", "bytes/f"))
+    for result in results:
+        params = ",".join("%s=%s" % item for item in result["params"].items())
+        print("%-28s %-32s %9.3f %9.3f %9.1f %11.1f" % (
+            result["name"], params, result["frame_ms"]["p50"], result["frame_ms"]["p99"],
+            result["refresh_calls_per_frame"], result["bytes_per_frame"]["mean"]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="smaller data sets for a fast run")
+    parser.add_argument("--json", metavar="PATH", help="write the results as JSON to PATH, - for stdout")
+    args = parser.parse_args(argv)
+
+    results = run(args.quick)
+    report = {"python": platform.python_version(), "time": time.time(), "quick": args.quick, "results": results}
+    if args.json == "-":
+        json.dump(report, sys.stdout, indent=2)
+        return
+    print_table(results)
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump(report, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
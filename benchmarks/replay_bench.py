@@ -0,0 +1,142 @@
+"""Replay benchmark for CursesUI.
+
+Replays a recorded session against a screen of a 100k row ListMenu next to a 100k row MultiColumnList on a
+HeadlessBackend, as fast as possible, and reports frame and input times next to the ones recorded. Every
+replayed frame is compared with the recorded screen, the benchmark exits with status 1 if any differ.
+
+    python benchmarks/replay_bench.py [--session PATH] [--runs N] [--json results.json]
+    python benchmarks/replay_bench.py --record PATH
+
+Without --session a scripted session is recorded headless first. --record shows the same screen on the
+terminal and records what you do until F10, for replaying later with --session.
+"""
+import argparse
+import curses
+import io
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from CursesUI import (CursesBackend, CursesDisplay, CursesKeys, CursesLayouts, CursesRecord, CursesTable,
+                      CursesWidgets)
+
+ROWS = 100_000
+QUIT_KEY = curses.KEY_F10
+
+
+def build_data():
+    lines = ["row %d of the list" % index for index in range(ROWS)]
+    model = CursesTable.TableModel(columns=[list(range(ROWS)),
+                                            ["name %d" % (index * 7919 % ROWS) for index in range(ROWS)],
+                                            [index % 97 for index in range(ROWS)]])
+    return lines, model
+
+
+def builder(lines, model):
+    def build(display):
+        split = CursesLayouts.Split()
+        display.layout = split
+        split.add_widget(CursesWidgets.ListMenu(lines))
+        split.add_widget(CursesWidgets.MultiColumnList(model=model))
+        split.active_widget = 0
+    return build
+
+
+def scripted_keys():
+    """Batches of keys as an operator would type them: scrolling, paging, searching and sorting."""
+    batches = [[curses.KEY_DOWN]] * 20 + [[curses.KEY_DOWN] * 30, [curses.KEY_NPAGE] * 5, [curses.KEY_PPAGE] * 2]
+    batches += [[ord("/")]] + [[ord(char)] for char in "w 4242"] + [[CursesKeys.BACKSPACE]] * 2
+    batches += [[CursesKeys.ENTER], [curses.KEY_DOWN] * 3, [CursesKeys.TAB]]
+    batches += [[ord("2")], [curses.KEY_NPAGE] * 10, [ord("2")], [ord("3")], [curses.KEY_DOWN]] + [[curses.KEY_UP]] * 20
+    return batches
+
+
+def record_scripted(build, height=40, width=160):
+    """Records the scripted session headless. :return: The recording's bytes"""
+    backend = CursesBackend.HeadlessBackend(height, width)
+    display = CursesDisplay.Display(backend.stdscr, backend=backend)
+    build(display)
+    output = io.BytesIO()
+    display.start_recording(output)  # a file object is left open when the recording is closed
+    display.draw_scrn()
+    for keys in scripted_keys():
+        display.handle_keys(keys)
+        for worker in CursesRecord.search_workers(display.layout):
+            worker.wait_idle()
+        display.draw_scrn()
+    display.stop_recording()
+    for screen in display.screens:
+        screen.layout.dispose()
+    return output.getvalue()
+
+
+def record_terminal(build, path):
+    def main(stdscr):
+        display = CursesDisplay.Display(stdscr)
+        build(display)
+        display.start_recording(path)
+        display.draw_scrn()
+        while not display.handle_keys(display.read_keys(), QUIT_KEY):
+            display.draw_scrn()
+        display.stop_recording()
+    curses.wrapper(main)
+
+
+def run(session, build, runs: int):
+    results = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = CursesRecord.replay(session, build)
+        summary = result.summary()
+        summary["seconds"] = time.perf_counter() - start
+        summary["mismatched frames"] = [mismatch[0] for mismatch in result.mismatches]
+        results.append(summary)
+    return results
+
+
+def print_table(session, results):
+    print("session: %d keys, %d frames, %dx%d" % (session.keys, session.frames, session.height, session.width))
+    print("%-4s %9s %12s %12s %12s %12s %15s %11s" % ("run", "seconds", "frame p50", "frame p99", "input p50",
+                                                      "input p99", "recorded p99", "mismatches"))
+    for index, summary in enumerate(results):
+        print("%-4d %9.3f %10.3fms %10.3fms %10.3fms %10.3fms %13.3fms %11d" % (
+            index, summary["seconds"], summary["frame"]["p50"] * 1000, summary["frame"]["p99"] * 1000,
+            summary["input"]["p50"] * 1000, summary["input"]["p99"] * 1000,
+            summary["recorded frame"]["p99"] * 1000, summary["mismatches"]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--session", metavar="PATH", help="recording to replay instead of the scripted session")
+    parser.add_argument("--record", metavar="PATH", help="record a session on the terminal to PATH and exit")
+    parser.add_argument("--runs", type=int, default=3, help="times to replay the session")
+    parser.add_argument("--json", metavar="PATH", help="write the results as JSON to PATH, - for stdout")
+    args = parser.parse_args(argv)
+
+    build = builder(*build_data())
+    if args.record:
+        record_terminal(build, args.record)
+        return 0
+    if args.session:
+        session = CursesRecord.Session.load(args.session)
+    else:
+        session = CursesRecord.Session.load(io.BytesIO(record_scripted(build)))
+    results = run(session, build, args.runs)
+    report = {"python": platform.python_version(), "time": time.time(), "session": args.session,
+              "results": results}
+    if args.json == "-":
+        json.dump(report, sys.stdout, indent=2)
+    else:
+        print_table(session, results)
+        if args.json:
+            with open(args.json, "w") as output:
+                json.dump(report, output, indent=2)
+    return 1 if any(summary["mismatches"] for summary in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""Startup benchmark for CursesUI.
+
+Starts fresh Python processes on a pseudo terminal and times how long they take until the first frame of a
+ListMenu of 1000 items is on screen, for the one-shot pick() and for a Display with a layout.
+Also times importing the package and its display modules against a bare interpreter.
+
+    python benchmarks/startup_bench.py [--runs N] [--json results.json]
+"""
+import argparse
+import fcntl
+import json
+import os
+import platform
+import pty
+import signal
+import struct
+import subprocess
+import sys
+import termios
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIRST_ROW = b"item 0"
+LAST_ROW = b"item 21"  # last row of a 24 row screen, the frame is complete once it arrives
+
+PICK = """
+from CursesUI import pick
+pick("item %d" % index for index in range(1000))
+"""
+
+DISPLAY = """
+import curses
+from CursesUI import CursesDisplay, CursesLayouts, CursesWidgets
+
+def main(stdscr):
+    display = CursesDisplay.Display(stdscr)
+    display.layout = CursesLayouts.VerticalLayout()
+    display.layout.add_widget(CursesWidgets.LabelWidget("Pick one:"), size=1)
+    display.layout.add_widget(CursesWidgets.ListMenu(["item %d" % index for index in range(1000)]))
+    display.draw_scrn()
+    while display.wait_for_enter():
+        display.draw_scrn()
+
+curses.wrapper(main)
+"""
+
+IMPORTS = {"bare interpreter": "pass",
+           "import CursesUI": "import CursesUI",
+           "CursesPick": "from CursesUI import CursesPick",
+           "CursesDisplay": "from CursesUI import CursesDisplay, CursesLayouts, CursesWidgets"}
+
+
+def median(values):
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2]
+
+
+def first_paint(code: str, timeout: float = 10.0):
+    """Seconds from starting a process on a 24x80 pseudo terminal until its first frame was written."""
+    start = time.perf_counter()
+    pid, fd = pty.fork()
+    if pid == 0:
+        fcntl.ioctl(0, termios.TIOCSWINSZ, struct.pack("HHHH", 24, 80, 0, 0))
+        os.environ["TERM"] = os.environ.get("TERM", "xterm") or "xterm"
+        os.chdir(ROOT)
+        os.execv(sys.executable, [sys.executable, "-c", code])
+    output = b""
+    elapsed = None
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                data = os.read(fd, 65536)
+            except OSError:
+                break
+            if not data:
+                break
+            output += data
+            if FIRST_ROW in output and LAST_ROW in output:
+                elapsed = time.perf_counter() - start
+                break
+    finally:
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+        os.close(fd)
+    if elapsed is None:
+        raise RuntimeError("no frame within %.0f seconds, output ended with %r" % (timeout, output[-200:]))
+    return elapsed
+
+
+def import_time(code: str):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+    return time.perf_counter() - start
+
+
+def run(runs: int):
+    results = []
+    for name, code in IMPORTS.items():
+        import_time(code)  # warm up the bytecode caches
+        times = [import_time(code) for _ in range(runs)]
+        results.append({"name": "process with " + name, "ms": {"median": median(times) * 1000,
+                                                               "min": min(times) * 1000}})
+    for name, code in (("pick()", PICK), ("Display and layout", DISPLAY)):
+        first_paint(code)
+        times = [first_paint(code) for _ in range(runs)]
+        results.append({"name": "first paint, " + name, "ms": {"median": median(times) * 1000,
+                                                               "min": min(times) * 1000}})
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20, help="processes started per measurement")
+    parser.add_argument("--json", metavar="PATH", help="write the results as JSON to PATH, - for stdout")
+    args = parser.parse_args(argv)
+    results = run(args.runs)
+    report = {"python": platform.python_version(), "time": time.time(), "runs": args.runs, "results": results}
+    if args.json == "-":
+        json.dump(report, sys.stdout, indent=2)
+        return
+    if args.json:
+        with open(args.json, "w") as out:
+            json.dump(report, out, indent=2)
+    print("%-40s %10s %10s" % ("measurement", "median ms", "min ms"))
+    for result in results:
+        print("%-40s %10.1f %10.1f" % (result["name"], result["ms"]["median"], result["ms"]["min"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from CursesUI import CursesBackend, CursesDisplay
+
+
+@pytest.fixture
+def backend():
+    return CursesBackend.HeadlessBackend(12, 40)
+
+
+@pytest.fixture
+def display(backend):
+    display = CursesDisplay.Display(backend.stdscr, backend=backend)
+    yield display
+    display.dispose()
@@ -0,0 +1,45 @@
+"""AsyncDisplay on a HeadlessBackend, with a pipe standing in for the terminal input."""
+import asyncio
+import os
+import signal
+
+from CursesUI import CursesAsync, CursesLayouts, CursesWidgets
+
+
+def run_display(backend, coroutine):
+    read_fd, write_fd = os.pipe()
+    display = CursesAsync.AsyncDisplay(backend.stdscr, backend=backend, input_fd=read_fd, frame_interval=0)
+    display.layout = CursesLayouts.VBox()
+    try:
+        return asyncio.run(coroutine(display))
+    finally:
+        display.dispose()
+        os.close(read_fd)
+        os.close(write_fd)
+
+
+def test_update_before_run_is_drawn_by_the_first_frame(backend):
+    async def main(display):
+        label = display.layout.add_widget(CursesWidgets.LabelWidget("old"))
+        await display.update(label, label.change_value, "new")
+        task = asyncio.create_task(display.run(exit_on_enter=False))
+        await asyncio.sleep(0)
+        assert backend.text()[0].strip() == "new"
+        await display.update(label, label.change_value, "newer")
+        assert backend.text()[0].strip() == "newer"
+        display.stop()
+        await task
+    run_display(backend, main)
+
+
+def test_sigwinch_handler_is_put_back():
+    original = signal.getsignal(signal.SIGWINCH)
+    handler = lambda signum, frame: None
+    try:
+        CursesAsync.restore_winch(handler)
+        assert signal.getsignal(signal.SIGWINCH) is handler
+        CursesAsync.restore_winch(signal.SIG_DFL)  # what signal reports for the handler curses installs
+        assert signal.getsignal(signal.SIGWINCH) is CursesAsync.resize_to_terminal
+        CursesAsync.resize_to_terminal()  # without curses running it does nothing
+    finally:
+        signal.signal(signal.SIGWINCH, original)
@@ -0,0 +1,54 @@
+"""The HeadlessBackend the other tests draw on."""
+import curses
+
+import pytest
+
+from CursesUI import CursesBackend
+
+
+def test_doupdate_shows_staged_windows(backend):
+    win = backend.newwin(2, 10, 3, 5)
+    win.addstr(0, 0, "hello", curses.A_BOLD)
+    win.noutrefresh()
+    assert backend.text()[3] == " " * 40
+    backend.doupdate()
+    assert backend.text()[3][5:10] == "hello"
+    assert backend.attr_at(3, 5) & curses.A_BOLD
+    assert backend.flushes == 1
+
+
+def test_only_changed_cells_are_sent(backend):
+    win = backend.newwin(12, 40)
+    win.addstr(0, 0, "abc")
+    win.noutrefresh()
+    backend.doupdate()
+    written = backend.cells_written
+    win.addstr(0, 1, "X")
+    win.noutrefresh()
+    backend.doupdate()
+    assert backend.cells_written - written == 1
+    assert backend.text()[0].startswith("aXc")
+
+
+def test_derived_windows_share_cells(backend):
+    parent = backend.newwin(6, 20)
+    child = parent.derwin(2, 5, 1, 3)
+    child.addstr(0, 0, "ab")
+    assert parent.instr(1, 3, 2) == b"ab"
+    assert child.getbegyx() == (1, 3)
+    with pytest.raises(curses.error):
+        parent.derwin(10, 5, 0, 0)
+
+
+def test_keys_and_exhausted_input(backend):
+    backend.push_keys("ab", curses.KEY_DOWN)
+    assert [backend.stdscr.getch() for _ in range(3)] == [ord("a"), ord("b"), curses.KEY_DOWN]
+    with pytest.raises(CursesBackend.InputExhausted):
+        backend.stdscr.getch()
+
+
+def test_resize_term_queues_key_resize(backend):
+    backend.resize_term(5, 10)
+    assert backend.stdscr.getmaxyx() == (5, 10)
+    assert backend.text() == [" " * 10] * 5
+    assert backend.stdscr.getch() == curses.KEY_RESIZE
@@ -0,0 +1,26 @@
+"""The render benchmarks, run on tiny data sets so the suite stays fast."""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import render_bench
+
+from CursesUI import CursesWidgets
+
+
+def test_frame_recorder_counts_refreshes_and_bytes():
+    result = render_bench.bench_list_scroll(CursesWidgets.ListMenu, 100, 8)
+    assert result["frames"] == 8
+    assert result["flushes_per_frame"] == 1
+    assert result["bytes_per_frame"]["mean"] > 0
+    assert 0 < result["frame_ms"]["p50"] <= result["frame_ms"]["p99"] <= result["frame_ms"]["max"]
+
+
+def test_results_are_json(capsys, monkeypatch):
+    monkeypatch.setattr(render_bench, "run", lambda quick: [render_bench.bench_textbox_typing(5)])
+    render_bench.main(["--quick", "--json", "-"])
+    report = json.loads(capsys.readouterr().out)
+    assert report["quick"] is True
+    assert [result["name"] for result in report["results"]] == ["TextBox typing"]
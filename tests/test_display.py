@@ -0,0 +1,147 @@
+"""Displays handling input, resizes and screens on a HeadlessBackend."""
+import curses
+
+from CursesUI import CursesKeys, CursesLayouts, CursesWidgets
+
+ROWS = ["row %d" % index for index in range(100)]
+
+
+def resize(display, backend, height, width):
+    backend.resize_term(height, width)
+    display.handle_keys([backend.stdscr.getch()])
+    display.draw_scrn()
+
+
+class CountingLabel(CursesWidgets.LabelWidget):
+    __slots__ = ()
+    drawn = []
+
+    def draw_self(self, logger=None):
+        self.drawn.append(self.value)
+        super().draw_self(logger)
+
+
+def test_only_dirty_widgets_are_drawn_in_one_flush(display, backend):
+    layout = display.layout = CursesLayouts.VBox()
+    first = layout.add_widget(CountingLabel("first"))
+    layout.add_widget(CountingLabel("second"))
+    display.draw_scrn()
+    del CountingLabel.drawn[:]
+    backend.reset_counters()
+    display.draw_scrn()
+    assert backend.flushes == 0  # nothing changed, nothing is sent
+    first.change_value("changed")
+    display.draw_scrn()
+    assert CountingLabel.drawn == ["changed"]
+    assert backend.flushes == 1
+    assert [line.strip() for line in backend.text()[::6]] == ["changed", "second"]
+
+
+def test_shrinking_to_a_tiny_terminal(display, backend):
+    display.resize_delay = 0
+    layout = display.layout = CursesLayouts.VBox()
+    menu = layout.add_widget(CursesWidgets.ListMenu(ROWS))
+    box = layout.add_widget(CursesWidgets.TextBox("typed"))
+    layout.add_widget(CursesWidgets.LabelWidget("status"), size=1)
+    layout.active_widget = 1
+    display.draw_scrn()
+    resize(display, backend, 6, 40)
+    assert menu.mounted and not box.mounted  # two rows are too few for the box and its border
+    display.handle_keys([ord("x"), curses.KEY_DOWN])
+    display.draw_scrn()
+    assert box.value == "typed"
+    for height, width in ((3, 40), (1, 1), (2, 3), (12, 1)):
+        resize(display, backend, height, width)
+        display.handle_keys([curses.KEY_DOWN, CursesKeys.TAB, ord("x")])
+        display.draw_scrn()
+    resize(display, backend, 12, 40)
+    assert menu.mounted and box.mounted
+    assert backend.text()[0].strip().startswith("row")
+    assert backend.text()[7].strip() == "|typed" + " " * 33 + "|"
+    assert backend.text()[-1].strip() == "status"
+
+
+class CountingMenu(CursesWidgets.ListMenu):
+    __slots__ = ()
+    calls = []
+
+    def action_down(self, count=1):
+        self.calls.append(count)
+        super().action_down(count)
+
+
+def test_held_key_is_one_input(display):
+    display.layout = CursesLayouts.VBox()
+    menu = display.layout.add_widget(CountingMenu(ROWS))
+    display.draw_scrn()
+    display.handle_keys([curses.KEY_DOWN] * 30)
+    assert menu.calls == [30]
+    assert menu.selected == 30
+
+
+def test_typeahead_is_read_as_one_batch(display, backend):
+    display.layout = CursesLayouts.VBox()
+    display.layout.add_widget(CursesWidgets.ListMenu(ROWS))
+    display.draw_scrn()
+    backend.push_keys(*[curses.KEY_DOWN] * 5, *[curses.KEY_UP] * 2)
+    backend.reset_counters()
+    assert display.wait_for_enter()  # no enter among the keys
+    display.draw_scrn()
+    assert backend.flushes == 1
+    assert display.layout.widgets[0].selected == 3
+
+
+def test_resize_burst_lays_out_once(display, backend):
+    display.resize_delay = 0
+    display.layout = CursesLayouts.VBox()
+    display.layout.add_widget(CursesWidgets.ListMenu(["a", "b"]))
+    display.draw_scrn()
+    layouts = []
+    apply_resize = display.apply_resize
+    display.apply_resize = lambda: layouts.append(apply_resize())
+    backend.resize_term(20, 60)
+    display.handle_keys([curses.KEY_RESIZE] * 10)
+    assert len(layouts) == 1
+    assert backend.stdscr.getmaxyx() == (20, 60)
+
+
+def test_enter_ending_a_search_does_not_stop(display, backend):
+    display.layout = CursesLayouts.VBox()
+    menu = display.layout.add_widget(CursesWidgets.ListMenu(ROWS))
+    display.draw_scrn()
+    backend.push_keys("/row 4\n")
+    assert display.wait_for_enter()
+    assert not menu.searching and len(menu.values) == 11
+    backend.push_keys(curses.KEY_DOWN, "\n", curses.KEY_DOWN)
+    assert not display.wait_for_enter()
+    assert menu.value == 40  # row 40, the second match
+    assert list(display.pending_keys) == [curses.KEY_DOWN]
+
+
+def test_pop_screen_redraws_virtual_list(display, backend):
+    display.layout = CursesLayouts.VBox()
+    display.layout.add_widget(CursesWidgets.VirtualListView(ROWS))
+    display.draw_scrn()
+    popup = CursesLayouts.VBox()
+    popup.add_widget(CursesWidgets.LabelWidget("popup"))
+    display.push_screen(popup)
+    display.draw_scrn()
+    assert backend.text()[0].strip() == "popup"
+    display.pop_screen()
+    display.draw_scrn()
+    assert [line.strip() for line in backend.text()[:2]] == ["row 0", "row 1"]
+
+
+def test_cached_screen_is_shown_without_drawing_its_widgets(display, backend):
+    display.layout = CursesLayouts.VBox()
+    label = display.layout.add_widget(CursesWidgets.LabelWidget("base"))
+    display.draw_scrn()
+    popup = CursesLayouts.VBox()
+    popup.add_widget(CursesWidgets.LabelWidget("popup"))
+    display.push_screen(popup)
+    display.draw_scrn()
+    assert display.screens[0].cached and label.mounted
+    display.pop_screen()
+    assert not label.dirty  # copied back from the off-screen buffer
+    display.draw_scrn()
+    assert backend.text()[0].strip() == "base"
@@ -0,0 +1,60 @@
+"""Key maps and how widgets dispatch keys through them."""
+import curses
+
+import pytest
+
+from CursesUI import CursesKeys, CursesLayouts, CursesWidgets
+
+
+def test_key_codes():
+    assert CursesKeys.key_code("a") == ord("a")
+    assert CursesKeys.key_code("^J") == CursesKeys.ENTER
+    assert CursesKeys.key_code("KEY_DOWN") == curses.KEY_DOWN
+    with pytest.raises(ValueError):
+        CursesKeys.key_code("KEY_NOPE")
+
+
+def test_chord_and_modes():
+    keymap = CursesKeys.KeyMap({"^X s": "save", "q": "quit"})
+    assert keymap.lookup(CursesKeys.key_code("^X")) is CursesKeys.PENDING
+    assert keymap.lookup(ord("s")) == "save"
+    assert keymap.lookup(ord("s")) is None
+    keymap.bind("q", "close", mode="search")
+    keymap.set_mode("search")
+    assert keymap.lookup(ord("q")) == "close"
+    keymap.set_mode(None)
+    assert keymap.lookup(ord("q")) == "quit"
+
+
+def test_rebinding_one_widget_leaves_the_class():
+    menu, other = CursesWidgets.ListMenu(["a"]), CursesWidgets.ListMenu(["a"])
+    menu.keymap.bind("j", "down")
+    assert menu.keymap.lookup(ord("j")) == "down"
+    assert other.keymap.lookup(ord("j")) is None
+
+
+
+def test_subclass_bindings_replace_and_remove():
+    keymap = CursesWidgets.StreamingListView().keymap
+    assert keymap.lookup(ord("/")) is None  # removed with an action of None
+    assert keymap.lookup(curses.KEY_DOWN) == "down"
+    assert CursesKeys.KeyMap.for_class(CursesWidgets.TextInput).lookup(CursesKeys.ENTER) == "submit"
+
+
+class SavingMenu(CursesWidgets.ListMenu):
+    __slots__ = ()
+    bindings = {"^X s": "save"}
+    saved = []
+
+    def action_save(self):
+        self.saved.append(self.selected)
+
+
+def test_chord_through_the_display(display):
+    display.layout = CursesLayouts.VBox()
+    display.layout.add_widget(SavingMenu(["a", "b", "c"]))
+    display.draw_scrn()
+    display.handle_keys([curses.KEY_DOWN, CursesKeys.key_code("^X")])
+    assert SavingMenu.saved == []
+    display.handle_keys([ord("s"), ord("s")])
+    assert SavingMenu.saved == [1]
@@ -0,0 +1,138 @@
+"""Layouts placing widgets on a HeadlessBackend."""
+import curses
+
+import pytest
+
+from CursesUI import CursesLayouts, CursesRecord, CursesWidgets
+
+ROWS = ["row %d" % index for index in range(60_000)]  # past background_search_rows
+
+
+@pytest.mark.parametrize("total", [0, 1, 7, 24, 101])
+@pytest.mark.parametrize("constraints", [
+    [(1, None)],
+    [(1, None), (1, None), (1, None)],
+    [(1, None), (2, None), (0.5, None), (3, None)],
+    [(1, 3), (1, None), (2, None), (1, 1)],
+])
+def test_split_fills_the_total_exactly(total, constraints):
+    sizes = CursesLayouts.split(total, constraints)
+    assert sum(sizes) == total
+    assert min(sizes) >= 0
+
+
+def test_split_gives_fixed_sizes_first():
+    assert CursesLayouts.split(10, [(1, 4), (1, None), (3, None)]) == [4, 2, 4]
+    assert CursesLayouts.split(3, [(1, 2), (1, 5)]) == [2, 1]
+    assert CursesLayouts.split(5, [(1, 2), (0, None)]) == [2, 0]
+
+
+def test_saved_screen_survives_clear_widgets(display, backend):
+    layout = display.layout = CursesLayouts.VBox()
+    menu = layout.add_widget(CursesWidgets.ListMenu(["a%d" % index for index in range(20)]), size=3)
+    layout.add_widget(CursesWidgets.LabelWidget("below"))
+    display.draw_scrn()
+    pos = layout.save_screen()
+    layout.clear_widgets()
+    layout.add_widget(CursesWidgets.LabelWidget("other"))
+    display.draw_scrn()
+    assert backend.text()[0].strip() == "other"
+    layout.load_screen(pos)
+    display.draw_scrn()
+    assert menu.win.getmaxyx() == (3, 40)
+    assert [line.strip() for line in backend.text()[:4]] == ["a0", "a1", "a2", "below"]
+
+
+def test_load_screen_takes_the_windows_of_replaced_widgets(display, backend):
+    layout = display.layout = CursesLayouts.VBox()
+    first = layout.add_widget(CursesWidgets.LabelWidget("first"))
+    display.draw_scrn()
+    first_screen = layout.save_screen()
+    layout.clear_widgets()
+    second = layout.add_widget(CursesWidgets.LabelWidget("second"))
+    third = layout.add_widget(CursesWidgets.LabelWidget("third"))
+    second_screen = layout.save_screen()
+    display.draw_scrn()
+    layout.load_screen(first_screen)
+    display.draw_scrn()
+    assert not second.mounted and not third.mounted
+    assert set(layout.geometry) == {first}
+    assert [line.strip() for line in backend.text()[:2]] == ["first", ""]
+    extra = layout.add_widget(CursesWidgets.LabelWidget("extra"))
+    display.draw_scrn()
+    layout.load_screen(second_screen)
+    display.draw_scrn()
+    assert not first.mounted and not extra.mounted
+    assert extra not in layout.geometry
+    assert [line.strip() for line in backend.text()[::6]] == ["second", "third"]
+
+
+def test_nested_layouts_share_the_parent_window(display, backend):
+    outer = display.layout = CursesLayouts.VBox()
+    outer.add_widget(CursesWidgets.LabelWidget("top"), size=2)
+    inner = outer.add_widget(CursesLayouts.HBox())
+    left = inner.add_widget(CursesWidgets.LabelWidget("left"))
+    right = inner.add_widget(CursesWidgets.LabelWidget("right"), size=10)
+    display.draw_scrn()
+    assert inner.win.getbegyx() == (2, 0)
+    assert left.win.getmaxyx() == (10, 30) and right.win.getbegyx() == (2, 30)
+    assert backend.text()[2].split() == ["left", "right"]
+
+
+def test_grid_and_split_geometry():
+    grid = CursesLayouts.Grid(columns=2, column_constraints=[(1, 4), (1, None)], row_constraints=[(1, 1)])
+    for _ in range(3):
+        grid.widgets.append(CursesWidgets.LabelWidget(""))
+    assert grid.compute_geometry(5, 10) == [(0, 0, 1, 4), (0, 4, 1, 6), (1, 0, 4, 4)]
+    halves = CursesLayouts.Split(vertical=True, ratio=0.25)
+    for _ in range(2):
+        halves.add_widget(CursesWidgets.LabelWidget(""))
+    assert halves.compute_geometry(8, 3) == [(0, 0, 2, 3), (2, 0, 6, 3)]
+
+
+def test_moving_a_split_lays_out_only_that_split(display):
+    outer = display.layout = CursesLayouts.VBox()
+    label = outer.add_widget(CursesWidgets.LabelWidget("top"), size=2)
+    halves = outer.add_widget(CursesLayouts.Split())
+    first = halves.add_widget(CursesWidgets.LabelWidget("first"))
+    halves.add_widget(CursesWidgets.LabelWidget("second"))
+    display.draw_scrn()
+    label_win = label.win
+    halves.action_grow_first(2)
+    display.draw_scrn()
+    assert label.win is label_win
+    assert first.win.getmaxyx() == (10, 24)
+
+
+def test_stack_pages(display, backend):
+    stack = CursesLayouts.Stack()
+    display.layout = stack
+    for name in ("first", "second"):
+        stack.add_widget(CursesWidgets.ListMenu([name]))
+    display.draw_scrn()
+    display.handle_keys([curses.KEY_SNEXT])
+    display.draw_scrn()
+    assert backend.text()[0].strip() == "second"
+    display.handle_keys([curses.KEY_SPREVIOUS])
+    display.draw_scrn()
+    assert backend.text()[0].strip() == "first"
+
+
+def test_search_result_for_hidden_list(display, backend):
+    stack = CursesLayouts.Stack()
+    display.layout = stack
+    menu = stack.add_widget(CursesWidgets.ListMenu(ROWS))
+    stack.add_widget(CursesWidgets.LabelWidget("other page"))
+    stack.show(0)
+    display.draw_scrn()
+    display.handle_keys([ord(char) for char in "/row 4"])
+    stack.show(1)
+    display.draw_scrn()  # the list has no window when the search is done
+    for worker in CursesRecord.search_workers(stack):
+        worker.wait_idle(10)
+    display.draw_scrn()
+    stack.show(0)
+    display.draw_scrn()
+    assert len(menu.values) == 11111
+    assert menu.selected == 0
+    assert backend.text()[0].strip() == "row 4"
@@ -0,0 +1,68 @@
+"""Widgets giving back their windows and threads when screens are replaced."""
+import gc
+
+import pytest
+
+from CursesUI import CursesLayouts, CursesTable, CursesWidgets
+
+ROWS = ["row %d" % index for index in range(60_000)]  # past background_search_rows
+
+
+def build_screen():
+    split = CursesLayouts.Split()
+    left = split.add_widget(CursesLayouts.VBox())
+    left.add_widget(CursesWidgets.ListMenu(ROWS[:100]))
+    left.add_widget(CursesWidgets.LabelWidget("status"), size=1)
+    right = split.add_widget(CursesLayouts.Grid(columns=2))
+    right.add_widget(CursesWidgets.MultiColumnList(model=CursesTable.TableModel([(1, "a"), (2, "b")])))
+    right.add_widget(CursesWidgets.TextBox())
+    right.add_widget(CursesWidgets.VirtualListView(ROWS))
+    right.add_widget(CursesWidgets.TextInput())
+    return split
+
+
+def live_windows(backend):
+    gc.collect()
+    return len(backend.windows)
+
+
+@pytest.mark.parametrize("widget", [CursesWidgets.LabelWidget("label"), CursesWidgets.ListMenu([]),
+                                    CursesWidgets.TextBox(), CursesLayouts.VBox()], ids=type)
+def test_widgets_have_no_dict(widget):
+    assert not hasattr(widget, "__dict__")
+
+
+def test_rebuilt_screens_keep_windows_flat(display, backend):
+    display.layout = CursesLayouts.VBox()
+    display.draw_scrn()
+    before = live_windows(backend)
+    for _ in range(20):
+        display.push_screen(build_screen())
+        display.draw_scrn()
+        display.pop_screen()
+        display.layout.add_widget(build_screen())
+        display.draw_scrn()
+        display.clear_layout()
+        display.draw_scrn()
+    assert live_windows(backend) == before
+
+
+def test_disposed_widgets_drop_their_windows(display):
+    layout = display.layout = CursesLayouts.VBox()
+    box = layout.add_widget(CursesWidgets.TextBox())
+    display.draw_scrn()
+    assert box.mounted
+    display.clear_layout()
+    assert not box.mounted and box.win is None and box.editwin is None
+
+
+def test_pop_screen_stops_background_search(display):
+    display.layout = CursesLayouts.VBox()
+    popup = CursesLayouts.VBox()
+    menu = popup.add_widget(CursesWidgets.ListMenu(ROWS))
+    display.push_screen(popup)
+    display.draw_scrn()
+    display.handle_keys([ord(char) for char in "/row 4"])
+    worker = menu.search_worker
+    assert display.pop_screen() is popup
+    assert worker.stopped and menu.search_worker is None
@@ -0,0 +1,43 @@
+"""The buffered debug logger and how a display hands it to its widgets."""
+import logging
+
+from CursesUI import CursesDisplay, CursesLayouts, CursesLogger, CursesWidgets
+
+
+def test_disabled_logger_evaluates_nothing(tmp_path):
+    path = tmp_path / "log.txt"
+    logger = CursesLogger.Logger(0, path=str(path))
+    logger.log("drawn", lambda: 1 / 0)
+    logger.close()
+    assert not logger.enabled
+    assert logger.thread is None and not path.exists()
+
+
+def test_level_limits_the_strings_written(tmp_path):
+    path = tmp_path / "log.txt"
+    logger = CursesLogger.Logger(1, path=str(path))
+    logger.log(("first %d", 1), "second")
+    logger.log_level = 2
+    logger.log("third", lambda: "fourth")
+    logger.flush()
+    assert path.read_text() == "first 1\nthird\nfourth\n"
+    logger.close()
+
+
+def test_bridge_to_logging(caplog):
+    logger = CursesLogger.Logger(1, path=None, bridge=True, background=False)
+    with caplog.at_level(logging.DEBUG, logger="CursesUI"):
+        logger.log(("size %s", (3, 4)))
+    assert caplog.messages == ["size (3, 4)"]
+
+
+def test_display_uses_the_given_logger(backend, tmp_path):
+    logger = CursesLogger.Logger(1, path=str(tmp_path / "ui.log"), background=False)
+    display = CursesDisplay.Display(backend.stdscr, backend=backend, logger=logger)
+    display.layout = CursesLayouts.VBox()
+    label = display.layout.add_widget(CursesWidgets.LabelWidget("a"))
+    display.draw_scrn()
+    display.dispose()
+    logger.close()
+    assert display.logger is logger and label.logger is logger
+    assert "Drawing Layout" in (tmp_path / "ui.log").read_text()
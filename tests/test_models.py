@@ -0,0 +1,85 @@
+"""Observable models and the rows of widgets they redraw."""
+import curses
+import gc
+
+from CursesUI import CursesLayouts, CursesModels, CursesWidgets
+
+
+class CountingList(CursesWidgets.ListView):
+    __slots__ = ()
+    drawn = []
+
+    def draw_line(self, row, index, attr=curses.A_NORMAL):
+        self.drawn.append(index)
+        super().draw_line(row, index, attr)
+
+
+def shown_rows(backend):
+    return [line.strip() for line in backend.text()]
+
+
+def test_list_events():
+    values = CursesModels.ObservableList(["a", "b"])
+    events = []
+    values.watch(lambda *event: events.append(event))
+    values.append("c")
+    values[-1] = "C"
+    values.insert(-10, "start")
+    del values[1]
+    values.extend([])
+    values.reset(["x"])
+    assert events == [("insert", 2, 1), ("update", 2, 1), ("insert", 0, 1), ("remove", 1, 1), ("reset", 0, 1)]
+    assert values.version == 5
+
+
+def test_computed_is_lazy_and_notifies_once():
+    rows = CursesModels.ObservableList()
+    calls = []
+    total = CursesModels.Computed(lambda: calls.append(1) or "%d rows" % len(rows), rows)
+    notified = []
+    total.watch(lambda: notified.append(1))
+    assert total.value == "0 rows"
+    rows.extend(range(3))
+    rows.append(3)
+    assert notified == [1] and calls == [1]
+    assert total.value == "4 rows" and calls == [1, 1]
+
+
+def test_watching_widgets_are_not_kept_alive():
+    values = CursesModels.ObservableList(["a"])
+    view = CursesWidgets.ListView(values)
+    assert len(values.watchers) == 1
+    del view
+    gc.collect()
+    values.append("b")
+    assert values.watchers == []
+
+
+def test_updates_redraw_only_the_changed_rows(display, backend):
+    values = CursesModels.ObservableList("row %d" % index for index in range(100))
+    display.layout = CursesLayouts.VBox()
+    view = display.layout.add_widget(CountingList(values))
+    display.draw_scrn()
+    del view.drawn[:]
+    values[3] = "changed"
+    values[50] = "below the screen"
+    display.draw_scrn()
+    assert view.drawn == [3]
+    assert shown_rows(backend)[2:5] == ["row 2", "changed", "row 4"]
+    values.append("appended")
+    display.draw_scrn()
+    assert view.drawn == [3]  # nothing on screen moved
+    values.insert(0, "first")
+    display.draw_scrn()
+    assert shown_rows(backend)[:2] == ["first", "row 0"]
+
+
+def test_label_follows_its_value(display, backend):
+    status = CursesModels.ObservableValue("idle")
+    display.layout = CursesLayouts.VBox()
+    display.layout.add_widget(CursesWidgets.LabelWidget(status), size=1)
+    display.draw_scrn()
+    status.value = "loading"
+    assert backend.text()[0].strip() == "idle"
+    display.draw_scrn()
+    assert backend.text()[0].strip() == "loading"
@@ -0,0 +1,60 @@
+"""Color pairs handed out by the shared palette."""
+import curses
+import gc
+import weakref
+
+from CursesUI import CursesBackend, CursesPalette
+
+
+def pair_of(attr):
+    return (attr & curses.A_COLOR) >> 8
+
+
+def test_pairs_are_shared_and_lazy(backend):
+    palette = CursesPalette.Palette(backend)
+    assert backend.pairs == {0: (-1, -1)}
+    red = palette.attr("white", "red")
+    assert palette.attr(curses.COLOR_WHITE, curses.COLOR_RED, curses.A_BOLD) == red | curses.A_BOLD
+    assert backend.pairs[pair_of(red)] == (curses.COLOR_WHITE, curses.COLOR_RED)
+    assert palette.attr() == 0  # the terminal default is pair 0
+    assert len(backend.pairs) == 2
+
+
+def test_least_recently_used_pair_is_reused(backend):
+    backend.color_pairs = 4
+    palette = CursesPalette.Palette(backend)
+    first, second, third = (palette.attr("white", bg) for bg in ("red", "green", "blue"))
+    assert [pair_of(attr) for attr in (first, second, third)] == [1, 2, 3]
+    palette.attr("white", "red")  # used again, green is now the oldest
+    yellow = palette.attr("white", "yellow")
+    assert pair_of(yellow) == 2
+    assert backend.pairs[2] == (curses.COLOR_WHITE, curses.COLOR_YELLOW)
+    assert pair_of(palette.attr("white", "green")) == 3  # asked for again, it takes the next oldest pair
+
+
+def test_reserved_pairs_are_left_to_the_app(backend):
+    palette = CursesPalette.Palette(backend)
+    early = palette.attr("white", "red")
+    palette.reserve(5)
+    backend.init_pair(1, curses.COLOR_BLACK, curses.COLOR_CYAN)
+    later = palette.attr("white", "red")
+    assert pair_of(early) == 1 and pair_of(later) == 6
+    assert backend.pairs[1] == (curses.COLOR_BLACK, curses.COLOR_CYAN)
+    assert CursesPalette.Palette(backend, reserved_pairs=5).first_pair == 6
+
+
+def test_colors_past_the_terminal_are_mapped_to_basic_colors(backend):
+    backend.colors = 8
+    palette = CursesPalette.Palette(backend)
+    attr = palette.attr(196, 21)  # bright red on blue in the 256 color palette
+    assert backend.pairs[pair_of(attr)] == (curses.COLOR_RED, curses.COLOR_BLUE)
+
+
+def test_palette_does_not_keep_its_backend_alive():
+    backend = CursesBackend.HeadlessBackend(2, 2)
+    CursesPalette.for_backend(backend).style("red")
+    assert CursesPalette.for_backend(backend) is CursesPalette.for_backend(backend)
+    ref = weakref.ref(backend)
+    del backend
+    gc.collect()
+    assert ref() is None
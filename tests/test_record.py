@@ -0,0 +1,87 @@
+"""Sessions recorded on a HeadlessBackend and replayed."""
+import curses
+import gzip
+import io
+
+import pytest
+
+from CursesUI import CursesLayouts, CursesRecord, CursesWidgets
+
+ROWS = ["row %d" % index for index in range(1000)]
+
+
+def build(rows):
+    def build_display(display):
+        display.layout = CursesLayouts.VBox()
+        display.layout.add_widget(CursesWidgets.LabelWidget("title"), size=1)
+        display.layout.add_widget(CursesWidgets.ListMenu(rows))
+    return build_display
+
+
+def record_session(display, backend):
+    build(ROWS)(display)
+    recording = io.BytesIO()
+    display.start_recording(recording)
+    display.draw_scrn()
+    display.handle_keys([curses.KEY_DOWN] * 15)
+    display.draw_scrn()
+    display.resize_delay = 0
+    backend.resize_term(8, 30)
+    display.handle_keys([backend.stdscr.getch()])
+    display.draw_scrn()
+    display.handle_keys([ord(char) for char in "/row 99"])
+    display.draw_scrn()
+    display.stop_recording()
+    recording.seek(0)
+    return recording
+
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 300, 1 << 40])
+def test_varints_round_trip(value):
+    data = bytearray()
+    CursesRecord.put_varint(data, value)
+    assert CursesRecord.get_varint(bytes(data), 0) == (value, len(data))
+    for signed in (value, -value):
+        assert CursesRecord.unzigzag(CursesRecord.zigzag(signed)) == signed
+
+
+def test_recording_loads_back(display, backend):
+    session = CursesRecord.Session.load(record_session(display, backend))
+    assert (session.height, session.width) == (12, 40)
+    assert session.frames == 4
+    assert [event[2:] for event in session.events if event[0] == "resize"] == [(8, 30)]
+    first_frame = next(event for event in session.events if event[0] == "frame")
+    assert first_frame[4][0][0].strip() == "title"
+    assert len(first_frame[4]) == 12  # the first frame holds every row
+
+
+def test_replay_matches_the_recording(display, backend):
+    session = CursesRecord.Session.load(record_session(display, backend))
+    result = CursesRecord.replay(session, build(ROWS))
+    assert result.matched and result.frames == session.frames
+    assert result.summary()["frame"]["count"] == session.frames
+
+
+def test_replay_reports_the_first_different_row(display, backend):
+    recording = record_session(display, backend)
+    result = CursesRecord.replay(recording, build(["other %d" % index for index in range(1000)]))
+    assert not result.matched
+    frame, row, recorded, replayed = result.mismatches[0]
+    assert (frame, row, recorded.strip(), replayed.strip()) == (0, 1, "row 0", "other 0")
+
+
+def test_empty_recording_has_no_events():
+    recording = io.BytesIO()
+    CursesRecord.Recorder(recording, 3, 5).close()
+    recording.seek(0)
+    session = CursesRecord.Session.load(recording)
+    assert (session.height, session.width, session.events) == (3, 5, [])
+
+
+def test_other_files_are_refused():
+    recording = io.BytesIO()
+    with gzip.GzipFile(fileobj=recording, mode="wb") as file:
+        file.write(b"not a session\n")
+    recording.seek(0)
+    with pytest.raises(ValueError, match="not a CursesUI session"):
+        CursesRecord.Session.load(recording)
@@ -0,0 +1,66 @@
+"""One DisplayServer process serving terminals over a unix socket."""
+import asyncio
+import curses
+
+from CursesUI import CursesKeys, CursesLayouts, CursesServer, CursesWidgets
+
+
+def test_server_decodes_split_escape_sequences():
+    decoder = CursesServer.KeyDecoder()
+    assert decoder.feed(b"a\x1b[") == [ord("a")]
+    assert decoder.feed(b"6;2~\x1b[B") == [curses.KEY_SNEXT, curses.KEY_DOWN]
+
+
+def test_server_decodes_size_reports_and_lone_escapes():
+    decoder = CursesServer.KeyDecoder()
+    assert decoder.feed(CursesServer.size_report(30, 90) + b"\r") == [("resize", 30, 90), CursesKeys.ENTER]
+    assert decoder.feed(b"\x1bq\x1bOP") == [CursesKeys.ESCAPE, ord("q"), curses.KEY_F1]
+    assert decoder.feed("é".encode()[:1]) == []
+    assert decoder.feed("é".encode()[1:]) == [ord("é")]
+
+
+async def read_until(reader, text: bytes):
+    received = b""
+    while text not in received:
+        received += await asyncio.wait_for(reader.read(4096), 5)
+    return received
+
+
+def test_sessions_share_data_but_not_state(tmp_path):
+    path = str(tmp_path / "server.sock")
+    rows = ["row %d" % index for index in range(50)]
+    menus = []
+
+    def build(session):
+        layout = CursesLayouts.VBox()
+        menus.append(layout.add_widget(CursesWidgets.ListMenu(rows)))
+        return layout
+
+    async def main():
+        server = CursesServer.DisplayServer(build, path, frame_interval=0)
+        serving = asyncio.ensure_future(server.serve())
+        while not (tmp_path / "server.sock").exists():
+            await asyncio.sleep(0.01)
+        first = await asyncio.open_unix_connection(path)
+        second = await asyncio.open_unix_connection(path)
+        first[1].write(CursesServer.size_report(10, 30))
+        second[1].write(CursesServer.size_report(5, 20))
+        await read_until(first[0], b"row 9")
+        await read_until(second[0], b"row 4")
+        first[1].write(b"\x1b[B" * 10)
+        await read_until(first[0], b"row 10")
+        sizes = sorted(session.backend.stdscr.getmaxyx() for session in server.sessions)
+        for reader, writer in (first, second):
+            writer.close()
+        for _ in range(500):  # each session ends once the server reads its client's end of file
+            if not server.sessions:
+                break
+            await asyncio.sleep(0.01)
+        assert not server.sessions
+        serving.cancel()
+        await asyncio.gather(serving, return_exceptions=True)
+        return sizes
+
+    assert asyncio.run(main()) == [(5, 20), (10, 30)]
+    assert sorted(menu.selected for menu in menus) == [0, 10]
+    assert menus[0].values is menus[1].values
@@ -0,0 +1,48 @@
+"""What short lived tools pay for before their first frame."""
+import curses
+import subprocess
+import sys
+
+import pytest
+
+from CursesUI import CursesBackend, CursesKeys, CursesLogger, CursesPick
+
+ROOT = __file__.rsplit("/tests/", 1)[0]
+
+
+def imported_after(code: str):
+    script = "import sys\n%s\nprint(' '.join(sorted(sys.modules)))" % code
+    output = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, check=True)
+    return set(output.stdout.split())
+
+
+def test_package_import_loads_no_submodules():
+    modules = imported_after("import CursesUI")
+    assert not [module for module in modules if module.startswith("CursesUI.")]
+
+
+def test_display_import_skips_unused_modules():
+    modules = imported_after("from CursesUI import CursesDisplay")
+    assert not modules & {"logging", "inspect", "curses.textpad", "CursesUI.CursesServer", "CursesUI.CursesRecord"}
+
+
+def test_logger_touches_no_file_until_it_logs(tmp_path):
+    path = tmp_path / "log.txt"
+    logger = CursesLogger.Logger(1, path=str(path), background=False)
+    assert not path.exists()
+    logger.log("first line")
+    logger.close()
+    assert path.read_text().splitlines() == ["first line"]
+
+
+@pytest.mark.parametrize("keys, chosen", [
+    ([curses.KEY_DOWN, curses.KEY_DOWN, CursesKeys.ENTER], 2),
+    ([ord(char) for char in "/item 7"] + [CursesKeys.ENTER, CursesKeys.ENTER], 7),
+    ([CursesKeys.ESCAPE], None),
+])
+def test_choose(keys, chosen):
+    backend = CursesBackend.HeadlessBackend(8, 30)
+    backend.push_keys(*keys)
+    assert CursesPick.choose(backend.stdscr, ["item %d" % index for index in range(20)], "Pick:",
+                             backend=backend) == chosen
+    assert backend.text()[0].strip() == "Pick:"
@@ -0,0 +1,59 @@
+"""Frame and widget timings, and the overlay showing them."""
+import curses
+
+import pytest
+
+from CursesUI import CursesDisplay, CursesLayouts, CursesStats, CursesWidgets
+
+
+@pytest.fixture
+def timed_display(backend):
+    display = CursesDisplay.Display(backend.stdscr, backend=backend, stats=True)
+    yield display
+    display.dispose()
+
+
+def test_histogram_summary():
+    histogram = CursesStats.Histogram(samples=4)
+    for value in (5, 1, 3, 2, 4):
+        histogram.add(value)
+    assert (histogram.count, histogram.min, histogram.max, histogram.mean) == (5, 1, 5, 3)
+    assert list(histogram.recent) == [1, 3, 2, 4]  # only the newest samples
+    assert histogram.percentile(0.5) == 3 and histogram.percentile(0.99) == 4
+    assert CursesStats.Histogram().snapshot()["p99"] == 0.0
+
+
+def test_display_without_stats_collects_nothing(display):
+    display.layout = CursesLayouts.VBox()
+    display.layout.add_widget(CursesWidgets.LabelWidget("label"))
+    display.draw_scrn()
+    display.handle_keys([curses.KEY_F12])
+    assert display.stats is None and display.overlay is None
+
+
+def test_frames_and_widgets_are_timed(timed_display):
+    timed_display.layout = CursesLayouts.VBox()
+    menu = timed_display.layout.add_widget(CursesWidgets.ListMenu(["a", "b", "c"]))
+    timed_display.draw_scrn()
+    timed_display.handle_keys([curses.KEY_DOWN])
+    timed_display.draw_scrn()
+    timed_display.draw_scrn()  # nothing is dirty, no frame
+    snapshot = timed_display.stats.snapshot()
+    assert snapshot["counters"]["frames"] == 2
+    assert snapshot["histograms"]["frame"]["count"] == 2
+    assert snapshot["histograms"]["input to frame"]["count"] == 1
+    assert [widget for widget, histogram in timed_display.stats.slowest_widgets()] == [menu]
+
+
+def test_overlay_toggles_over_the_layout(timed_display, backend):
+    timed_display.layout = CursesLayouts.VBox()
+    timed_display.layout.add_widget(CursesWidgets.ListMenu(["item %d" % index for index in range(20)]))
+    timed_display.draw_scrn()
+    timed_display.handle_keys([curses.KEY_F12])
+    timed_display.draw_scrn()
+    assert backend.text()[1][1:].startswith("frame p50")
+    assert "ListMenu" in backend.text()[4]
+    timed_display.handle_keys([curses.KEY_F12])
+    timed_display.draw_scrn()
+    assert timed_display.overlay is None
+    assert backend.text()[1].strip() == "item 1"
@@ -0,0 +1,39 @@
+"""Tables in a TableModel and MultiColumnList."""
+from CursesUI import CursesLayouts, CursesTable, CursesWidgets
+
+
+def test_ragged_rows_keep_every_column():
+    model = CursesTable.TableModel([["a", "b", "c"], ["d", "e", "f"], ["g", "h"]])
+    assert model.column_count == 3
+    assert model.row(2) == ("g", "h", "")
+
+
+def test_append_to_empty_table(display, backend):
+    model = CursesTable.TableModel()
+    display.layout = CursesLayouts.VBox()
+    display.layout.add_widget(CursesWidgets.MultiColumnList(model=model))
+    display.draw_scrn()
+    model.append(("x", 1))
+    model.append(("y", 2, "z"))
+    display.draw_scrn()
+    assert model.column_count == 3
+    assert model.row(0) == ("x", 1, "")
+    assert backend.text()[1].split() == ["y", "2", "z"]
+
+
+def test_sorting_by_a_column(display, backend):
+    model = CursesTable.TableModel([["b", 2], ["c", 1], ["a", 3]])
+    display.layout = CursesLayouts.VBox()
+    table = display.layout.add_widget(CursesWidgets.MultiColumnList(model=model))
+    display.draw_scrn()
+    display.handle_keys([ord("2")])
+    display.draw_scrn()
+    assert [line.split() for line in backend.text()[:3]] == [["c", "1"], ["b", "2"], ["a", "3"]]
+    display.handle_keys([ord("2")])
+    display.draw_scrn()
+    assert backend.text()[0].split() == ["a", "3"]
+    display.handle_keys([ord("0")])
+    display.draw_scrn()
+    assert backend.text()[0].split() == ["b", "2"]
+    assert model.sort_order(0) == [2, 0, 1]
+    assert table.sort_column is None
@@ -0,0 +1,73 @@
+"""The text document and the editor widgets built on it."""
+import curses
+
+import pytest
+
+from CursesUI import CursesKeys, CursesLayouts, CursesText, CursesWidgets
+
+
+def test_gap_buffer_edits_anywhere():
+    buffer = CursesText.GapBuffer("abcdef", gap_size=2)
+    buffer.insert(3, "X")
+    buffer.insert(0, "Y")
+    buffer.delete(5, 2)
+    buffer[1] = "Z"
+    assert list(buffer) == list("YZbcX") + ["f"]
+
+
+def test_typing_is_undone_a_word_at_a_time():
+    document = CursesText.Document("end")
+    position = 0, 0
+    for char in "one two ":
+        position = document.insert(*position, char)
+    assert document.text == "one two end"
+    assert document.undo() == (0, 4)
+    assert document.text == "one end"
+    assert document.undo() == (0, 0)
+    assert document.undo() is None
+    assert document.redo() == (0, 4)
+    assert document.text == "one end"
+
+
+def test_undo_and_redo_across_lines():
+    document = CursesText.Document("first\nsecond")
+    document.delete(0, 3, 1, 2)
+    assert document.text == "fircond"
+    document.insert(0, 2, "\nnew\n")
+    assert len(document) == 3
+    document.undo()
+    document.undo()
+    assert document.text == "first\nsecond"
+    document.redo()
+    assert document.text == "fircond"
+    document.insert(0, 0, "x")
+    assert document.redo() is None  # a new edit drops what was undone
+
+
+def test_backspaces_are_one_undo_step(display):
+    display.layout = CursesLayouts.VBox()
+    box = display.layout.add_widget(CursesWidgets.TextBox("hello"))
+    display.draw_scrn()
+    display.handle_keys([curses.KEY_END] + [CursesKeys.BACKSPACE] * 3 + [CursesKeys.key_code("^U")])
+    assert box.value == "hello" and box.col == 5
+    display.handle_keys([CursesKeys.key_code("^R")])
+    assert box.value == "he"
+
+
+@pytest.mark.parametrize("widget_class", [CursesWidgets.TextBox, CursesWidgets.TextInput])
+def test_shrinking_a_box_below_its_border(display, backend, widget_class):
+    display.resize_delay = 0
+    display.layout = CursesLayouts.VBox()
+    box = display.layout.add_widget(widget_class("text"))
+    display.draw_scrn()
+    for height, width in ((6, 40), (3, 6), (3, 3), (2, 40), (1, 1), (12, 2), (4, 10)):
+        box.resize(height, width)  # straight to the widget, below the size a layout would give it
+        box.draw()
+        assert (box.editwin is not None) == (height >= 3 and width >= 3)
+    for height, width in ((6, 40), (2, 40), (1, 1), (3, 6), (12, 40)):
+        backend.resize_term(height, width)
+        display.handle_keys([backend.stdscr.getch(), ord("!")])
+        display.draw_scrn()
+    assert box.value == "!!!text"  # typed only while the box was shown
+    assert backend.text()[1].strip() == "|!!!text" + " " * 31 + "|"
+    assert box.editwin.getmaxyx() == (10 if widget_class is CursesWidgets.TextBox else 1, 38)
@@ -0,0 +1,41 @@
+"""Updates posted to a display from worker threads."""
+import threading
+
+from CursesUI import CursesLayouts, CursesUpdates, CursesWidgets
+
+
+def test_posts_to_different_objects_are_kept():
+    updates = CursesUpdates.UpdateQueue()
+    first, second = CursesWidgets.LabelWidget("a"), CursesWidgets.LabelWidget("b")
+    updates.post(None, first.change_value, 1)
+    updates.post(None, second.change_value, 2)
+    updates.post(None, first.change_value, 3)
+    assert updates.drain() == 2
+    assert (first.value, second.value) == ("3", "2")
+
+
+def test_posts_with_unique_keys_are_all_applied(display):
+    display.layout = CursesLayouts.VBox()
+    lines = []
+    for line in "abcde":
+        display.post(None, lines.append, line, key=object())
+    display.draw_scrn()
+    assert lines == list("abcde")
+
+
+def test_worker_posts_are_drawn_on_the_next_frame(display, backend):
+    display.layout = CursesLayouts.VBox()
+    label = display.layout.add_widget(CursesWidgets.LabelWidget("waiting"))
+    display.draw_scrn()
+    wakeups = []
+    display.updates.wakeup = lambda: wakeups.append(threading.current_thread())
+    workers = [threading.Thread(target=display.post, args=(label, label.change_value, "done %d" % index))
+               for index in range(8)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert len(wakeups) == 1 and wakeups[0] in workers
+    display.draw_scrn()
+    assert backend.text()[0].strip().startswith("done")
+    assert len(display.updates) == 0
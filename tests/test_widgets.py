@@ -0,0 +1,87 @@
+"""Widgets drawn on a HeadlessBackend, checked cell by cell."""
+import curses
+
+from CursesUI import CursesLayouts, CursesWidgets
+
+ROWS = ["row %d" % index for index in range(1_000_000)]
+
+
+def shown_rows(backend):
+    return [line.strip() for line in backend.text()]
+
+
+def test_virtual_list_renders_only_a_window_of_rows(display, backend):
+    display.layout = CursesLayouts.VBox()
+    view = display.layout.add_widget(CursesWidgets.VirtualListView(ROWS))
+    display.draw_scrn()
+    assert view.pad.getmaxyx() == (36, 40)  # three screens, not a million rows
+    assert shown_rows(backend) == ROWS[:12]
+    display.handle_keys([curses.KEY_DOWN] * 20)
+    display.draw_scrn()
+    assert view.pad_top == 0  # still inside the rendered rows, only the pad moved
+    display.handle_keys([curses.KEY_END])
+    display.draw_scrn()
+    assert len(ROWS) - 36 <= view.pad_top <= len(ROWS) - 12
+    assert shown_rows(backend) == ROWS[-12:]
+
+
+def test_streaming_list_follows_the_tail(display, backend):
+    display.layout = CursesLayouts.VBox()
+    view = display.layout.add_widget(CursesWidgets.StreamingListView(iter(ROWS[:30]), max_lines=100))
+    display.draw_scrn()
+    view.reader.thread.join(10)
+    display.draw_scrn()
+    assert shown_rows(backend) == ROWS[18:30]
+    display.handle_keys([curses.KEY_UP])
+    view.extend(ROWS[30:40])
+    display.draw_scrn()
+    assert not view.follow
+    assert shown_rows(backend) == ROWS[17:29]  # scrolled up, new lines don't move the view
+    display.handle_keys([curses.KEY_END])
+    view.extend(ROWS[40:200])
+    display.draw_scrn()
+    assert view.follow and len(view.values) == 100
+    assert shown_rows(backend) == ROWS[188:200]
+
+
+def test_highlight_stays_in_text_area(display, backend):
+    display.layout = CursesLayouts.VBox()
+    display.layout.add_widget(CursesWidgets.ListMenu(["x" * 80] * 20))
+    display.draw_scrn()
+    display.handle_keys([curses.KEY_DOWN])
+    display.draw_scrn()
+    text, attrs = backend.screen_rows()[1]
+    highlighted = [x for x, attr in enumerate(attrs) if attr & curses.A_STANDOUT]
+    assert highlighted == list(range(1, 39))
+
+
+class CountingList(CursesWidgets.ListView):
+    __slots__ = ()
+    drawn = []
+
+    def draw_line(self, row, index, attr=curses.A_NORMAL):
+        self.drawn.append(index)
+        super().draw_line(row, index, attr)
+
+
+def test_scrolling_draws_only_the_new_rows(display, backend):
+    display.layout = CursesLayouts.VBox()
+    view = display.layout.add_widget(CountingList(ROWS))
+    display.draw_scrn()
+    del view.drawn[:]
+    display.handle_keys([curses.KEY_DOWN] * 3)
+    display.draw_scrn()
+    assert view.drawn == [12, 13, 14]
+    assert shown_rows(backend) == ROWS[3:15]
+
+
+def test_long_lists_are_searched_in_the_background(display, backend):
+    display.layout = CursesLayouts.VBox()
+    menu = display.layout.add_widget(CursesWidgets.ListMenu(ROWS[:60_000]))  # past background_search_rows
+    display.draw_scrn()
+    display.handle_keys([ord(char) for char in "/row 5999"])
+    menu.search_worker.wait_idle(10)
+    display.draw_scrn()
+    assert list(menu.values) == ["row 5999"] + ["row 5999%d" % digit for digit in range(10)]
+    assert shown_rows(backend)[:2] == ["row 5999", "row 59990"]
+    assert shown_rows(backend)[-1] == "/row 5999  (11)"